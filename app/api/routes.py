@@ -1,57 +1,147 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
-from app.models.schemas import TranscriptionRequest, TranscriptionResponse
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import Response, StreamingResponse
+from app.models.schemas import (
+    BatchStatusResponse,
+    BatchTranscriptionRequest,
+    BatchTranscriptionResponse,
+    JobStatusResponse,
+    TranscriptionRequest,
+    TranscriptionResponse,
+    UploadTranscriptionRequest
+)
 from app.services.google_drive import GoogleDriveService
-from app.services.transcription import TranscriptionService
+from app.services.transcription import PCM_SUFFIX, AudioPipelineError, TranscriptionService, pcm_duration
 from app.services.queue_manager import QueueManager
+from app.services.worker_pool import WorkerPool
+from app.services.transcription_cache import TranscriptionCache
+from app.services.audio_cache import AudioCache
+from app.services.checkpoint import TranscriptionCheckpoint
+from app.services.temp_space import TempSpaceError, TempSpaceManager
+from app.services.drive_watcher import DriveWatcher
+from app.services.admission import AdmissionController
+from app.services.media_upload import UPLOAD_FILENAME, UploadError, UploadWriter, receive_multipart, receive_raw
+from app.services.engines import backend_error
+from app.services.webhook_dispatcher import WebhookDispatcher
+from app.services.job_store import FINAL_STATUSES
+from app.services.scheduler import media_duration_seconds
+from app.services import metrics
+from app.core.config import settings
 from app.utils.file_manager import FileManager
 from app.core.security import get_api_key
 import logging
-import aiohttp
+import asyncio
+import json
 from pathlib import Path
+from typing import Optional
 import uuid
+import hashlib
+import time
 from google.auth.exceptions import RefreshError
+from pydantic import ValidationError
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 queue_manager = QueueManager()
+worker_pool = WorkerPool()
+transcription_cache = TranscriptionCache()
+audio_cache = AudioCache()
+webhook_dispatcher = WebhookDispatcher()
+temp_space = TempSpaceManager()
+drive_watcher = DriveWatcher()
+admission = AdmissionController()
+background_tasks = []
+
+@router.on_event("startup")
+async def start_worker_pool():
+    """Inicia o pool de inferência com os modelos Whisper pré-carregados"""
+    # Um backend configurado sem o pacote instalado impede a inicialização
+    backends = {settings.INFERENCE_BACKEND} | {
+        entry.rpartition(':')[0] for entry in settings.WHISPER_PRELOAD_MODELS if ':' in entry
+    }
+    for backend in sorted(backends):
+        error = backend_error(backend)
+        if error:
+            raise RuntimeError(error)
+    await worker_pool.start()
+
+@router.on_event("startup")
+async def start_queue_workers():
+    """Restaura as solicitações persistidas e inicia os workers da fila de transcrição"""
+    await queue_manager.restore_jobs()
+    await admission.start()
+    queue_manager.start_workers(process_transcription)
+    webhook_dispatcher.start()
+    # Workspaces das solicitações restauradas são mantidos para retomar o download
+    temp_space.start(queue_manager.get_unfinished_ids)
+    drive_watcher.start()
+
+@router.on_event("startup")
+async def start_drive_token_refresher():
+    """Renova o token do Google Drive em segundo plano, antes de expirar"""
+    background_tasks.append(asyncio.create_task(GoogleDriveService.run_token_refresher()))
+
+@router.on_event("shutdown")
+async def stop_queue_workers():
+    await queue_manager.stop_workers()
+    await admission.stop()
+    await webhook_dispatcher.stop()
+    await temp_space.stop()
+    await drive_watcher.stop()
+    for task in background_tasks:
+        task.cancel()
+    worker_pool.shutdown()
 
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_video(
     request: TranscriptionRequest,
-    background_tasks: BackgroundTasks,
     api_key: str = Depends(get_api_key)
 ):
     """
     Endpoint para transcrever um vídeo do Google Drive
     """
     request_id = str(uuid.uuid4())
+
+    if request.backend and backend_error(request.backend):
+        raise HTTPException(status_code=400, detail=backend_error(request.backend))
+    ensure_disk_capacity()
     
     try:
-        # Adicionar à fila
+        # Duração e tamanho definem a ordem de atendimento e a fila do arquivo; sem
+        # eles a solicitação entra com a duração padrão e o worker busca os metadados
+        file_metadata = None
+        drive_service = GoogleDriveService(interactive=False)
+        try:
+            file_metadata = await worker_pool.run_io(drive_service.get_file_metadata, request.file_id)
+        except RefreshError:
+            # Sem credenciais a solicitação falharia no worker: recusa já na submissão
+            raise await auth_required_error(drive_service)
+        except Exception as e:
+            logger.warning(f"Metadados de {request.file_id} indisponíveis na submissão: {e}")
+
+        # Adicionar à fila (ordem definida por SCHEDULER_POLICY)
         if not await queue_manager.add_to_queue(
             request_id=request_id,
             file_id=request.file_id,
-            webhook_url=str(request.webhook_url)
+            webhook_url=str(request.webhook_url),
+            language=request.language,
+            client_id=client_id_for(api_key),
+            backend=request.backend,
+            vad=request.vad,
+            file_metadata=file_metadata
         ):
-            # Se retornar False, já existe uma solicitação em processamento
+            # Se retornar False, a fila atingiu o limite configurado
             raise HTTPException(
                 status_code=429,
-                detail="Já existe uma solicitação em processamento. Tente novamente mais tarde."
+                detail="Fila de transcrição cheia. Tente novamente mais tarde.",
+                headers={"Retry-After": str(settings.QUEUE_RETRY_AFTER_SECONDS)}
             )
 
-        # Iniciar processamento em background
-        background_tasks.add_task(
-            process_transcription,
-            request_id,
-            request.file_id,
-            str(request.webhook_url),
-            request.language
-        )
-
         return TranscriptionResponse(
             status="queued",
             message="Solicitação adicionada à fila",
-            request_id=request_id
+            request_id=request_id,
+            queue_position=queue_manager.get_queue_position(request_id),
+            estimated_completion_at=queue_manager.estimate_completion(request_id)
         )
             
     except HTTPException:
@@ -61,103 +151,476 @@ async def transcribe_video(
         await queue_manager.update_status(
             request_id=request_id,
             status="error",
+            stage="error",
             error=str(e)
         )
-        if request.webhook_url:
-            await queue_manager.send_webhook_response(request_id)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/transcribe/upload", response_model=TranscriptionResponse)
+async def transcribe_upload(
+    request: Request,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Endpoint para transcrever um arquivo enviado diretamente, sem passar pelo Drive.
+    Aceita multipart/form-data (um campo de arquivo e, opcionalmente, os campos de
+    UploadTranscriptionRequest) ou o arquivo como corpo cru, com os parâmetros na
+    query string. O corpo é gravado no workspace da solicitação à medida que chega.
+    """
+    request_id = str(uuid.uuid4())
+    params = dict(request.query_params)
+    if params.get('backend') and backend_error(params['backend']):
+        raise HTTPException(status_code=400, detail=backend_error(params['backend']))
+    ensure_disk_capacity()
+    if queue_manager.get_queue_stats()['pending'] >= settings.QUEUE_MAX_SIZE:
+        # Recusa antes de receber o corpo
+        raise HTTPException(
+            status_code=429,
+            detail="Fila de transcrição cheia. Tente novamente mais tarde.",
+            headers={"Retry-After": str(settings.QUEUE_RETRY_AFTER_SECONDS)}
+        )
+
+    try:
+        content_length = int(request.headers.get('content-length') or 0)
+    except ValueError:
+        content_length = -1
+    if content_length < 0:
+        raise HTTPException(status_code=400, detail="Cabeçalho Content-Length inválido")
+    if settings.TEMP_JOB_QUOTA_MB and content_length > settings.TEMP_JOB_QUOTA_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"O arquivo excede a cota de {settings.TEMP_JOB_QUOTA_MB} MB")
+    try:
+        temp_dir = await worker_pool.run_io(
+            temp_space.allocate,
+            request_id,
+            TempSpaceManager.estimate_job_bytes({'size': content_length})
+        )
+    except TempSpaceError as e:
+        raise HTTPException(status_code=507, detail=str(e), headers={"Retry-After": str(settings.QUEUE_RETRY_AFTER_SECONDS)})
+
+    writer = UploadWriter(request_id, temp_dir / UPLOAD_FILENAME)
+
+    async def discard():
+        await writer.abort()
+        await temp_space.release(request_id)
+
+    content_type = request.headers.get('content-type', '')
+    try:
+        if content_type.startswith('multipart/form-data'):
+            fields, filename = await receive_multipart(content_type, request.stream(), writer)
+            params.update(fields)
+            params.setdefault('filename', filename)
+        else:
+            await receive_raw(request.stream(), writer)
+        if not writer.size:
+            raise UploadError("Nenhum conteúdo recebido")
+        upload = UploadTranscriptionRequest(**params)
+        if upload.backend and backend_error(upload.backend):
+            raise UploadError(backend_error(upload.backend))
+    except TempSpaceError as e:
+        await discard()
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadError as e:
+        await discard()
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValidationError as e:
+        await discard()
+        raise HTTPException(status_code=422, detail=e.errors())
+    except Exception:
+        # Inclui a desconexão do cliente no meio do envio
+        await discard()
+        raise
+
+    # Metadados equivalentes aos do Drive: o md5 permite acertos nos caches
+    file_metadata = {
+        'name': upload.filename or UPLOAD_FILENAME,
+        'size': str(writer.size),
+        'md5Checksum': writer.md5
+    }
+    duration = await worker_pool.run_io(TranscriptionService.probe_duration, writer.path)
+    if duration:
+        file_metadata['videoMediaMetadata'] = {'durationMillis': str(int(duration * 1000))}
+    logger.info(f"Upload {request_id} recebido: {writer.size} bytes")
+
+    if not await queue_manager.add_to_queue(
+        request_id=request_id,
+        file_id=f"upload:{file_metadata['name']}",
+        webhook_url=str(upload.webhook_url),
+        language=upload.language,
+        client_id=client_id_for(api_key),
+        backend=upload.backend,
+        vad=upload.vad,
+        file_metadata=file_metadata,
+        upload_path=str(writer.path)
+    ):
+        await discard()
+        raise HTTPException(
+            status_code=429,
+            detail="Fila de transcrição cheia. Tente novamente mais tarde.",
+            headers={"Retry-After": str(settings.QUEUE_RETRY_AFTER_SECONDS)}
+        )
+
+    return TranscriptionResponse(
+        status="queued",
+        message="Arquivo recebido e adicionado à fila",
+        request_id=request_id,
+        queue_position=queue_manager.get_queue_position(request_id),
+        estimated_completion_at=queue_manager.estimate_completion(request_id)
+    )
+
+@router.post("/transcribe/batch", response_model=BatchTranscriptionResponse)
+async def transcribe_batch(
+    request: BatchTranscriptionRequest,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Endpoint para transcrever vários vídeos do Google Drive (lista de IDs ou pasta)
+    """
+    if request.backend and backend_error(request.backend):
+        raise HTTPException(status_code=400, detail=backend_error(request.backend))
+    ensure_disk_capacity()
+
+    # O limite é verificado antes de qualquer chamada ao Drive
+    too_many_files = HTTPException(
+        status_code=400,
+        detail=f"O lote excede o limite de {settings.BATCH_MAX_FILES} arquivos"
+    )
+    file_ids = list(dict.fromkeys(request.file_ids or []))
+    if len(file_ids) > settings.BATCH_MAX_FILES:
+        raise too_many_files
+
+    batch_id = str(uuid.uuid4())
+    drive_service = GoogleDriveService(interactive=False)
+    try:
+        metadata = {}
+        if file_ids:
+            # Uma única requisição batch ao Drive em vez de uma chamada por arquivo
+            metadata.update(await worker_pool.run_io(drive_service.get_files_metadata, file_ids))
+        if request.folder_id:
+            # A listagem da pasta para assim que ela sozinha passa do limite
+            folder_files = await worker_pool.run_io(
+                drive_service.list_folder_videos,
+                request.folder_id,
+                settings.BATCH_MAX_FILES
+            )
+            for file_metadata in folder_files:
+                metadata[file_metadata['id']] = file_metadata
+    except RefreshError:
+        raise await auth_required_error(drive_service)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(metadata) > settings.BATCH_MAX_FILES:
+        raise too_many_files
+
+    rejected = {file_id: data['error'] for file_id, data in metadata.items() if 'error' in data}
+    jobs = [
+        {
+            'request_id': str(uuid.uuid4()),
+            'file_id': file_id,
+            'language': request.language,
+            'backend': request.backend,
+            'vad': request.vad,
+            'file_metadata': data
+        }
+        for file_id, data in metadata.items() if 'error' not in data
+    ]
+    if not jobs:
+        raise HTTPException(status_code=400, detail="Nenhum arquivo válido encontrado para o lote")
+
+    if not await queue_manager.add_batch(
+        batch_id,
+        jobs,
+        webhook_url=str(request.webhook_url),
+        aggregate_webhook=request.aggregate_webhook,
+        client_id=client_id_for(api_key)
+    ):
+        raise HTTPException(
+            status_code=429,
+            detail="A fila de transcrição não comporta o lote. Tente novamente mais tarde.",
+            headers={"Retry-After": str(settings.QUEUE_RETRY_AFTER_SECONDS)}
+        )
+
+    return BatchTranscriptionResponse(
+        status="queued",
+        message=f"{len(jobs)} arquivo(s) adicionado(s) à fila",
+        batch_id=batch_id,
+        request_ids={job['file_id']: job['request_id'] for job in jobs},
+        rejected=rejected
+    )
+
+@router.get("/batches/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(batch_id: str, api_key: str = Depends(get_api_key)):
+    """
+    Endpoint para consultar o progresso de um lote
+    """
+    batch_status = queue_manager.get_batch_status(batch_id)
+    if batch_status is None:
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    return BatchStatusResponse(**batch_status)
+
+@router.get("/jobs/{request_id}", response_model=JobStatusResponse)
+async def get_job_status(request_id: str, api_key: str = Depends(get_api_key)):
+    """
+    Endpoint para consultar o status de uma transcrição
+    """
+    request_data = queue_manager.get_request_status(request_id)
+    if request_data is None:
+        raise HTTPException(status_code=404, detail="Solicitação não encontrada")
+    return JobStatusResponse(
+        request_id=request_id,
+        status=request_data['status'],
+        stage=request_data['stage'],
+        progress=request_data.get('progress'),
+        queue_position=request_data.get('queue_position'),
+        estimated_completion_at=request_data.get('estimated_completion_at'),
+        duration_seconds=request_data.get('duration_seconds'),
+        lane=request_data.get('lane'),
+        created_at=request_data.get('created_at'),
+        updated_at=request_data.get('updated_at'),
+        segments_count=len(request_data.get('segments') or []),
+        error=request_data.get('error'),
+        transcription=request_data.get('result')
+    )
+
+@router.get("/jobs/{request_id}/events")
+async def stream_job_events(request_id: str, api_key: str = Depends(get_api_key)):
+    """
+    Endpoint (Server-Sent Events) que envia as mudanças de etapa e cada
+    segmento transcrito assim que é produzido
+    """
+    if queue_manager.get_request_status(request_id) is None:
+        raise HTTPException(status_code=404, detail="Solicitação não encontrada")
+    return StreamingResponse(
+        job_event_stream(request_id),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def client_id_for(api_key: str) -> str:
+    """Identificador estável do cliente para o agendamento, sem expor a API key"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def job_event_stream(request_id: str):
+    """Envia o estado atual e os segmentos já produzidos, depois os eventos ao vivo até o fim"""
+    events = queue_manager.subscribe(request_id)
+    try:
+        request_data = queue_manager.get_request_status(request_id)
+        if request_data is None:
+            return
+        segments = list(request_data.get('segments') or [])
+        yield format_sse('status', {
+            'type': 'status',
+            'status': request_data['status'],
+            'stage': request_data['stage'],
+            'progress': request_data.get('progress'),
+            'queue_position': request_data.get('queue_position'),
+            'estimated_completion_at': request_data.get('estimated_completion_at'),
+            'error': request_data.get('error')
+        })
+        for index, segment in enumerate(segments):
+            yield format_sse('segment', {'type': 'segment', 'index': index, **segment})
+
+        status = request_data['status']
+        while status not in FINAL_STATUSES:
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Comentário SSE para manter a conexão aberta em proxies
+                yield ": keep-alive\n\n"
+                continue
+            if event['type'] == 'segment':
+                # Segmentos já enviados no estado inicial são ignorados
+                if event['index'] < len(segments):
+                    continue
+            else:
+                status = event['status']
+            yield format_sse(event['type'], event)
+
+        request_data = queue_manager.get_request_status(request_id) or {}
+        yield format_sse('end', {
+            'type': 'end',
+            'status': status,
+            'transcription': request_data.get('result')
+        })
+    finally:
+        queue_manager.unsubscribe(request_id, events)
+
 @router.get("/health")
 async def health_check():
     """
     Endpoint para verificar a saúde da API
     """
-    return {"status": "healthy"}
+    return {"status": "healthy", "queue": queue_manager.get_queue_stats(), "disk": temp_space.get_stats(), "drive_watch": drive_watcher.get_stats()}
 
-async def process_transcription(
-    request_id: str,
+@router.get("/metrics")
+async def prometheus_metrics():
+    """
+    Endpoint de métricas no formato do Prometheus
+    """
+    return Response(metrics.render(queue_manager.get_queue_stats()), media_type=metrics.MEDIA_TYPE)
+
+def ensure_disk_capacity():
+    """Recusa novas solicitações enquanto o espaço livre em TEMP_DIR estiver abaixo de TEMP_MIN_FREE_MB"""
+    if not temp_space.has_capacity():
+        raise HTTPException(
+            status_code=507,
+            detail="Espaço em disco insuficiente para novas transcrições. Tente novamente mais tarde.",
+            headers={"Retry-After": str(settings.QUEUE_RETRY_AFTER_SECONDS)}
+        )
+
+async def drive_login_url(drive_service: GoogleDriveService) -> Optional[str]:
+    """URL de autorização do Drive; None se o client secret (CREDENTIALS_FILE) não estiver no servidor"""
+    try:
+        return await worker_pool.run_io(drive_service.get_authorization_url)
+    except FileNotFoundError as e:
+        logger.error(str(e))
+        return None
+
+async def auth_required_error(drive_service: GoogleDriveService) -> HTTPException:
+    login_url = await drive_login_url(drive_service)
+    if login_url is None:
+        return HTTPException(
+            status_code=503,
+            detail="Autenticação necessária no Google Drive, mas o servidor não tem o arquivo de credenciais (CREDENTIALS_FILE)"
+        )
+    return HTTPException(status_code=503, detail=f"Autenticação necessária no Google Drive: {login_url}")
+
+async def notify_auth_required(request_id: str, drive_service: GoogleDriveService):
+    """Informa via webhook que é necessária autenticação no Google Drive"""
+    login_url = await drive_login_url(drive_service)
+    await queue_manager.update_status(
+        request_id=request_id,
+        status="auth_required",
+        stage="auth_required",
+        progress={
+            'percentage': 0,
+            'details': 'Necessária autenticação no Google Drive'
+        },
+        error=None if login_url else "Autenticação necessária no Google Drive; arquivo de credenciais ausente no servidor"
+    )
+    await queue_manager.send_webhook_response(request_id, login_url=login_url)
+
+async def extract_audio_pipelined(
+    drive_service: GoogleDriveService,
+    transcription_service: TranscriptionService,
     file_id: str,
-    webhook_url: str,
-    language: str = None
-) -> str:
-    """Processa a transcrição em background"""
-    drive_service = GoogleDriveService()
-    transcription_service = TranscriptionService()
-    temp_dir = None
-    
+    audio_path: Path,
+    progress_callback,
+    file_metadata: dict
+) -> bool:
+    """
+    Extrai o áudio enquanto o vídeo é baixado. Retorna False se o FFmpeg não
+    conseguir decodificar a partir do stdin (ex.: MP4 com o índice "moov" no final),
+    caso em que o chamador deve recorrer ao download completo.
+    """
     try:
-        # Atualizar status para download
-        await queue_manager.update_status(
-            request_id=request_id,
-            status="processing",
-            stage="downloading",
-            progress={
-                'percentage': 0,
-                'details': 'Iniciando download do vídeo'
-            }
+        await drive_service.stream_file(
+            file_id,
+            lambda chunks: transcription_service.extract_audio_from_stream(chunks, audio_path),
+            progress_callback=progress_callback,
+            file_metadata=file_metadata
         )
-        
-        # Criar diretório temporário
-        temp_dir = FileManager.create_temp_directory()
-        
-        try:
-            # Download do vídeo
-            video_content, video_name = await drive_service.download_file(file_id)
-            await queue_manager.update_status(
+        return True
+    except AudioPipelineError as e:
+        logger.warning(f"Extração em pipeline falhou para {file_id}, usando download completo: {e}")
+        audio_path.unlink(missing_ok=True)
+        return False
+
+async def download_and_extract_audio(
+    request_id: str,
+    drive_service: GoogleDriveService,
+    transcription_service: TranscriptionService,
+    file_id: str,
+    temp_dir: Path,
+    audio_path: Path,
+    file_metadata: dict
+) -> bool:
+    """Baixa o vídeo e extrai o áudio em audio_path. Retorna False se o Drive exigir nova autenticação."""
+    # Atualizar status para download
+    await queue_manager.update_status(
+        request_id=request_id,
+        status="processing",
+        stage="downloading",
+        progress={
+            'percentage': 0,
+            'details': 'Iniciando download do vídeo'
+        }
+    )
+
+    video_path = temp_dir / "video.mp4"
+    loop = asyncio.get_running_loop()
+    last_percentage = -1
+    last_downloaded = 0
+
+    def download_progress(downloaded, total):
+        # Chamada a partir da thread de download; repassa ao event loop
+        nonlocal last_percentage, last_downloaded
+        if downloaded > last_downloaded:
+            metrics.DOWNLOADED_BYTES.inc(downloaded - last_downloaded)
+        last_downloaded = downloaded
+        percentage = int((downloaded / total) * 100) if total else 0
+        if percentage == last_percentage:
+            return
+        last_percentage = percentage
+        loop.call_soon_threadsafe(
+            asyncio.create_task,
+            queue_manager.update_status(
                 request_id=request_id,
                 status="processing",
                 stage="downloading",
                 progress={
-                    'percentage': 50,
-                    'details': 'Download em andamento'
-                }
-            )
-        except RefreshError:
-            # Se houver erro de autenticação, enviar URL de login
-            login_url = drive_service.get_authorization_url()
-            await queue_manager.update_status(
-                request_id=request_id,
-                status="auth_required",
-                stage="auth_required",
-                error="Autenticação necessária",
-                progress={
-                    'percentage': 0,
-                    'details': 'Necessária autenticação no Google Drive'
+                    'percentage': percentage,
+                    'details': f'Download: {downloaded}/{total} bytes'
                 }
             )
-            await queue_manager.send_webhook_response(request_id, login_url=login_url)
-            return
-        
-        video_path = temp_dir / "video.mp4"
-        audio_path = temp_dir / "audio.mp3"
-        
-        # Salvar vídeo
-        FileManager.save_bytes_to_file(video_content, video_path)
-        await queue_manager.update_status(
-            request_id=request_id,
-            status="processing",
-            stage="downloading",
-            progress={
-                'percentage': 100,
-                'details': 'Download concluído'
-            }
         )
-        
-        # Verificar se o vídeo foi salvo corretamente
-        if not FileManager.ensure_file_exists(video_path):
-            raise FileNotFoundError(f"Erro ao salvar arquivo de vídeo: {video_path}")
-        
-        # Extrair áudio
-        await queue_manager.update_status(
-            request_id=request_id,
-            status="processing",
-            stage="extracting_audio",
-            progress={
-                'percentage': 0,
-                'details': 'Iniciando extração do áudio'
-            }
-        )
-        transcription_service.extract_audio(video_path, audio_path)
+
+    pipelined = False
+    # No modo em pipeline a extração acontece durante o download e é medida junto com ele
+    stage_started = time.monotonic()
+    try:
+        if settings.PIPELINED_EXTRACTION:
+            # Download alimenta o FFmpeg diretamente, sem gravar o vídeo em disco
+            pipelined = await extract_audio_pipelined(
+                drive_service,
+                transcription_service,
+                file_id,
+                audio_path,
+                download_progress,
+                file_metadata
+            )
+        if not pipelined:
+            def download_to_disk_progress(downloaded, total):
+                # O vídeo gravado no workspace conta para a cota da solicitação
+                temp_space.check_quota(request_id, downloaded)
+                download_progress(downloaded, total)
+
+            # Download do vídeo em streaming direto para o disco
+            await drive_service.download_to_file(
+                file_id,
+                video_path,
+                progress_callback=download_to_disk_progress,
+                file_metadata=file_metadata
+            )
+    except RefreshError:
+        await notify_auth_required(request_id, drive_service)
+        return False
+    metrics.STAGE_DURATION.labels('download').observe(time.monotonic() - stage_started)
+    
+    await queue_manager.update_status(
+        request_id=request_id,
+        status="processing",
+        stage="downloading",
+        progress={
+            'percentage': 100,
+            'details': 'Download concluído'
+        }
+    )
+    
+    if pipelined:
         await queue_manager.update_status(
             request_id=request_id,
             status="processing",
@@ -167,10 +630,141 @@ async def process_transcription(
                 'details': 'Extração de áudio concluída'
             }
         )
+        return True
+
+    # Verificar se o vídeo foi salvo corretamente
+    if not FileManager.ensure_file_exists(video_path):
+        raise FileNotFoundError(f"Erro ao salvar arquivo de vídeo: {video_path}")
+    await extract_audio_from_file(request_id, transcription_service, video_path, audio_path)
+    return True
+
+async def extract_audio_from_file(
+    request_id: str,
+    transcription_service: TranscriptionService,
+    video_path: Path,
+    audio_path: Path
+):
+    """Extrai o áudio de um vídeo já em disco (baixado do Drive ou enviado por upload)"""
+    await queue_manager.update_status(
+        request_id=request_id,
+        status="processing",
+        stage="extracting_audio",
+        progress={
+            'percentage': 0,
+            'details': 'Iniciando extração do áudio'
+        }
+    )
+    stage_started = time.monotonic()
+    await worker_pool.run_io(transcription_service.extract_audio, video_path, audio_path)
+    metrics.STAGE_DURATION.labels('extract').observe(time.monotonic() - stage_started)
+
+    await queue_manager.update_status(
+        request_id=request_id,
+        status="processing",
+        stage="extracting_audio",
+        progress={
+            'percentage': 100,
+            'details': 'Extração de áudio concluída'
+        }
+    )
+
+async def process_transcription(
+    request_id: str,
+    file_id: str,
+    webhook_url: str,
+    language: str = None,
+    backend: str = None,
+    batch_id: str = None,
+    file_metadata: dict = None,
+    vad: bool = None,
+    upload_path: str = None
+) -> str:
+    """Processa a transcrição em background"""
+    transcription_service = TranscriptionService(backend=backend, vad=vad)
+    temp_dir = None
+    drive_service = None
+    
+    try:
+        if upload_path is None:
+            # Sem requisição HTTP por trás (fila restaurada, lote, monitoramento) o fluxo
+            # interativo nunca é aberto: credenciais ausentes encerram o job com auth_required.
+            # As credenciais são carregadas na primeira chamada à API, já no pool de I/O.
+            drive_service = GoogleDriveService(interactive=False)
+
+        # Apenas os metadados são buscados antes de decidir se o arquivo já foi transcrito
+        # (solicitações de lote e uploads já chegam com os metadados)
+        if file_metadata is None:
+            try:
+                file_metadata = await worker_pool.run_io(drive_service.get_file_metadata, file_id)
+            except RefreshError:
+                await notify_auth_required(request_id, drive_service)
+                return
+            logger.info(f"Metadados do arquivo: {file_metadata}")
+
+        cache_key = TranscriptionCache.make_key(file_metadata, transcription_service.model_id, language)
+        cached_transcription = await worker_pool.run_io(transcription_cache.get, cache_key)
+        if cached_transcription is not None:
+            await queue_manager.update_status(
+                request_id=request_id,
+                status="completed",
+                stage="completed",
+                progress={
+                    'percentage': 100,
+                    'details': 'Transcrição obtida do cache'
+                },
+                result=cached_transcription
+            )
+            return cached_transcription
+
+        # Segmentos já concluídos antes de uma reinicialização não são transcritos de novo
+        transcription_service.checkpoint = await TranscriptionCheckpoint.load(
+            request_id,
+            cache_key or f"{file_id}:{transcription_service.model_id}:{language or 'auto'}"
+        )
+
+        # Workspace da solicitação, com o espaço estimado reservado (TempSpaceError se não couber);
+        # o arquivo enviado por upload já está no workspace e não entra na reserva
+        expected_bytes = TempSpaceManager.estimate_job_bytes(file_metadata, transcription_service.vad)
+        if upload_path:
+            expected_bytes -= int(file_metadata.get('size') or 0)
+        temp_dir = await worker_pool.run_io(temp_space.allocate, request_id, expected_bytes)
+        audio_path = TranscriptionService.audio_path_for(temp_dir)
+
+        # Áudio já decodificado desta revisão do arquivo dispensa download e extração
+        audio_key = AudioCache.make_key(file_metadata)
+        audio_from_cache = await worker_pool.run_io(audio_cache.fetch, audio_key, audio_path)
+        if audio_from_cache:
+            await queue_manager.update_status(
+                request_id=request_id,
+                status="processing",
+                stage="extracting_audio",
+                progress={
+                    'percentage': 100,
+                    'details': 'Áudio obtido do cache'
+                }
+            )
+        elif upload_path:
+            if not FileManager.ensure_file_exists(Path(upload_path)):
+                raise FileNotFoundError(f"Arquivo enviado não encontrado: {upload_path}")
+            await extract_audio_from_file(request_id, transcription_service, Path(upload_path), audio_path)
+        else:
+            if not await download_and_extract_audio(
+                request_id,
+                drive_service,
+                transcription_service,
+                file_id,
+                temp_dir,
+                audio_path,
+                file_metadata
+            ):
+                return
         
         # Verificar se o áudio foi extraído corretamente
         if not FileManager.ensure_file_exists(audio_path):
             raise FileNotFoundError(f"Erro ao extrair áudio: {audio_path}")
+        if not audio_from_cache:
+            # Guardado antes da inferência: uma falha nela não exige novo download
+            await worker_pool.run_io(audio_cache.put, audio_key, audio_path)
         
         # Transcrever
         await queue_manager.update_status(
@@ -183,7 +777,7 @@ async def process_transcription(
             }
         )
         
-        # Iniciar transcrição com callback de progresso
+        # Iniciar transcrição no pool de processos com callback de progresso
         def transcription_progress(current, total):
             percentage = int((current / total) * 100)
             asyncio.create_task(
@@ -198,24 +792,40 @@ async def process_transcription(
                 )
             )
         
-        transcription = transcription_service.transcribe(
+        stage_started = time.monotonic()
+        transcription = await transcription_service.transcribe_in_pool(
             audio_path,
             language,
-            progress_callback=transcription_progress
+            progress_callback=transcription_progress,
+            segment_callback=lambda segment: queue_manager.add_segment(request_id, segment)
         )
+        transcribe_seconds = time.monotonic() - stage_started
+        metrics.STAGE_DURATION.labels('transcribe').observe(transcribe_seconds)
+        audio_seconds = pcm_duration(audio_path) if audio_path.suffix == PCM_SUFFIX else media_duration_seconds(file_metadata)
+        if audio_seconds:
+            metrics.AUDIO_SECONDS.inc(audio_seconds)
+            metrics.REAL_TIME_FACTOR.observe(transcribe_seconds / audio_seconds)
+        await worker_pool.run_io(transcription_cache.put, cache_key, transcription, file_metadata)
+        await transcription_service.checkpoint.clear()
+
+        progress = {
+            'percentage': 100,
+            'details': 'Transcrição concluída'
+        }
+        if transcription_service.vad_stats:
+            progress['vad'] = transcription_service.vad_stats
+            progress['details'] += (
+                f" ({transcription_service.vad_stats['skipped_seconds']:.0f}s sem fala ignorados pelo VAD)"
+            )
         
         # Atualizar status e enviar resultado
         await queue_manager.update_status(
             request_id=request_id,
             status="completed",
             stage="completed",
-            progress={
-                'percentage': 100,
-                'details': 'Transcrição concluída'
-            },
+            progress=progress,
             result=transcription
         )
-        await queue_manager.send_webhook_response(request_id)
                 
         return transcription
         
@@ -231,9 +841,9 @@ async def process_transcription(
             },
             error=str(e)
         )
-        await queue_manager.send_webhook_response(request_id)
         raise
     finally:
-        # Limpar arquivos temporários
-        if temp_dir:
-            FileManager.cleanup_directory(temp_dir)
+        # Limpar arquivos temporários; o workspace do upload existe desde a submissão,
+        # mesmo quando a solicitação termina antes de alocá-lo (ex.: acerto no cache)
+        if temp_dir or upload_path or temp_space.owns(request_id):
+            await temp_space.release(request_id)
@@ -10,14 +10,105 @@ class Settings(BaseSettings):
     # Diretórios
     BASE_DIR: Path = Path(__file__).resolve().parent.parent.parent
     TEMP_DIR: Path = BASE_DIR / "temp_files"
+    TEMP_MIN_FREE_MB: int = 2048  # Novas solicitações são recusadas abaixo deste espaço livre em TEMP_DIR
+    TEMP_JOB_QUOTA_MB: int = 20480  # Espaço máximo em disco por solicitação (0 = sem cota)
+    TEMP_SWEEP_INTERVAL_SECONDS: int = 600  # Intervalo da remoção de diretórios temporários órfãos
+    TEMP_ORPHAN_MIN_AGE_SECONDS: int = 3600  # Órfãos modificados há menos tempo que isso são mantidos
+    UPLOAD_FLUSH_BYTES: int = 4 * 1024 * 1024  # Bloco acumulado antes de cada escrita do upload em disco
+    CACHE_DIR: Path = BASE_DIR / "cache"
     
     # Google Drive settings
     GOOGLE_SCOPES: list = ["https://www.googleapis.com/auth/drive.readonly"]
     CREDENTIALS_FILE: Path = Path("credentials.json")
     TOKEN_FILE: Path = Path("token.json")
+    DRIVE_HTTP_TIMEOUT: int = 60  # Segundos por requisição ao Drive
+    DRIVE_API_ENDPOINT: str = ""  # Endpoint alternativo da API (ex.: Drive falso do benchmark)
+    DRIVE_TOKEN_REFRESH_MARGIN: int = 300  # Renova o token este tanto de segundos antes de expirar
+    DRIVE_CHUNK_SIZE: int = 8 * 1024 * 1024  # Bytes por requisição Range no download
+    DRIVE_DOWNLOAD_RETRIES: int = 5  # Tentativas de retomar um download interrompido
+    DRIVE_WATCH_FOLDERS: list = []  # Pastas monitoradas: vídeos novos ou modificados entram na fila
+    DRIVE_WATCH_INTERVAL_SECONDS: int = 60  # Intervalo entre consultas à API changes
+    DRIVE_WATCH_WEBHOOK_URL: str = ""  # Webhook das transcrições automáticas (vazio = apenas GET /jobs)
+    DRIVE_WATCH_LANGUAGE: str = ""  # Idioma das transcrições automáticas (vazio = detecção automática)
+    DRIVE_WATCH_CLIENT_ID: str = "drive-watch"  # Cliente usado pela política "fair"
+    DRIVE_WATCH_INITIAL_SCAN: bool = False  # Na primeira execução, enfileira também os vídeos já existentes
+    PIPELINED_EXTRACTION: bool = False  # Envia o download direto ao FFmpeg, sem gravar o vídeo
 
     # Whisper settings
     WHISPER_MODEL: str = "base"
+    INFERENCE_BACKEND: str = "whisper"  # whisper (PyTorch FP32) ou faster-whisper (CTranslate2)
+    CT2_COMPUTE_TYPE: str = "int8"  # Quantização usada pelo backend faster-whisper
+    CT2_CPU_THREADS: int = 0  # 0 = padrão do CTranslate2
+    WHISPER_PRELOAD_MODELS: list = []  # Modelos ("modelo" ou "backend:modelo") carregados na inicialização
+    WHISPER_MODEL_MEMORY_BUDGET_MB: int = 0  # 0 = sem limite para modelos residentes
+    BATCHED_INFERENCE: bool = False  # Agrupa janelas de 30 s de solicitações simultâneas (backend whisper)
+    INFERENCE_BATCH_SIZE: int = 8  # Máximo de janelas por passe do encoder
+    INFERENCE_BATCH_MAX_WAIT_MS: int = 50  # Espera máxima por outras janelas antes de enviar o lote
+    BATCHED_CONDITION_ON_PREVIOUS_TEXT: bool = True  # False: sem prompt, decodificação sempre em lote
+    TRANSCRIPTION_CACHE_ENABLED: bool = True
+    TRANSCRIPTION_CACHE_MAX_MB: int = 512  # Tamanho máximo do cache de transcrições em disco
+    AUDIO_CACHE_ENABLED: bool = True  # Reutiliza o áudio PCM extraído de cada revisão do arquivo
+    AUDIO_CACHE_MAX_MB: int = 4096  # ~37 h de áudio PCM 16 kHz
+    AUDIO_EXTRACTION_MODE: str = "pcm"  # pcm (16 kHz mono cru, sem segunda decodificação) ou mp3
+    LONG_AUDIO_THRESHOLD_SECONDS: int = 1200  # Acima disso o áudio é transcrito em trechos paralelos (0 = desativado)
+    LONG_AUDIO_CHUNK_SECONDS: int = 300  # Duração alvo de cada trecho
+    LONG_AUDIO_SEARCH_SECONDS: int = 30  # Janela, antes do alvo, onde se procura um silêncio para cortar
+    LONG_AUDIO_OVERLAP_SECONDS: float = 2.0  # Sobreposição entre trechos vizinhos
+
+    # Detecção de voz (VAD) antes da inferência
+    VAD_ENABLED: bool = False  # Padrão para solicitações que não informam "vad"
+    VAD_BACKEND: str = "energy"  # "energy" (sem dependências) ou "webrtc" (requer webrtcvad)
+    VAD_AGGRESSIVENESS: int = 2  # 0 a 3, apenas para o backend webrtc
+    VAD_THRESHOLD_DB: float = 12.0  # Energia acima do ruído de fundo considerada fala
+    VAD_MIN_LEVEL_DB: float = -50.0  # Nível mínimo absoluto (dBFS) para considerar fala
+    VAD_MIN_SPEECH_SECONDS: float = 0.25  # Trechos de fala menores são descartados
+    VAD_MIN_SILENCE_SECONDS: float = 1.0  # Pausas menores não dividem a fala
+    VAD_PADDING_SECONDS: float = 0.2  # Margem mantida antes e depois de cada trecho de fala
+    VAD_GAP_SECONDS: float = 0.5  # Silêncio inserido entre os trechos entregues ao modelo
+
+    # Fila de transcrição
+    QUEUE_WORKERS: int = 2  # Transcrições processadas simultaneamente
+    QUEUE_MAX_SIZE: int = 1000  # Máximo de solicitações aguardando na fila
+    QUEUE_RETRY_AFTER_SECONDS: int = 60
+    BATCH_MAX_FILES: int = 500  # Máximo de arquivos por lote
+    JOB_STORE_PATH: Path = BASE_DIR / "data" / "jobs.db"  # SQLite com o estado das solicitações
+    JOB_RETENTION_SECONDS: int = 24 * 3600  # Tempo que solicitações finalizadas são mantidas
+    JOB_PRUNE_INTERVAL_SECONDS: int = 600
+    CHECKPOINT_ENABLED: bool = True  # Grava os segmentos concluídos para retomar a transcrição após uma reinicialização
+    CHECKPOINT_INTERVAL_SECONDS: float = 5.0  # Intervalo mínimo entre gravações de checkpoint de um mesmo trecho
+    SSE_HEARTBEAT_SECONDS: float = 15.0  # Intervalo de keep-alive no streaming de eventos
+
+    # Agendamento da fila
+    SCHEDULER_POLICY: str = "fifo"  # "fifo", "sjf" (menor duração primeiro) ou "fair" (por API key)
+    SCHEDULER_CLIENT_WEIGHTS: dict = {}  # Pesos da política "fair" por cliente
+    SCHEDULER_ASSUMED_BITRATE: int = 2_000_000  # bits/s usados para estimar a duração pelo tamanho
+    SCHEDULER_DEFAULT_DURATION_SECONDS: float = 600  # Duração assumida sem metadados
+    SCHEDULER_INITIAL_RTF: float = 1.0  # Segundos de processamento por segundo de mídia até haver medições
+    SCHEDULER_MIN_LEARN_SECONDS: float = 5.0  # Jobs mais rápidos (ex.: cache) não entram na estimativa
+    LARGE_LANE_WORKERS: int = 0  # Workers exclusivos para arquivos grandes (0 = fila única)
+    LARGE_JOB_DURATION_SECONDS: float = 3600  # Acima disso o arquivo vai para a fila de grandes
+    LARGE_JOB_SIZE_BYTES: int = 4 * 1024 ** 3  # Idem, pelo tamanho (0 = desativado)
+
+    # Controle de admissão por memória (limite do container: 8 GB)
+    MEMORY_BUDGET_MB: int = 7168  # Novas transcrições só iniciam se couberem (0 = desativado)
+    JOB_BASE_MEMORY_MB: int = 200  # FFmpeg, buffers e estruturas fixas de cada transcrição
+    ADMISSION_POLL_INTERVAL: float = 2.0  # Segundos entre reavaliações enquanto falta memória
+    MEMORY_SAMPLE_INTERVAL: float = 1.0  # Segundos entre medições do uso de memória
+
+    # Execução fora do event loop
+    CPU_WORKERS: int = 0  # Processos de inferência (0 = QUEUE_WORKERS)
+    IO_WORKERS: int = 8  # Threads para Drive, FFmpeg e disco
+    PROGRESS_POLL_INTERVAL: float = 1.0  # Segundos entre leituras de progresso dos processos
+
+    # Entrega de webhooks
+    WEBHOOK_MAX_CONNECTIONS: int = 100  # Conexões simultâneas no total
+    WEBHOOK_MAX_PER_HOST: int = 10  # Conexões simultâneas por host de destino
+    WEBHOOK_KEEPALIVE_SECONDS: float = 30.0
+    WEBHOOK_TIMEOUT_SECONDS: float = 30.0
+    WEBHOOK_MAX_ATTEMPTS: int = 10  # Depois disso a entrega fica marcada como 'dead' no outbox
+    WEBHOOK_BACKOFF_BASE_SECONDS: float = 2.0
+    WEBHOOK_BACKOFF_MAX_SECONDS: float = 600.0
+    WEBHOOK_POLL_INTERVAL: float = 5.0
 
     # API Key
     API_KEY: str = os.getenv("API_KEY", "cascade_YOUR_API_KEY_HERE")  # Será substituída pela key gerada
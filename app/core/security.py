@@ -1,10 +1,42 @@
 from fastapi import Security, HTTPException
 from fastapi.security.api_key import APIKeyHeader
 from starlette.status import HTTP_403_FORBIDDEN
+from app.core.config import settings
+from pathlib import Path
+import logging
+import os
 import secrets
 
-# Gerar uma API key segura
-API_KEY = "cascade_" + secrets.token_urlsafe(32)
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_API_KEY = "cascade_YOUR_API_KEY_HERE"
+
+def _generated_api_key(path: Path) -> str:
+    """
+    Key gerada quando API_KEY não é configurada, gravada (0600) no diretório de
+    dados: vale para todos os processos e sobrevive a reinicializações
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not path.exists():
+        # Gravada à parte e publicada com link: outro processo nunca lê o arquivo pela metade
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as key_file:
+            key_file.write("cascade_" + secrets.token_urlsafe(32))
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    return path.read_text().strip()
+
+API_KEY = settings.API_KEY
+if API_KEY == PLACEHOLDER_API_KEY:
+    key_path = Path(settings.JOB_STORE_PATH).parent / "api_key"
+    API_KEY = _generated_api_key(key_path)
+    # Apenas o final da key vai para o log
+    logger.warning(f"API_KEY não configurada; usando a key gravada em {key_path} (termina em ...{API_KEY[-4:]})")
 API_KEY_NAME = "X-API-Key"
 
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
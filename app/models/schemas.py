@@ -1,5 +1,5 @@
-from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from pydantic import BaseModel, HttpUrl, model_validator
+from typing import Dict, List, Optional
 
 class ConversionRequest(BaseModel):
     """Modelo para requisições no formato antigo"""
@@ -11,16 +11,79 @@ class TranscriptionRequest(BaseModel):
     file_id: str
     webhook_url: HttpUrl
     language: Optional[str] = None
+    backend: Optional[str] = None  # Backend de inferência (padrão: INFERENCE_BACKEND)
+    vad: Optional[bool] = None  # Transcrever apenas os trechos com fala (padrão: VAD_ENABLED)
     save_to_drive: bool = False
 
+class UploadTranscriptionRequest(BaseModel):
+    """Parâmetros do upload direto (query string ou campos do multipart/form-data)"""
+    webhook_url: HttpUrl
+    language: Optional[str] = None
+    backend: Optional[str] = None
+    vad: Optional[bool] = None
+    filename: Optional[str] = None  # Nome original do arquivo (corpo cru)
+
 class TranscriptionResponse(BaseModel):
     """Modelo para respostas de transcrição"""
     status: str
     message: str
     request_id: Optional[str] = None
+    queue_position: Optional[int] = None
+    estimated_completion_at: Optional[str] = None
     transcription: Optional[str] = None
     file_url: Optional[str] = None
 
+class BatchTranscriptionRequest(BaseModel):
+    """Modelo para transcrição de vários arquivos (lista de IDs ou uma pasta do Drive)"""
+    file_ids: Optional[List[str]] = None
+    folder_id: Optional[str] = None
+    webhook_url: HttpUrl
+    language: Optional[str] = None
+    backend: Optional[str] = None
+    vad: Optional[bool] = None
+    aggregate_webhook: bool = False  # True: um único webhook quando o lote terminar
+
+    @model_validator(mode='after')
+    def check_source(self):
+        if not self.file_ids and not self.folder_id:
+            raise ValueError("Informe file_ids ou folder_id")
+        return self
+
+class BatchTranscriptionResponse(BaseModel):
+    """Modelo para resposta de um lote"""
+    status: str
+    message: str
+    batch_id: str
+    request_ids: Dict[str, str] = {}  # file_id -> request_id
+    rejected: Dict[str, str] = {}  # file_id -> motivo
+
+class BatchStatusResponse(BaseModel):
+    """Modelo para consulta do progresso de um lote"""
+    batch_id: str
+    total: int
+    finished: int
+    percentage: int
+    counts: Dict[str, int]
+    created_at: str
+    completed_at: Optional[str] = None
+    items: List[dict]
+
+class JobStatusResponse(BaseModel):
+    """Modelo para consulta do status de uma transcrição"""
+    request_id: str
+    status: str
+    stage: str
+    progress: Optional[dict] = None
+    queue_position: Optional[int] = None
+    estimated_completion_at: Optional[str] = None
+    duration_seconds: Optional[float] = None
+    lane: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    segments_count: int = 0
+    error: Optional[str] = None
+    transcription: Optional[str] = None
+
 class ErrorResponse(BaseModel):
     """Modelo para respostas de erro"""
     detail: str
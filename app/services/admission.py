@@ -0,0 +1,189 @@
+from pathlib import Path
+from typing import Dict, Optional
+import asyncio
+import os
+import logging
+from app.core.config import settings
+from app.services.model_registry import ModelRegistry
+from app.services.worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Pico aproximado por segundo de áudio carregado no Whisper: PCM float32 (64 KB/s),
+# STFT complexa (~160 KB/s) e espectrograma log-mel (32 KB/s)
+AUDIO_MB_PER_SECOND = 0.25
+
+# Ativações da inferência (encoder/decoder e KV cache) em relação aos pesos do modelo
+ACTIVATION_FACTOR = 0.5
+
+# (uso total, estatísticas, campo de page cache inativo) para cgroup v2 e v1
+_CGROUP_FILES = (
+    (Path('/sys/fs/cgroup/memory.current'), Path('/sys/fs/cgroup/memory.stat'), 'inactive_file'),
+    (Path('/sys/fs/cgroup/memory/memory.usage_in_bytes'), Path('/sys/fs/cgroup/memory/memory.stat'), 'total_inactive_file'),
+)
+
+def _read_int(path: Path) -> Optional[int]:
+    try:
+        return int(path.read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+def _read_stat(path: Path, field: str) -> int:
+    try:
+        for line in path.read_text().splitlines():
+            name, _, value = line.partition(' ')
+            if name == field:
+                return int(value)
+    except (OSError, ValueError):
+        pass
+    return 0
+
+def _process_rss_mb(pid: int) -> float:
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def process_tree_rss_mb(root: int) -> float:
+    """RSS do processo e de todos os descendentes (workers de inferência, FFmpeg)"""
+    children: Dict[int, list] = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return 0.0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # O nome do processo pode conter espaços; os campos seguem o último ')'
+                fields = stat.read().rsplit(')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    total = 0.0
+    stack = [root]
+    while stack:
+        pid = stack.pop()
+        total += _process_rss_mb(pid)
+        stack.extend(children.get(pid, []))
+    return total
+
+def current_memory_mb() -> float:
+    """Memória em uso pelo container (cgroup) ou, fora dele, pela árvore de processos da API"""
+    for usage_path, stat_path, inactive_field in _CGROUP_FILES:
+        usage = _read_int(usage_path)
+        if usage is not None:
+            # Page cache inativo (ex.: vídeos recém-gravados) é recuperável e não conta para OOM
+            usage -= _read_stat(stat_path, inactive_field)
+            return max(usage, 0) / (1024 * 1024)
+    return process_tree_rss_mb(os.getpid())
+
+class AdmissionController:
+    """
+    Controle de admissão por memória: cada solicitação reserva o pico estimado
+    antes de começar e só é iniciada se couber em MEMORY_BUDGET_MB, considerando
+    o maior valor entre o uso medido e a linha de base somada às reservas ativas.
+    O uso é medido em segundo plano, a cada MEMORY_SAMPLE_INTERVAL, fora do event
+    loop (fora de um container a medição percorre /proc); a admissão lê a última amostra.
+    """
+    _instance = None
+    _reservations: Dict[str, float] = {}
+    _baseline_mb: Optional[float] = None
+    _current_mb: float = 0.0
+    _task: Optional[asyncio.Task] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AdmissionController, cls).__new__(cls)
+        return cls._instance
+
+    async def start(self):
+        """Faz a primeira medição (usada já pela primeira admissão) e inicia a amostragem"""
+        if AdmissionController._task is None:
+            await self.sample()
+            AdmissionController._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if AdmissionController._task is not None:
+            AdmissionController._task.cancel()
+            await asyncio.gather(AdmissionController._task, return_exceptions=True)
+            AdmissionController._task = None
+
+    async def sample(self):
+        AdmissionController._current_mb = await WorkerPool().run_io(current_memory_mb)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.MEMORY_SAMPLE_INTERVAL)
+            try:
+                await self.sample()
+            except Exception as e:
+                logger.error(f"Erro ao medir o uso de memória: {e}")
+
+    @staticmethod
+    def estimate_job_mb(duration_seconds: float, backend: Optional[str] = None, model_name: Optional[str] = None) -> float:
+        """Estima o pico de memória de uma transcrição a partir do modelo e da duração da mídia"""
+        backend = backend or settings.INFERENCE_BACKEND
+        model_name = model_name or settings.WHISPER_MODEL
+        model_mb = ModelRegistry.estimate_memory_mb(model_name, backend)
+
+        # Áudios longos são transcritos em trechos, um por processo de inferência
+        audio_seconds = duration_seconds
+        if duration_seconds > settings.LONG_AUDIO_THRESHOLD_SECONDS:
+            cpu_workers = settings.CPU_WORKERS or settings.QUEUE_WORKERS
+            chunk_seconds = settings.LONG_AUDIO_CHUNK_SECONDS + 2 * settings.LONG_AUDIO_OVERLAP_SECONDS
+            audio_seconds = min(duration_seconds, chunk_seconds * cpu_workers)
+
+        estimate = (
+            settings.JOB_BASE_MEMORY_MB
+            + settings.DRIVE_CHUNK_SIZE / (1024 * 1024)
+            + model_mb * ACTIVATION_FACTOR
+            + audio_seconds * AUDIO_MB_PER_SECOND
+        )
+        # Modelos fora da lista de pré-carga são carregados sob demanda nos processos de inferência
+        preloaded = settings.WHISPER_PRELOAD_MODELS or [settings.WHISPER_MODEL]
+        if model_name not in preloaded and f"{backend}:{model_name}" not in preloaded:
+            estimate += model_mb
+        return estimate
+
+    def try_admit(self, request_id: str, estimate_mb: float) -> bool:
+        """Reserva memória para a solicitação se ela couber no orçamento"""
+        budget = settings.MEMORY_BUDGET_MB
+        if not budget:
+            self._reservations[request_id] = estimate_mb
+            return True
+
+        usage = self._current_mb
+        if not self._reservations:
+            # Sem trabalhos em andamento, o uso medido é a linha de base (API + modelos residentes)
+            AdmissionController._baseline_mb = usage
+            self._reservations[request_id] = estimate_mb
+            if usage + estimate_mb > budget:
+                logger.warning(
+                    f"Requisição {request_id} estimada em {estimate_mb:.0f} MB excede o orçamento "
+                    f"de {budget} MB; iniciando sozinha"
+                )
+            return True
+
+        committed = max(usage, (self._baseline_mb or 0.0) + sum(self._reservations.values()))
+        if committed + estimate_mb > budget:
+            return False
+        self._reservations[request_id] = estimate_mb
+        return True
+
+    def release(self, request_id: str):
+        self._reservations.pop(request_id, None)
+
+    def get_stats(self) -> dict:
+        return {
+            'budget_mb': settings.MEMORY_BUDGET_MB,
+            'current_mb': round(self._current_mb, 1),
+            'baseline_mb': round(self._baseline_mb, 1) if self._baseline_mb is not None else None,
+            'reserved_mb': round(sum(self._reservations.values()), 1),
+            'admitted_jobs': len(self._reservations)
+        }
@@ -0,0 +1,76 @@
+from pathlib import Path
+from typing import Optional
+import hashlib
+import os
+import shutil
+import logging
+from app.core.config import settings
+from app.services.disk_cache import DiskCache
+from app.services.transcription import PCM_SUFFIX, SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+class AudioCache(DiskCache):
+    """
+    Cache em disco do áudio já decodificado (PCM s16le mono 16 kHz, mapeável em
+    memória) por revisão do arquivo no Drive. Novas tentativas e transcrições do
+    mesmo vídeo com outro idioma ou modelo partem direto do áudio, sem download
+    nem FFmpeg. As entradas são ligadas (hard link) ao diretório do job quando
+    possível, então uma remoção durante a transcrição não afeta o job.
+    A remoção segue LRU pelo mtime até caber em AUDIO_CACHE_MAX_MB e manter
+    TEMP_MIN_FREE_MB livres no volume.
+    """
+    subdirectory = "audio"
+    suffix = PCM_SUFFIX
+    metric_label = "audio"
+    description = "cache de áudio"
+
+    @property
+    def max_bytes(self) -> int:
+        return settings.AUDIO_CACHE_MAX_MB * 1024 * 1024
+
+    @property
+    def min_free_bytes(self) -> int:
+        return settings.TEMP_MIN_FREE_MB * 1024 * 1024
+
+    @staticmethod
+    def make_key(file_metadata: Optional[dict]) -> Optional[str]:
+        """Chave pela revisão do conteúdo (md5Checksum + tamanho); sem checksum não há cache"""
+        checksum = (file_metadata or {}).get('md5Checksum')
+        if not checksum:
+            return None
+        raw = f"{checksum}:{file_metadata.get('size', '')}:s16le:{SAMPLE_RATE}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def _enabled(key: Optional[str], audio_path: Path) -> bool:
+        return settings.AUDIO_CACHE_ENABLED and key is not None and audio_path.suffix == PCM_SUFFIX
+
+    @staticmethod
+    def _link_or_copy(source: Path, destination: Path):
+        if destination.exists():
+            if os.path.samefile(source, destination):
+                # Workspace restaurado: o áudio já é um hard link para a entrada
+                return
+            destination.unlink()
+        try:
+            os.link(source, destination)
+        except OSError:
+            # Cache e diretório temporário em sistemas de arquivos diferentes
+            shutil.copyfile(source, destination)
+
+    def fetch(self, key: Optional[str], destination: Path) -> bool:
+        """Coloca o áudio em cache em destination; retorna False se não houver entrada"""
+        if not self._enabled(key, destination):
+            return False
+
+        def link(path: Path) -> bool:
+            self._link_or_copy(path, destination)
+            return True
+
+        return self._read(key, link) is not None
+
+    def put(self, key: Optional[str], audio_path: Path):
+        if not self._enabled(key, audio_path):
+            return
+        self._write(key, lambda path: self._link_or_copy(audio_path, path))
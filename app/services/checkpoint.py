@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional, Set
+import asyncio
+import time
+import logging
+from app.core.config import settings
+from app.services.job_store import JobStore
+from app.services.worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Segmentos recentes cujo texto serve de contexto (initial_prompt) ao retomar
+PROMPT_SEGMENTS = 8
+
+class TranscriptionCheckpoint:
+    """
+    Progresso durável de uma transcrição, gravado no JobStore enquanto ela avança.
+    Cada fluxo (o arquivo inteiro, um trecho de áudio longo, ...) guarda os
+    segmentos concluídos, o ponto de retomada e o contexto do decodificador.
+    Após uma reinicialização a solicitação volta à fila e a transcrição continua
+    da última janela concluída. O fingerprint (arquivo + revisão + modelo +
+    idioma) invalida checkpoints que não correspondem mais à solicitação.
+    """
+    def __init__(self, request_id: str, fingerprint: str, streams: Optional[Dict[str, dict]] = None):
+        self.request_id = request_id
+        self.fingerprint = fingerprint
+        self._streams: Dict[str, dict] = streams or {}
+        self._versions: Dict[str, int] = {stream: data.get('version', 0) for stream, data in self._streams.items()}
+        self._persisted_at: Dict[str, float] = {}
+        self._pending: Set[asyncio.Future] = set()
+
+    @classmethod
+    async def load(cls, request_id: str, fingerprint: str) -> 'TranscriptionCheckpoint':
+        streams = {}
+        if settings.CHECKPOINT_ENABLED:
+            try:
+                stored = await WorkerPool().run_io(JobStore().load_checkpoints, request_id)
+            except Exception as e:
+                logger.warning(f"Erro ao carregar checkpoints de {request_id}: {e}")
+                stored = {}
+            streams = {stream: data for stream, data in stored.items() if data.get('fingerprint') == fingerprint}
+            if streams:
+                logger.info(f"Retomando {request_id} a partir de {len(streams)} checkpoint(s)")
+        return cls(request_id, fingerprint, streams)
+
+    def get(self, stream: str) -> Optional[dict]:
+        return self._streams.get(stream)
+
+    def record(self, stream: str, segments: List[dict], done: bool = False, **state):
+        """
+        Atualiza o fluxo em memória e agenda a gravação. Gravações intermediárias
+        respeitam CHECKPOINT_INTERVAL_SECONDS; o fluxo concluído é gravado sempre.
+        """
+        if not settings.CHECKPOINT_ENABLED:
+            return
+        version = self._versions.get(stream, 0) + 1
+        self._versions[stream] = version
+        data = {
+            'fingerprint': self.fingerprint,
+            'version': version,
+            'segments': list(segments),
+            'done': done,
+            **state
+        }
+        self._streams[stream] = data
+
+        now = time.monotonic()
+        last_persisted = self._persisted_at.get(stream)
+        if not done and last_persisted is not None and now - last_persisted < settings.CHECKPOINT_INTERVAL_SECONDS:
+            return
+        self._persisted_at[stream] = now
+        future = asyncio.ensure_future(
+            WorkerPool().run_io(JobStore().save_checkpoint, self.request_id, stream, version, data)
+        )
+        self._pending.add(future)
+        future.add_done_callback(self._on_saved)
+
+    def _on_saved(self, future: asyncio.Future):
+        self._pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Erro ao gravar checkpoint de {self.request_id}: {future.exception()}")
+
+    async def clear(self):
+        """Remove os checkpoints após a conclusão da transcrição"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        self._streams.clear()
+        if settings.CHECKPOINT_ENABLED:
+            try:
+                await WorkerPool().run_io(JobStore().delete_checkpoints, self.request_id)
+            except Exception as e:
+                # Checkpoints órfãos são removidos junto com a solicitação na limpeza periódica
+                logger.warning(f"Erro ao remover checkpoints de {self.request_id}: {e}")
+
+    @staticmethod
+    def prompt_text(segments: List[dict]) -> str:
+        """Texto dos últimos segmentos, usado como initial_prompt ao retomar sem os tokens"""
+        return "".join(segment['text'] for segment in segments[-PROMPT_SEGMENTS:]).strip()
@@ -0,0 +1,110 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Optional
+import os
+import shutil
+import threading
+import logging
+from app.core.config import settings
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+class DiskCache(ABC):
+    """
+    Base dos caches em disco sob CACHE_DIR: uma entrada por chave, gravada de
+    forma atômica (arquivo temporário + rename) e removida em ordem LRU pelo
+    mtime até o cache caber em max_bytes. Cada subclasse é um singleton com
+    lock e contadores próprios e trata apenas o conteúdo das entradas.
+    """
+    subdirectory = ""
+    suffix = ""
+    metric_label = ""  # Rótulo "cache" em transcricao_cache_requests_total
+    description = ""  # Usada nos logs
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._instance = None
+        cls._lock = threading.Lock()
+        cls.hits = 0
+        cls.misses = 0
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(DiskCache, cls).__new__(cls)
+        return cls._instance
+
+    @property
+    def directory(self) -> Path:
+        return settings.CACHE_DIR / self.subdirectory
+
+    @property
+    @abstractmethod
+    def max_bytes(self) -> int:
+        """Tamanho máximo do cache em bytes"""
+
+    @property
+    def min_free_bytes(self) -> int:
+        """Espaço livre mínimo no volume do cache; 0 = apenas max_bytes limita o cache"""
+        return 0
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _record(self, hit: bool):
+        """Contabiliza a consulta; deve ser chamada com o lock adquirido"""
+        if hit:
+            type(self).hits += 1
+        else:
+            type(self).misses += 1
+        metrics.CACHE_REQUESTS.labels(self.metric_label, 'hit' if hit else 'miss').inc()
+
+    def _read(self, key: str, reader: Callable[[Path], object]) -> Optional[object]:
+        """
+        Lê a entrada com reader (que levanta FileNotFoundError/ValueError se ela
+        não existir ou estiver corrompida) e marca o uso recente (LRU)
+        """
+        path = self.path_for(key)
+        with self._lock:
+            try:
+                value = reader(path)
+                os.utime(path)
+            except (FileNotFoundError, ValueError):
+                self._record(False)
+                return None
+            self._record(True)
+        logger.info(f"Entrada encontrada no {self.description}: {key}")
+        return value
+
+    def _write(self, key: str, writer: Callable[[Path], None]):
+        """Grava a entrada com writer em um arquivo temporário e a publica com rename"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(key)
+        with self._lock:
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.unlink(missing_ok=True)
+            writer(tmp_path)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _evict(self):
+        """Remove as entradas menos usadas até o cache caber em max_bytes e no espaço livre mínimo"""
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        shortfall = self.min_free_bytes - shutil.disk_usage(self.directory).free if self.min_free_bytes else 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes and shortfall <= 0:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            shortfall -= size
+            logger.info(f"Entrada removida do {self.description}: {path.name}")
+
+    def get_stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses}
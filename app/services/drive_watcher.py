@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import Optional
+import asyncio
+import uuid
+import logging
+from google.auth.exceptions import RefreshError
+from app.core.config import settings
+from app.services.google_drive import GoogleDriveService
+from app.services.job_store import JobStore
+from app.services.queue_manager import QueueManager
+from app.services.worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+PAGE_TOKEN_KEY = 'changes_page_token'
+
+class DriveWatcher:
+    """
+    Monitora as pastas de DRIVE_WATCH_FOLDERS pela API changes do Drive e
+    enfileira automaticamente os vídeos novos ou modificados. O page token é
+    gravado no JobStore após cada página processada, então uma reinicialização
+    continua de onde parou, sem varrer as pastas novamente. Cada revisão
+    (md5Checksum) de um arquivo é enfileirada uma única vez: alterações só de
+    metadados (nome, permissões, processamento do vídeo) são ignoradas.
+    """
+    _instance = None
+    _task: Optional[asyncio.Task] = None
+    _store = JobStore()
+    enqueued = 0
+    last_poll_at: Optional[str] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(DriveWatcher, cls).__new__(cls)
+        return cls._instance
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(settings.DRIVE_WATCH_FOLDERS)
+
+    def start(self):
+        if self.enabled() and DriveWatcher._task is None:
+            DriveWatcher._task = asyncio.create_task(self._run())
+            logger.info(f"Monitorando {len(settings.DRIVE_WATCH_FOLDERS)} pasta(s) do Drive")
+
+    async def stop(self):
+        if DriveWatcher._task is not None:
+            DriveWatcher._task.cancel()
+            await asyncio.gather(DriveWatcher._task, return_exceptions=True)
+            DriveWatcher._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except RefreshError:
+                logger.error("Monitoramento do Drive pausado: autenticação necessária no Google Drive")
+            except Exception as e:
+                logger.error(f"Erro ao consultar alterações do Drive: {e}")
+            await asyncio.sleep(settings.DRIVE_WATCH_INTERVAL_SECONDS)
+
+    async def poll(self):
+        """Processa todas as páginas de alterações desde o último token gravado"""
+        drive_service = GoogleDriveService(interactive=False)
+        page_token = await WorkerPool().run_io(self._store.get_watch_value, PAGE_TOKEN_KEY)
+        if page_token is None:
+            # Primeira execução: só alterações a partir de agora (opcionalmente, o conteúdo atual das pastas)
+            page_token = await WorkerPool().run_io(drive_service.get_start_page_token)
+            if settings.DRIVE_WATCH_INITIAL_SCAN:
+                for folder_id in settings.DRIVE_WATCH_FOLDERS:
+                    for file_metadata in await WorkerPool().run_io(drive_service.list_folder_videos, folder_id):
+                        if not await self._enqueue(file_metadata):
+                            return
+            await WorkerPool().run_io(self._store.set_watch_value, PAGE_TOKEN_KEY, page_token)
+
+        while True:
+            response = await WorkerPool().run_io(drive_service.list_changes, page_token)
+            for change in response.get('changes', []):
+                file_metadata = change.get('file')
+                if self._is_watched_video(file_metadata) and not await self._enqueue(file_metadata):
+                    # Fila cheia: a página é reprocessada na próxima consulta (revisões já enfileiradas são ignoradas)
+                    return
+            page_token = response.get('nextPageToken') or response.get('newStartPageToken')
+            await WorkerPool().run_io(self._store.set_watch_value, PAGE_TOKEN_KEY, page_token)
+            if 'nextPageToken' not in response:
+                break
+        DriveWatcher.last_poll_at = datetime.now().isoformat()
+
+    @staticmethod
+    def _is_watched_video(file_metadata: Optional[dict]) -> bool:
+        if not file_metadata or file_metadata.get('trashed'):
+            return False
+        if not file_metadata.get('mimeType', '').startswith('video/'):
+            return False
+        return any(parent in settings.DRIVE_WATCH_FOLDERS for parent in file_metadata.get('parents', []))
+
+    async def _enqueue(self, file_metadata: dict) -> bool:
+        """Enfileira a revisão atual do arquivo; retorna False apenas se a fila estiver cheia"""
+        file_id = file_metadata['id']
+        checksum = file_metadata.get('md5Checksum')
+        if not checksum:
+            # Sem checksum o conteúdo ainda não está disponível; uma nova alteração chegará depois
+            return True
+        if await WorkerPool().run_io(self._store.get_watched_checksum, file_id) == checksum:
+            return True
+
+        metadata = {key: value for key, value in file_metadata.items() if key not in ('parents', 'trashed')}
+        request_id = str(uuid.uuid4())
+        if not await QueueManager().add_to_queue(
+            request_id=request_id,
+            file_id=file_id,
+            webhook_url=settings.DRIVE_WATCH_WEBHOOK_URL or None,
+            language=settings.DRIVE_WATCH_LANGUAGE or None,
+            client_id=settings.DRIVE_WATCH_CLIENT_ID,
+            file_metadata=metadata
+        ):
+            logger.warning(f"Fila cheia; {file_metadata.get('name')} será enfileirado na próxima consulta")
+            return False
+        await WorkerPool().run_io(self._store.save_watched_file, file_id, checksum, request_id)
+        DriveWatcher.enqueued += 1
+        logger.info(f"Vídeo {file_metadata.get('name')} ({file_id}) enfileirado pelo monitoramento: {request_id}")
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            'enabled': self.enabled(),
+            'folders': len(settings.DRIVE_WATCH_FOLDERS),
+            'enqueued': self.enqueued,
+            'last_poll_at': self.last_poll_at
+        }
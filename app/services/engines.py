@@ -0,0 +1,195 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Type
+import importlib
+import importlib.util
+import logging
+import sys
+import threading
+from app.core.config import settings
+from app.services.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Optional[Callable[[int, int], None]]
+SegmentCallback = Optional[Callable[[dict], None]]
+
+# Versão do openai-whisper (fixada em requirements.txt) cujo laço de
+# whisper.transcribe foi verificado: _ProgressBar lê dele a lista all_segments
+WHISPER_VERSION = "20231117"
+
+_progress_local = threading.local()
+# whisper.transcribe.tqdm é global no processo: a substituição vale apenas durante uma transcrição por vez
+_patch_lock = threading.Lock()
+
+class _ProgressBar:
+    """
+    Substitui a barra tqdm usada internamente pelo Whisper para repassar o
+    progresso (em frames) e os segmentos recém-decodificados às callbacks
+    registradas na thread atual.
+    """
+    def __init__(self, total: int = None, **kwargs):
+        self.total = total or 0
+        self.current = 0
+        self.callback = getattr(_progress_local, 'callback', None)
+        self.segment_callback = getattr(_progress_local, 'segment_callback', None)
+        self.emitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, n: int = 1):
+        self.current = min(self.current + n, self.total)
+        if self.segment_callback:
+            # update() é chamado por whisper.transcribe logo após anexar os segmentos da janela
+            segments = sys._getframe(1).f_locals.get('all_segments')
+            if isinstance(segments, list):
+                for segment in segments[self.emitted:]:
+                    self.segment_callback({'start': segment['start'], 'end': segment['end'], 'text': segment['text']})
+                self.emitted = len(segments)
+                _progress_local.streamed = self.emitted
+            else:
+                # Laço interno diferente do esperado: os segmentos são emitidos ao final da transcrição
+                logger.warning("whisper.transcribe sem all_segments; segmentos serão emitidos ao final")
+                self.segment_callback = None
+        if self.callback and self.total:
+            self.callback(self.current, self.total)
+
+class _ProgressModule:
+    tqdm = _ProgressBar
+
+def _whisper_version() -> Optional[str]:
+    try:
+        return importlib.import_module('whisper.version').__version__
+    except (ImportError, AttributeError):
+        return None
+
+@contextmanager
+def _whisper_progress(progress_callback: ProgressCallback, segment_callback: SegmentCallback):
+    """
+    Substitui whisper.transcribe.tqdm apenas durante a chamada. Em versões do
+    openai-whisper diferentes de WHISPER_VERSION só o progresso é repassado e
+    os segmentos são emitidos ao final.
+    """
+    # "whisper.transcribe" é sombreado pela função de mesmo nome no pacote
+    module = importlib.import_module('whisper.transcribe')
+    if segment_callback and _whisper_version() != WHISPER_VERSION:
+        segment_callback = None
+    with _patch_lock:
+        original = module.tqdm
+        module.tqdm = _ProgressModule
+        _progress_local.callback = progress_callback
+        _progress_local.segment_callback = segment_callback
+        _progress_local.streamed = 0
+        try:
+            yield
+        finally:
+            module.tqdm = original
+            _progress_local.callback = None
+            _progress_local.segment_callback = None
+
+class InferenceEngine(ABC):
+    """
+    Interface dos backends de inferência. transcribe retorna sempre
+    {'text': str, 'segments': [{'start', 'end', 'text'}], 'language': str}.
+    """
+    name = ""
+    package = ""  # Pacote Python exigido pelo backend
+
+    @classmethod
+    def available(cls) -> bool:
+        return importlib.util.find_spec(cls.package) is not None
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.model_name = model_name or settings.WHISPER_MODEL
+
+    @property
+    def model(self):
+        return ModelRegistry().get_model(self.model_name, backend=self.name)
+
+    @abstractmethod
+    def transcribe(self, audio, language: Optional[str] = None, progress_callback: ProgressCallback = None, segment_callback: SegmentCallback = None, initial_prompt: Optional[str] = None) -> dict:
+        """Transcreve o áudio (caminho ou PCM float32 16 kHz)"""
+
+class WhisperEngine(InferenceEngine):
+    """openai-whisper em PyTorch (FP32 na CPU)"""
+    name = "whisper"
+    package = "whisper"
+
+    def transcribe(self, audio, language: Optional[str] = None, progress_callback: ProgressCallback = None, segment_callback: SegmentCallback = None, initial_prompt: Optional[str] = None) -> dict:
+        options = {
+            "language": language if language else None,
+            "task": "transcribe",
+            "verbose": True,
+            "initial_prompt": initial_prompt
+        }
+        model = self.model
+        with _whisper_progress(progress_callback, segment_callback):
+            result = model.transcribe(audio, **options)
+            streamed = _progress_local.streamed
+        segments = [
+            {'start': segment['start'], 'end': segment['end'], 'text': segment['text']}
+            for segment in result['segments']
+        ]
+        if segment_callback:
+            # Segmentos que não puderam ser emitidos durante a decodificação
+            for segment in segments[streamed:]:
+                segment_callback(segment)
+        return {
+            'text': result['text'],
+            'segments': segments,
+            'language': result.get('language')
+        }
+
+class FasterWhisperEngine(InferenceEngine):
+    """faster-whisper (CTranslate2) com pesos quantizados em int8 na CPU"""
+    name = "faster-whisper"
+    package = "faster_whisper"  # Opcional: fora de requirements.txt
+
+    def transcribe(self, audio, language: Optional[str] = None, progress_callback: ProgressCallback = None, segment_callback: SegmentCallback = None, initial_prompt: Optional[str] = None) -> dict:
+        segments_iter, info = self.model.transcribe(
+            audio,
+            language=language if language else None,
+            task="transcribe",
+            beam_size=5,
+            initial_prompt=initial_prompt
+        )
+        # O tempo de áudio já decodificado serve como progresso (em centésimos de segundo)
+        total = max(1, int(info.duration * 100))
+        segments = []
+        for segment in segments_iter:
+            segments.append({'start': segment.start, 'end': segment.end, 'text': segment.text})
+            if segment_callback:
+                segment_callback(segments[-1])
+            if progress_callback:
+                progress_callback(min(int(segment.end * 100), total), total)
+        return {
+            'text': "".join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': info.language
+        }
+
+ENGINES: Dict[str, Type[InferenceEngine]] = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+def backend_error(backend: str) -> Optional[str]:
+    """Motivo pelo qual o backend não pode ser usado (desconhecido ou pacote ausente), ou None"""
+    if backend not in ENGINES:
+        return f"Backend de inferência desconhecido: {backend}. Opções: {', '.join(ENGINES)}"
+    engine = ENGINES[backend]
+    if not engine.available():
+        return f"O backend '{backend}' requer o pacote {engine.package} instalado"
+    return None
+
+def get_engine(backend: Optional[str] = None, model_name: Optional[str] = None) -> InferenceEngine:
+    """Instancia o backend solicitado (padrão: INFERENCE_BACKEND)"""
+    backend = backend or settings.INFERENCE_BACKEND
+    error = backend_error(backend)
+    if error:
+        raise ValueError(error)
+    return ENGINES[backend](model_name)
@@ -1,75 +1,366 @@
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-import io
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from filelock import FileLock
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+import asyncio
+import httplib2
+import json
 import os
+import re
+import threading
+import time
 import logging
 from app.core.config import settings
+from app.services.worker_pool import WorkerPool
+from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
 
 logger = logging.getLogger(__name__)
 
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
+METADATA_FIELDS = 'id,name,mimeType,size,md5Checksum,modifiedTime,videoMediaMetadata'
+
+# Limite de chamadas por requisição batch da API do Drive
+DRIVE_BATCH_LIMIT = 100
+
+# IDs de arquivos e pastas do Drive; nada fora disso é interpolado na consulta q
+DRIVE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
 class GoogleDriveService:
-    def __init__(self):
-        self.service = self._get_service()
+    """
+    Acesso ao Google Drive. As credenciais e o documento de descoberta são
+    compartilhados pelo processo; cada thread usa seu próprio transporte
+    HTTP (httplib2 não é thread-safe), reaproveitado entre jobs.
+    """
+    _credentials: Optional[Credentials] = None
+    _credentials_lock = threading.RLock()
+    _discovery_document: Optional[dict] = None
+    _local = threading.local()
+
+    def __init__(self, interactive: bool = True):
+        """
+        interactive=False (requisições HTTP): sem credenciais válidas, a primeira
+        chamada à API levanta RefreshError em vez de abrir o fluxo de autorização
+        local, e não espera por uma autenticação em andamento em outra thread.
+        """
         self._flow = None
+        self._interactive = interactive
+        if interactive:
+            self._get_credentials()
+
+    @property
+    def service(self):
+        """Serviço do Drive da thread atual, recriado apenas se as credenciais forem substituídas"""
+        credentials = self._get_credentials()
+        if getattr(self._local, 'credentials', None) is not credentials:
+            self._local.service = self._build_service(credentials)
+            self._local.credentials = credentials
+        return self._local.service
+
+    @classmethod
+    def _build_service(cls, credentials: Credentials):
+        http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=settings.DRIVE_HTTP_TIMEOUT))
+        if cls._discovery_document is None:
+            document = get_static_doc('drive', 'v3')
+            if document is None:
+                return build('drive', 'v3', http=http)
+            cls._discovery_document = json.loads(document)
+        client_options = {'api_endpoint': settings.DRIVE_API_ENDPOINT} if settings.DRIVE_API_ENDPOINT else None
+        return build_from_document(cls._discovery_document, http=http, client_options=client_options)
+
+    def _get_credentials(self) -> Credentials:
+        """Retorna as credenciais compartilhadas, carregando/renovando apenas quando necessário"""
+        # O fluxo interativo mantém o lock até a autorização; chamadas não interativas desistem
+        if not self._credentials_lock.acquire(timeout=-1 if self._interactive else settings.DRIVE_HTTP_TIMEOUT):
+            raise RefreshError("Autenticação no Google Drive em andamento")
+        try:
+            creds = GoogleDriveService._credentials
+            if creds and creds.valid:
+                return creds
+
+            if creds is None and os.path.exists(settings.TOKEN_FILE):
+                with self._token_lock():
+                    creds = Credentials.from_authorized_user_file(str(settings.TOKEN_FILE), SCOPES)
+
+            if not creds or not creds.valid:
+                if creds and creds.expired and creds.refresh_token:
+                    try:
+                        creds.refresh(Request())
+                    except:
+                        creds = None
 
-    def _get_service(self):
-        """Configura e retorna o serviço do Google Drive"""
-        creds = None
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-        
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                try:
-                    creds.refresh(Request())
-                except:
-                    creds = None
-            
-            if not creds:
-                self._flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                creds = self._flow.run_local_server(port=0)
-                
-            # Salvar as credenciais para a próxima execução
-            with open('token.json', 'w') as token_file:
+                if not creds:
+                    if not self._interactive:
+                        raise RefreshError("Autenticação necessária no Google Drive")
+                    self._flow = InstalledAppFlow.from_client_secrets_file(
+                        str(settings.CREDENTIALS_FILE), SCOPES)
+                    creds = self._flow.run_local_server(port=0)
+
+                # Salvar as credenciais para a próxima execução
+                self._save_credentials(creds)
+
+            logger.info("Autenticado com sucesso no Google Drive")
+            GoogleDriveService._credentials = creds
+            return creds
+        finally:
+            self._credentials_lock.release()
+
+    @classmethod
+    def refresh_credentials(cls):
+        """Renova o token de acesso antes de expirar, para que nenhum job pague a renovação"""
+        with cls._credentials_lock:
+            creds = GoogleDriveService._credentials
+            if not creds or not creds.refresh_token:
+                return
+            try:
+                creds.refresh(Request())
+            except RefreshError:
+                # Força nova autenticação na próxima utilização
+                GoogleDriveService._credentials = None
+                raise
+            cls._save_credentials(creds)
+            logger.info("Token do Google Drive renovado")
+
+    @classmethod
+    async def run_token_refresher(cls):
+        """Renova o token periodicamente, DRIVE_TOKEN_REFRESH_MARGIN segundos antes da expiração"""
+        while True:
+            delay = settings.DRIVE_TOKEN_REFRESH_MARGIN
+            creds = GoogleDriveService._credentials
+            if creds and creds.expiry:
+                remaining = (creds.expiry - datetime.utcnow()).total_seconds()
+                delay = max(remaining - settings.DRIVE_TOKEN_REFRESH_MARGIN, 1)
+            await asyncio.sleep(delay)
+            try:
+                await WorkerPool().run_io(cls.refresh_credentials)
+            except Exception as e:
+                logger.error(f"Erro ao renovar token do Google Drive: {e}")
+
+    @staticmethod
+    def _token_lock() -> FileLock:
+        """Lock entre processos para leitura/escrita de token.json"""
+        return FileLock(f"{settings.TOKEN_FILE}.lock", timeout=30)
+
+    @classmethod
+    def _save_credentials(cls, creds: Credentials):
+        # Escrita no próprio arquivo (não via rename): token.json é montado como arquivo no container
+        with cls._token_lock():
+            with open(settings.TOKEN_FILE, 'w') as token_file:
                 token_file.write(creds.to_json())
-        
-        logger.info("Autenticado com sucesso no Google Drive")
-        return build('drive', 'v3', credentials=creds)
 
     def get_authorization_url(self) -> str:
-        """Retorna a URL para autorização do Google Drive"""
+        """
+        Retorna a URL para autorização do Google Drive. Lê o client secret do
+        disco: deve rodar no pool de I/O. Levanta FileNotFoundError sem CREDENTIALS_FILE.
+        """
+        if not os.path.exists(settings.CREDENTIALS_FILE):
+            raise FileNotFoundError(f"Arquivo de credenciais do Google Drive não encontrado: {settings.CREDENTIALS_FILE}")
         if not self._flow:
             self._flow = InstalledAppFlow.from_client_secrets_file(
-                'credentials.json', SCOPES)
+                str(settings.CREDENTIALS_FILE), SCOPES)
         auth_url, _ = self._flow.authorization_url(
             access_type='offline',
             include_granted_scopes='true'
         )
         return auth_url
 
-    async def download_file(self, file_id: str):
-        """Faz o download de um arquivo do Google Drive"""
-        try:
-            file_metadata = self.service.files().get(fileId=file_id).execute()
+    def get_file_metadata(self, file_id: str) -> dict:
+        """Retorna os metadados do arquivo (nome, tamanho, checksum, duração do vídeo)"""
+        return self.service.files().get(fileId=file_id, fields=METADATA_FIELDS).execute()
+
+    def get_files_metadata(self, file_ids: List[str]) -> Dict[str, dict]:
+        """
+        Busca os metadados de vários arquivos em requisições batch (até 100 por chamada).
+        Arquivos com erro retornam {'error': mensagem}.
+        """
+        results: Dict[str, dict] = {}
+
+        def callback(file_id, response, exception):
+            results[file_id] = {'error': str(exception)} if exception else response
+
+        unique_ids = list(dict.fromkeys(file_ids))
+        for start in range(0, len(unique_ids), DRIVE_BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for file_id in unique_ids[start:start + DRIVE_BATCH_LIMIT]:
+                batch.add(self.service.files().get(fileId=file_id, fields=METADATA_FIELDS), request_id=file_id)
+            batch.execute()
+        return results
+
+    def get_start_page_token(self) -> str:
+        """Page token da API changes a partir do estado atual do Drive"""
+        return self.service.changes().getStartPageToken().execute()['startPageToken']
+
+    def list_changes(self, page_token: str) -> dict:
+        """
+        Uma página de alterações desde page_token. A resposta traz nextPageToken
+        (há mais páginas) ou newStartPageToken (token para a próxima consulta).
+        """
+        return self.service.changes().list(
+            pageToken=page_token,
+            spaces='drive',
+            includeRemoved=False,
+            fields=f"nextPageToken, newStartPageToken, changes(fileId, file({METADATA_FIELDS},parents,trashed))",
+            pageSize=1000
+        ).execute()
+
+    def list_folder_videos(self, folder_id: str, max_files: Optional[int] = None) -> List[dict]:
+        """
+        Lista (com metadados) os vídeos contidos diretamente em uma pasta. Com
+        max_files, a listagem para assim que passa do limite (o excesso indica ao
+        chamador que a pasta não cabe). Levanta ValueError para IDs inválidos.
+        """
+        if not DRIVE_ID_PATTERN.match(folder_id):
+            raise ValueError(f"ID de pasta do Drive inválido: {folder_id!r}")
+        page_size = 1000 if max_files is None else min(1000, max_files + 1)
+        files = []
+        page_token = None
+        while True:
+            response = self.service.files().list(
+                q=f"'{folder_id}' in parents and mimeType contains 'video/' and trashed = false",
+                fields=f"nextPageToken, files({METADATA_FIELDS})",
+                pageSize=page_size,
+                pageToken=page_token
+            ).execute()
+            files.extend(response.get('files', []))
+            page_token = response.get('nextPageToken')
+            if not page_token or (max_files is not None and len(files) > max_files):
+                return files
+
+    async def download_to_file(
+        self,
+        file_id: str,
+        destination: Path,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        file_metadata: Optional[dict] = None
+    ) -> dict:
+        """
+        Faz o download em streaming diretamente para destination, sem manter
+        o arquivo em memória. Retorna os metadados do arquivo.
+        """
+        return await WorkerPool().run_io(self._download_to_file_sync, file_id, destination, progress_callback, file_metadata)
+
+    def _download_to_file_sync(
+        self,
+        file_id: str,
+        destination: Path,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        file_metadata: Optional[dict] = None
+    ) -> dict:
+        if file_metadata is None:
+            file_metadata = self.get_file_metadata(file_id)
+            logger.info(f"Metadados do arquivo: {file_metadata}")
+        total = int(file_metadata.get('size') or 0)
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        # Um download interrompido anteriormente é retomado a partir do que já está em disco
+        offset = destination.stat().st_size if destination.exists() else 0
+        if total and offset > total:
+            destination.unlink()
+            offset = 0
+        if offset:
+            logger.info(f"Retomando download de {file_id} a partir do byte {offset}")
+
+        with open(destination, 'ab') as file:
+            for chunk in self.iter_chunks(file_id, offset, total):
+                file.write(chunk)
+                offset += len(chunk)
+                if progress_callback:
+                    progress_callback(offset, total or offset)
+
+        logger.info(f"Download concluído: {destination} ({offset} bytes)")
+        return file_metadata
+
+    async def stream_file(
+        self,
+        file_id: str,
+        consumer: Callable[[Iterator[bytes]], object],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        file_metadata: Optional[dict] = None
+    ) -> dict:
+        """
+        Entrega os trechos do arquivo a consumer (ex.: stdin do FFmpeg) à medida que
+        são baixados, sem gravá-los em disco. Retorna os metadados do arquivo.
+        """
+        return await WorkerPool().run_io(self._stream_file_sync, file_id, consumer, progress_callback, file_metadata)
+
+    def _stream_file_sync(
+        self,
+        file_id: str,
+        consumer: Callable[[Iterator[bytes]], object],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        file_metadata: Optional[dict] = None
+    ) -> dict:
+        if file_metadata is None:
+            file_metadata = self.get_file_metadata(file_id)
             logger.info(f"Metadados do arquivo: {file_metadata}")
+        total = int(file_metadata.get('size') or 0)
+
+        def chunks():
+            downloaded = 0
+            for chunk in self.iter_chunks(file_id, 0, total):
+                downloaded += len(chunk)
+                if progress_callback:
+                    progress_callback(downloaded, total or downloaded)
+                yield chunk
+
+        consumer(chunks())
+        return file_metadata
+
+    def iter_chunks(self, file_id: str, offset: int = 0, total: int = 0) -> Iterator[bytes]:
+        """
+        Gera o conteúdo do arquivo em trechos de DRIVE_CHUNK_SIZE a partir de offset,
+        retomando automaticamente (via Range) após falhas transitórias.
+        """
+        request_drive = self.service.files().get_media(fileId=file_id)
+        attempts = 0
+        while not total or offset < total:
+            try:
+                chunk, total = self._fetch_range(request_drive, offset, total)
+            except (HttpError, OSError) as e:
+                retriable = not isinstance(e, HttpError) or e.resp.status >= 500 or e.resp.status == 429
+                attempts += 1
+                if not retriable or attempts > settings.DRIVE_DOWNLOAD_RETRIES:
+                    logger.error(f"Erro ao baixar arquivo: {e}")
+                    raise
+                logger.warning(f"Falha no download de {file_id} no byte {offset} (tentativa {attempts}): {e}")
+                time.sleep(min(2 ** attempts, 30))
+                continue
+
+            attempts = 0
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+    def _fetch_range(self, request_drive, offset: int, total: int):
+        """Baixa um trecho do arquivo via header Range. Retorna o conteúdo e o tamanho total."""
+        end = offset + settings.DRIVE_CHUNK_SIZE - 1
+        if total:
+            end = min(end, total - 1)
+        response, content = request_drive.http.request(
+            request_drive.uri,
+            method='GET',
+            headers={'range': f'bytes={offset}-{end}'}
+        )
+        if response.status == 416:
+            return b'', offset
+        if response.status not in (200, 206):
+            raise HttpError(response, content, uri=request_drive.uri)
 
-            request_drive = self.service.files().get_media(fileId=file_id)
-            file = io.BytesIO()
-            downloader = MediaIoBaseDownload(file, request_drive)
-            
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-                logger.info(f"Download progresso: {int(status.progress() * 100)}%")
-
-            return file.getvalue(), file_metadata['name']
-            
-        except Exception as e:
-            logger.error(f"Erro ao baixar arquivo: {e}")
-            raise
+        content_range = response.get('content-range', '')
+        match = re.search(r'/(\d+)$', content_range)
+        if match:
+            total = int(match.group(1))
+        elif response.status == 200:
+            # O servidor ignorou o Range e enviou o arquivo inteiro
+            if offset:
+                raise HttpError(response, b'Range request ignored', uri=request_drive.uri)
+            total = len(content)
+        return content, total
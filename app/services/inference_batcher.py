@@ -0,0 +1,205 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+from app.core.config import settings
+from app.services.model_registry import ModelRegistry
+from app.services.transcription import SAMPLE_RATE, load_pcm
+from app.services.worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Constantes de whisper.audio, repetidas aqui para não importar torch no processo da API
+HOP_LENGTH = 160  # Amostras por quadro do espectrograma
+WINDOW_FRAMES = 3000  # Janela de 30 s do encoder
+MAX_PROMPT_TOKENS = 223  # O decoder usa no máximo metade do contexto de texto como prompt
+
+# Mesmos critérios de whisper.transcribe para repetir a decodificação com temperatura maior
+FALLBACK_TEMPERATURES = (0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+def _needs_fallback(result) -> bool:
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD:
+        # Provável silêncio: whisper.transcribe não decodifica de novo e decide se descarta a janela
+        return False
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+def _is_no_speech(result) -> bool:
+    return result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+
+def _parse_window(result, tokenizer, frames: int, input_stride: int, time_precision: float) -> Tuple[List[dict], int, List[int]]:
+    """
+    Converte os tokens de uma janela em segmentos (tempos relativos à janela) e
+    retorna quantos quadros avançar e os tokens dos segmentos concluídos (que
+    entram no prompt da próxima janela), como em whisper.transcribe.
+    """
+    tokens = list(result.tokens)
+    timestamp_begin = tokenizer.timestamp_begin
+    is_timestamp = [token >= timestamp_begin for token in tokens]
+
+    def text_of(sliced: List[int]) -> str:
+        return tokenizer.decode([token for token in sliced if token < tokenizer.eot])
+
+    single_timestamp_ending = is_timestamp[-2:] == [False, True]
+    consecutive = [index + 1 for index in range(len(tokens) - 1) if is_timestamp[index] and is_timestamp[index + 1]]
+    segments = []
+    if consecutive:
+        slices = consecutive + ([len(tokens)] if single_timestamp_ending else [])
+        last_slice = 0
+        for current_slice in slices:
+            sliced = tokens[last_slice:current_slice]
+            segments.append({
+                'start': (sliced[0] - timestamp_begin) * time_precision,
+                'end': (sliced[-1] - timestamp_begin) * time_precision,
+                'text': text_of(sliced)
+            })
+            last_slice = current_slice
+        if single_timestamp_ending:
+            return segments, frames, tokens
+        # A janela termina no meio de um segmento: a próxima começa no último timestamp e o
+        # texto incompleto depois dele fica fora do prompt
+        return segments, (tokens[last_slice - 1] - timestamp_begin) * input_stride, tokens[:last_slice]
+
+    duration = frames * HOP_LENGTH / SAMPLE_RATE
+    timestamps = [token for token in tokens if token >= timestamp_begin]
+    if timestamps and timestamps[-1] != timestamp_begin:
+        duration = (timestamps[-1] - timestamp_begin) * time_precision
+    segments.append({'start': 0.0, 'end': duration, 'text': text_of(tokens)})
+    return segments, frames, tokens
+
+def decode_windows_in_worker(model_name: str, windows: List[dict]) -> List[dict]:
+    """
+    Executado no pool de processos: calcula o espectrograma das janelas, passa todas
+    pelo encoder em um único lote e decodifica juntas as janelas com o mesmo idioma e
+    prompt. Cada resultado traz os segmentos da janela, quantos quadros avançar e os
+    tokens que estendem o prompt; janelas sem fala (no_speech) não têm nenhum dos dois.
+    """
+    import torch
+    from whisper.audio import N_SAMPLES, log_mel_spectrogram, pad_or_trim
+    from whisper.decoding import DecodingOptions
+    from whisper.tokenizer import get_tokenizer
+
+    model = ModelRegistry().get_model(model_name, 'whisper')
+    mels = []
+    for window in windows:
+        audio = torch.from_numpy(load_pcm(Path(window['audio_path']), window['start'], window['end']))
+        mels.append(log_mel_spectrogram(pad_or_trim(audio, N_SAMPLES), model.dims.n_mels))
+
+    def options_for(language: Optional[str], prompt: Tuple[int, ...], temperature: float):
+        return DecodingOptions(language=language, prompt=list(prompt) or None, temperature=temperature, fp16=False)
+
+    with torch.no_grad():
+        features = model.embed_audio(torch.stack(mels).to(model.device))
+
+        groups: Dict[Tuple[Optional[str], Tuple[int, ...]], List[int]] = {}
+        for index, window in enumerate(windows):
+            groups.setdefault((window.get('language'), tuple(window.get('prompt') or ())), []).append(index)
+        decoded = [None] * len(windows)
+        for (language, prompt), indices in groups.items():
+            for index, result in zip(indices, model.decode(features[indices], options_for(language, prompt, 0.0))):
+                decoded[index] = result
+
+        input_stride = WINDOW_FRAMES // model.dims.n_audio_ctx
+        time_precision = input_stride * HOP_LENGTH / SAMPLE_RATE
+        outputs = []
+        for index, window in enumerate(windows):
+            result = decoded[index]
+            prompt = tuple(window.get('prompt') or ())
+            for temperature in FALLBACK_TEMPERATURES:
+                if not _needs_fallback(result):
+                    break
+                result = model.decode(features[index:index + 1], options_for(window.get('language'), prompt, temperature))[0]
+
+            if _is_no_speech(result):
+                # Janela sem fala: avança sem gerar segmentos nem alterar o prompt
+                outputs.append({
+                    'segments': [],
+                    'advance': window['frames'],
+                    'tokens': [],
+                    'no_speech': True,
+                    'language': result.language,
+                    'temperature': result.temperature
+                })
+                continue
+
+            tokenizer = get_tokenizer(
+                model.is_multilingual,
+                num_languages=model.num_languages,
+                language=result.language,
+                task='transcribe'
+            )
+            segments, advance, tokens = _parse_window(result, tokenizer, window['frames'], input_stride, time_precision)
+            outputs.append({
+                'segments': segments,
+                'advance': max(1, min(advance, window['frames'])),
+                'tokens': list(tokens),
+                'no_speech': False,
+                'language': result.language,
+                'temperature': result.temperature
+            })
+    return outputs
+
+class InferenceBatcher:
+    """
+    Agrupa as janelas de 30 s de solicitações simultâneas em um único passe do
+    encoder (e do decoder, quando idioma e prompt coincidem). Um lote é enviado ao
+    pool ao atingir INFERENCE_BATCH_SIZE janelas ou INFERENCE_BATCH_MAX_WAIT_MS
+    após a primeira; cada resultado volta à solicitação que enviou a janela.
+    """
+    _instance = None
+    _pending: Dict[str, List[Tuple[dict, asyncio.Future]]] = {}
+    _timers: Dict[str, asyncio.TimerHandle] = {}
+    stats = {'batches': 0, 'windows': 0}
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(InferenceBatcher, cls).__new__(cls)
+        return cls._instance
+
+    async def submit(self, model_name: str, window: dict) -> dict:
+        """Envia uma janela para o próximo lote e aguarda o resultado dela"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(model_name, [])
+        pending.append((window, future))
+        if len(pending) >= settings.INFERENCE_BATCH_SIZE:
+            self._flush(model_name)
+        elif model_name not in self._timers:
+            self._timers[model_name] = loop.call_later(
+                settings.INFERENCE_BATCH_MAX_WAIT_MS / 1000,
+                self._flush,
+                model_name
+            )
+        return await future
+
+    def _flush(self, model_name: str):
+        timer = self._timers.pop(model_name, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(model_name, [])
+        if batch:
+            asyncio.ensure_future(self._run(model_name, batch))
+
+    async def _run(self, model_name: str, batch: List[Tuple[dict, asyncio.Future]]):
+        self.stats['batches'] += 1
+        self.stats['windows'] += len(batch)
+        logger.debug(f"Lote de inferência com {len(batch)} janela(s) ({model_name})")
+        try:
+            results = await WorkerPool().run_cpu(decode_windows_in_worker, model_name, [window for window, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> dict:
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'average_batch_size': round(self.stats['windows'] / batches, 2) if batches else 0.0
+        }
@@ -0,0 +1,340 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import json
+import sqlite3
+import threading
+import time
+import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = ('completed', 'error', 'auth_required')
+
+class JobStore:
+    """
+    Armazenamento durável (SQLite) dos registros da fila, para que as
+    solicitações sobrevivam a reinicializações do container.
+    """
+    _instance = None
+    _connection: Optional[sqlite3.Connection] = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(JobStore, cls).__new__(cls)
+        return cls._instance
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if JobStore._connection is None:
+            path = Path(settings.JOB_STORE_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(path), check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    request_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, updated_at)")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS batches (
+                    batch_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    completed_at TEXT
+                )
+                """
+            )
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS webhook_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    request_id TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS webhook_outbox_due ON webhook_outbox (status, next_attempt_at)")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS drive_watch (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS drive_watch_files (
+                    file_id TEXT PRIMARY KEY,
+                    md5_checksum TEXT NOT NULL,
+                    request_id TEXT NOT NULL,
+                    enqueued_at TEXT NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    request_id TEXT NOT NULL,
+                    stream TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (request_id, stream)
+                )
+                """
+            )
+            connection.commit()
+            JobStore._connection = connection
+        return JobStore._connection
+
+    def save(self, request_id: str, request_data: dict):
+        """Grava (ou atualiza) o estado atual de uma solicitação"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute(
+                """
+                INSERT INTO jobs (request_id, status, data, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(request_id) DO UPDATE SET
+                    status = excluded.status,
+                    data = excluded.data,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    request_id,
+                    request_data.get('status', 'pending'),
+                    json.dumps(request_data, ensure_ascii=False),
+                    request_data.get('created_at', now),
+                    now
+                )
+            )
+            connection.commit()
+
+    def load_unfinished(self) -> List[dict]:
+        """Retorna, em ordem de chegada, as solicitações que não chegaram a um estado final"""
+        with self._lock:
+            rows = self._get_connection().execute(
+                f"SELECT request_id, data FROM jobs WHERE status NOT IN ({','.join('?' * len(FINAL_STATUSES))}) ORDER BY created_at",
+                FINAL_STATUSES
+            ).fetchall()
+        return [{'request_id': request_id, **json.loads(data)} for request_id, data in rows]
+
+    def load_jobs(self, request_ids: List[str]) -> List[dict]:
+        """Retorna os registros das solicitações informadas (em qualquer estado)"""
+        if not request_ids:
+            return []
+        with self._lock:
+            rows = self._get_connection().execute(
+                f"SELECT request_id, data FROM jobs WHERE request_id IN ({','.join('?' * len(request_ids))})",
+                request_ids
+            ).fetchall()
+        return [{'request_id': request_id, **json.loads(data)} for request_id, data in rows]
+
+    def prune(self, retention_seconds: int) -> List[str]:
+        """
+        Remove solicitações finalizadas (e webhooks esgotados) há mais de
+        retention_seconds; retorna os IDs removidos
+        """
+        cutoff = (datetime.now() - timedelta(seconds=retention_seconds)).isoformat()
+        placeholders = ','.join('?' * len(FINAL_STATUSES))
+        with self._lock:
+            connection = self._get_connection()
+            rows = connection.execute(
+                f"SELECT request_id FROM jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*FINAL_STATUSES, cutoff)
+            ).fetchall()
+            connection.execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*FINAL_STATUSES, cutoff)
+            )
+            connection.execute("DELETE FROM batches WHERE completed_at IS NOT NULL AND completed_at < ?", (cutoff,))
+            connection.execute("DELETE FROM checkpoints WHERE request_id NOT IN (SELECT request_id FROM jobs)")
+            # Entregas esgotadas ficam no outbox apenas para diagnóstico, pelo mesmo período
+            connection.execute(
+                "DELETE FROM webhook_outbox WHERE status = 'dead' AND created_at < ?",
+                (time.time() - retention_seconds,)
+            )
+            connection.commit()
+        return [request_id for (request_id,) in rows]
+
+    def save_checkpoint(self, request_id: str, stream: str, version: int, data: dict):
+        """Grava o progresso de um trecho da transcrição; versões antigas não sobrescrevem as novas"""
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute(
+                """
+                INSERT INTO checkpoints (request_id, stream, version, data, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(request_id, stream) DO UPDATE SET
+                    version = excluded.version,
+                    data = excluded.data,
+                    updated_at = excluded.updated_at
+                WHERE excluded.version > checkpoints.version
+                """,
+                (request_id, stream, version, json.dumps(data, ensure_ascii=False), datetime.now().isoformat())
+            )
+            connection.commit()
+
+    def load_checkpoints(self, request_id: str) -> Dict[str, dict]:
+        with self._lock:
+            rows = self._get_connection().execute(
+                "SELECT stream, data FROM checkpoints WHERE request_id = ?",
+                (request_id,)
+            ).fetchall()
+        return {stream: json.loads(data) for stream, data in rows}
+
+    def get_watch_value(self, key: str) -> Optional[str]:
+        """Estado do monitoramento de pastas do Drive (ex.: page token da API changes)"""
+        with self._lock:
+            row = self._get_connection().execute("SELECT value FROM drive_watch WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_watch_value(self, key: str, value: str):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute(
+                "INSERT INTO drive_watch (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+            connection.commit()
+
+    def get_watched_checksum(self, file_id: str) -> Optional[str]:
+        """md5 da última revisão do arquivo enfileirada pelo monitoramento de pastas"""
+        with self._lock:
+            row = self._get_connection().execute(
+                "SELECT md5_checksum FROM drive_watch_files WHERE file_id = ?",
+                (file_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_watched_file(self, file_id: str, md5_checksum: str, request_id: str):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute(
+                """
+                INSERT INTO drive_watch_files (file_id, md5_checksum, request_id, enqueued_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(file_id) DO UPDATE SET
+                    md5_checksum = excluded.md5_checksum,
+                    request_id = excluded.request_id,
+                    enqueued_at = excluded.enqueued_at
+                """,
+                (file_id, md5_checksum, request_id, datetime.now().isoformat())
+            )
+            connection.commit()
+
+    def delete_checkpoints(self, request_id: str):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute("DELETE FROM checkpoints WHERE request_id = ?", (request_id,))
+            connection.commit()
+
+    def save_batch(self, batch_id: str, batch_data: dict):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute(
+                """
+                INSERT INTO batches (batch_id, data, completed_at) VALUES (?, ?, ?)
+                ON CONFLICT(batch_id) DO UPDATE SET data = excluded.data, completed_at = excluded.completed_at
+                """,
+                (batch_id, json.dumps(batch_data, ensure_ascii=False), batch_data.get('completed_at'))
+            )
+            connection.commit()
+
+    def load_unfinished_batches(self) -> List[dict]:
+        with self._lock:
+            rows = self._get_connection().execute(
+                "SELECT batch_id, data FROM batches WHERE completed_at IS NULL"
+            ).fetchall()
+        return [{'batch_id': batch_id, **json.loads(data)} for batch_id, data in rows]
+
+    def add_webhook(self, request_id: str, url: str, payload: dict, now: float) -> int:
+        """Registra uma entrega de webhook pendente no outbox; retorna o ID da entrega"""
+        with self._lock:
+            connection = self._get_connection()
+            cursor = connection.execute(
+                "INSERT INTO webhook_outbox (request_id, url, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (request_id, url, json.dumps(payload, ensure_ascii=False), now, now)
+            )
+            connection.commit()
+            return cursor.lastrowid
+
+    def due_webhooks(self, now: float, limit: int, exclude: Iterable[int] = ()) -> List[dict]:
+        """Entregas pendentes cujo horário de nova tentativa já chegou (exceto as de exclude, já em envio)"""
+        exclude = list(exclude)
+        placeholders = ','.join('?' * len(exclude))
+        with self._lock:
+            rows = self._get_connection().execute(
+                f"""
+                SELECT id, request_id, url, payload, attempts, created_at FROM webhook_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ? AND id NOT IN ({placeholders})
+                ORDER BY next_attempt_at LIMIT ?
+                """,
+                (now, *exclude, limit)
+            ).fetchall()
+        return [
+            {
+                'id': row[0],
+                'request_id': row[1],
+                'url': row[2],
+                'payload': json.loads(row[3]),
+                'attempts': row[4],
+                'created_at': row[5]
+            }
+            for row in rows
+        ]
+
+    def next_webhook_at(self, exclude: Iterable[int] = ()) -> Optional[float]:
+        """Horário da próxima entrega pendente que não está em envio (exclude)"""
+        exclude = list(exclude)
+        placeholders = ','.join('?' * len(exclude))
+        with self._lock:
+            row = self._get_connection().execute(
+                f"SELECT MIN(next_attempt_at) FROM webhook_outbox WHERE status = 'pending' AND id NOT IN ({placeholders})",
+                exclude
+            ).fetchone()
+        return row[0]
+
+    def complete_webhook(self, delivery_id: int):
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute("DELETE FROM webhook_outbox WHERE id = ?", (delivery_id,))
+            connection.commit()
+
+    def retry_webhook(self, delivery_id: int, attempts: int, next_attempt_at: Optional[float], error: str):
+        """Agenda nova tentativa; sem next_attempt_at a entrega é marcada como esgotada ('dead')"""
+        with self._lock:
+            connection = self._get_connection()
+            connection.execute(
+                """
+                UPDATE webhook_outbox
+                SET attempts = ?, next_attempt_at = COALESCE(?, next_attempt_at), last_error = ?,
+                    status = CASE WHEN ? IS NULL THEN 'dead' ELSE 'pending' END
+                WHERE id = ?
+                """,
+                (attempts, next_attempt_at, error, next_attempt_at, delivery_id)
+            )
+            connection.commit()
+
+    def close(self):
+        with self._lock:
+            if JobStore._connection is not None:
+                JobStore._connection.close()
+                JobStore._connection = None
@@ -0,0 +1,161 @@
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+import hashlib
+import logging
+from multipart.multipart import MultipartParser, parse_options_header
+from app.core.config import settings
+from app.services.temp_space import TempSpaceManager
+from app.services.worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Campos de texto do multipart (webhook_url, language, ...) são pequenos
+MAX_FIELD_BYTES = 64 * 1024
+
+# Nome do arquivo recebido no workspace; o FFmpeg identifica o formato pelo conteúdo
+UPLOAD_FILENAME = "upload"
+
+class UploadError(Exception):
+    """Corpo da requisição de upload inválido"""
+
+class UploadWriter:
+    """
+    Grava o corpo recebido no workspace da solicitação em blocos de
+    UPLOAD_FLUSH_BYTES, fora do event loop, calculando tamanho e md5 (usado
+    pelos caches) durante a escrita. O corpo nunca é mantido inteiro em memória.
+    """
+    def __init__(self, request_id: str, path: Path):
+        self.request_id = request_id
+        self.path = path
+        self.size = 0
+        self._md5 = hashlib.md5()
+        self._buffer = bytearray()
+        self._file = None
+
+    @property
+    def md5(self) -> str:
+        return self._md5.hexdigest()
+
+    async def write(self, data: bytes):
+        self._buffer.extend(data)
+        if len(self._buffer) >= settings.UPLOAD_FLUSH_BYTES:
+            await self.flush()
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        await WorkerPool().run_io(self._write_sync, data)
+
+    def _write_sync(self, data: bytes):
+        if self._file is None:
+            self._file = open(self.path, 'wb')
+        self._file.write(data)
+        self._md5.update(data)
+        self.size += len(data)
+        TempSpaceManager().check_quota(self.request_id, self.size)
+
+    async def close(self):
+        try:
+            await self.flush()
+        finally:
+            await self.abort()
+
+    async def abort(self):
+        """Fecha o arquivo sem gravar o que restou no buffer (upload interrompido)"""
+        self._buffer.clear()
+        if self._file is not None:
+            file, self._file = self._file, None
+            await WorkerPool().run_io(file.close)
+
+async def receive_raw(chunks: AsyncIterator[bytes], writer: UploadWriter):
+    """Corpo cru (ex.: video/mp4 ou application/octet-stream): o arquivo é o próprio corpo"""
+    async for chunk in chunks:
+        await writer.write(chunk)
+    await writer.close()
+
+async def receive_multipart(content_type: str, chunks: AsyncIterator[bytes], writer: UploadWriter) -> Tuple[Dict[str, str], Optional[str]]:
+    """
+    Lê um multipart/form-data em streaming: a primeira parte com filename vai
+    para writer e as partes de texto voltam como campos.
+    Retorna (campos, nome do arquivo enviado).
+    """
+    _, params = parse_options_header(content_type)
+    boundary = params.get(b'boundary')
+    if not boundary:
+        raise UploadError("multipart/form-data sem boundary")
+
+    # O parser chama as callbacks de forma síncrona; os eventos são tratados após cada trecho
+    events = []
+    parser = MultipartParser(boundary, {
+        'on_part_begin': lambda: events.append(('begin', b'')),
+        'on_header_field': lambda data, start, end: events.append(('header_field', data[start:end])),
+        'on_header_value': lambda data, start, end: events.append(('header_value', data[start:end])),
+        'on_header_end': lambda: events.append(('header_end', b'')),
+        'on_headers_finished': lambda: events.append(('headers_finished', b'')),
+        'on_part_data': lambda data, start, end: events.append(('data', data[start:end])),
+        'on_part_end': lambda: events.append(('end', b''))
+    })
+
+    fields: Dict[str, str] = {}
+    filename = None
+    file_received = False
+    headers: Dict[bytes, bytes] = {}
+    header_field = header_value = b''
+    name = None
+    value = None  # bytearray do campo de texto atual; None quando a parte atual é o arquivo
+    skipping = False
+
+    async def handle(kind: str, data: bytes):
+        nonlocal filename, file_received, headers, header_field, header_value, name, value, skipping
+        if kind == 'begin':
+            headers, header_field, header_value = {}, b'', b''
+        elif kind == 'header_field':
+            header_field += data
+        elif kind == 'header_value':
+            header_value += data
+        elif kind == 'header_end':
+            headers[header_field.lower()] = header_value
+            header_field, header_value = b'', b''
+        elif kind == 'headers_finished':
+            _, options = parse_options_header(headers.get(b'content-disposition', b''))
+            name = options.get(b'name', b'').decode(errors='replace')
+            part_filename = options.get(b'filename')
+            skipping = False
+            if part_filename is None:
+                value = bytearray()
+            elif file_received:
+                # Apenas um arquivo por solicitação; os demais são descartados
+                logger.warning(f"Upload {writer.request_id}: arquivo extra '{name}' ignorado")
+                value, skipping = None, True
+            else:
+                value = None
+                filename = part_filename.decode(errors='replace')
+                file_received = True
+        elif kind == 'data':
+            if skipping:
+                return
+            if value is None:
+                await writer.write(data)
+            else:
+                value.extend(data)
+                if len(value) > MAX_FIELD_BYTES:
+                    raise UploadError(f"Campo '{name}' excede {MAX_FIELD_BYTES} bytes")
+        elif kind == 'end':
+            if value is not None and not skipping:
+                fields[name] = value.decode(errors='replace')
+
+    async for chunk in chunks:
+        parser.write(chunk)
+        for kind, data in events:
+            await handle(kind, data)
+        events.clear()
+    parser.finalize()
+    for kind, data in events:
+        await handle(kind, data)
+    await writer.close()
+
+    if not file_received:
+        raise UploadError("Nenhum arquivo encontrado no multipart/form-data")
+    return fields, filename
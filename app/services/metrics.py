@@ -0,0 +1,73 @@
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from app.services.scheduler import LARGE_LANE, NORMAL_LANE
+
+# Etapas longas (download e inferência de vídeos de horas) precisam de buckets até 2 h
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+
+STAGE_DURATION = Histogram(
+    'transcricao_stage_duration_seconds',
+    'Duração de cada etapa do processamento',
+    ['stage'],  # download, extract, transcribe, webhook
+    buckets=STAGE_BUCKETS
+)
+DOWNLOADED_BYTES = Counter(
+    'transcricao_downloaded_bytes_total',
+    'Bytes baixados do Google Drive'
+)
+AUDIO_SECONDS = Counter(
+    'transcricao_audio_seconds_total',
+    'Segundos de áudio transcritos'
+)
+REAL_TIME_FACTOR = Histogram(
+    'transcricao_real_time_factor',
+    'Tempo de transcrição dividido pela duração do áudio',
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10)
+)
+JOBS_FINISHED = Counter(
+    'transcricao_jobs_finished_total',
+    'Solicitações finalizadas por status',
+    ['status']
+)
+QUEUE_DEPTH = Gauge(
+    'transcricao_queue_depth',
+    'Solicitações aguardando na fila',
+    ['lane']
+)
+ACTIVE_WORKERS = Gauge(
+    'transcricao_active_workers',
+    'Workers processando uma solicitação'
+)
+MEMORY_USAGE = Gauge(
+    'transcricao_memory_usage_megabytes',
+    'Memória em uso pelo container (controle de admissão)'
+)
+MODEL_LOAD_SECONDS = Histogram(
+    'transcricao_model_load_seconds',
+    'Tempo de carregamento de cada modelo',
+    ['model'],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+)
+CACHE_REQUESTS = Counter(
+    'transcricao_cache_requests_total',
+    'Consultas aos caches por resultado',
+    ['cache', 'result']  # result: hit ou miss
+)
+WEBHOOK_DELIVERIES = Counter(
+    'transcricao_webhook_deliveries_total',
+    'Tentativas de entrega de webhook por resultado',
+    ['result']  # delivered, retry ou dead
+)
+
+# Content-Type do texto gerado por render()
+MEDIA_TYPE = CONTENT_TYPE_LATEST
+
+def render(queue_stats: dict) -> bytes:
+    """Atualiza os gauges a partir do estado atual da fila e gera o texto no formato do Prometheus"""
+    pending_by_lane = queue_stats.get('pending_by_lane', {})
+    for lane in (NORMAL_LANE, LARGE_LANE):
+        QUEUE_DEPTH.labels(lane).set(pending_by_lane.get(lane, 0))
+    ACTIVE_WORKERS.set(queue_stats.get('active', 0))
+    memory = queue_stats.get('memory') or {}
+    if memory.get('current_mb') is not None:
+        MEMORY_USAGE.set(memory['current_mb'])
+    return generate_latest()
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Memória aproximada (MB) ocupada por cada modelo Whisper carregado em FP32
+MODEL_MEMORY_MB: Dict[str, int] = {
+    'tiny': 150,
+    'base': 300,
+    'small': 1000,
+    'medium': 3000,
+    'large': 6000,
+}
+
+# Pesos int8 do CTranslate2 ocupam cerca de um quarto dos pesos FP32
+BACKEND_MEMORY_FACTOR: Dict[str, float] = {
+    'whisper': 1.0,
+    'faster-whisper': 0.25,
+}
+
+def _load_whisper(model_name: str):
+    import whisper
+    return whisper.load_model(model_name)
+
+def _load_faster_whisper(model_name: str):
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as e:
+        raise RuntimeError("O backend 'faster-whisper' requer o pacote faster-whisper instalado") from e
+    return WhisperModel(
+        model_name,
+        device="cpu",
+        compute_type=settings.CT2_COMPUTE_TYPE,
+        cpu_threads=settings.CT2_CPU_THREADS
+    )
+
+LOADERS = {
+    'whisper': _load_whisper,
+    'faster-whisper': _load_faster_whisper,
+}
+
+class ModelRegistry:
+    """
+    Registro único (por processo) dos modelos carregados, por backend.
+    Cada modelo é carregado uma vez e mantido em memória; quando o orçamento
+    de memória é excedido, os modelos menos usados recentemente são descartados.
+    """
+    _instance = None
+    _models: "OrderedDict[str, object]" = OrderedDict()
+    _loads: List[Tuple[str, float]] = []  # Carregamentos ainda não informados ao processo da API
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ModelRegistry, cls).__new__(cls)
+        return cls._instance
+
+    @staticmethod
+    def estimate_memory_mb(model_name: str, backend: str = 'whisper') -> int:
+        """Estima a memória ocupada por um modelo"""
+        base_name = model_name.split('.')[0].split('-')[0]
+        size = MODEL_MEMORY_MB.get(base_name, MODEL_MEMORY_MB['large'])
+        return int(size * BACKEND_MEMORY_FACTOR.get(backend, 1.0))
+
+    def get_model(self, model_name: Optional[str] = None, backend: Optional[str] = None):
+        """Retorna o modelo solicitado, carregando-o na primeira utilização"""
+        model_name = model_name or settings.WHISPER_MODEL
+        backend = backend or settings.INFERENCE_BACKEND
+        key = f"{backend}:{model_name}"
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+
+            self._evict_for(key)
+            logger.info(f"Carregando modelo '{key}'")
+            started = time.monotonic()
+            model = LOADERS[backend](model_name)
+            seconds = time.monotonic() - started
+            self._loads.append((key, seconds))
+            logger.info(f"Modelo '{key}' carregado em {seconds:.1f}s")
+            self._models[key] = model
+            return model
+
+    def preload(self):
+        """Carrega os modelos configurados para ficarem residentes desde a inicialização"""
+        models = settings.WHISPER_PRELOAD_MODELS or [settings.WHISPER_MODEL]
+        for entry in models:
+            # Aceita "modelo" (backend padrão) ou "backend:modelo"
+            backend, _, model_name = entry.rpartition(':')
+            try:
+                self.get_model(model_name, backend or None)
+            except Exception as e:
+                logger.error(f"Erro ao pré-carregar modelo '{entry}': {e}")
+
+    def loaded_models(self) -> list:
+        with self._lock:
+            return list(self._models.keys())
+
+    def take_loads(self) -> List[Tuple[str, float]]:
+        """Retorna (modelo, segundos) dos carregamentos desde a última chamada, inclusive recarregamentos"""
+        with self._lock:
+            loads = list(self._loads)
+            self._loads.clear()
+            return loads
+
+    def _estimate_key_mb(self, key: str) -> int:
+        backend, model_name = key.split(':', 1)
+        return self.estimate_memory_mb(model_name, backend)
+
+    def _evict_for(self, key: str):
+        """Descarta modelos (LRU) até que o novo modelo caiba no orçamento de memória"""
+        budget = settings.WHISPER_MODEL_MEMORY_BUDGET_MB
+        if not budget:
+            return
+        required = self._estimate_key_mb(key)
+        while self._models:
+            in_use = sum(self._estimate_key_mb(name) for name in self._models)
+            if in_use + required <= budget:
+                break
+            evicted, _ = self._models.popitem(last=False)
+            logger.info(f"Modelo '{evicted}' descartado para liberar memória")
@@ -1,46 +1,441 @@
-from typing import Dict, Optional
-from datetime import datetime
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+from collections import deque
+from datetime import datetime, timedelta
 import asyncio
-import aiohttp
-import json
 import logging
+from app.core.config import settings
+from app.services import metrics
+from app.services.job_store import FINAL_STATUSES, JobStore
+from app.services.worker_pool import WorkerPool
+from app.services.webhook_dispatcher import WebhookDispatcher
+from app.services.admission import AdmissionController
+from app.services.scheduler import LARGE_LANE, NORMAL_LANE, client_weight, estimate_duration_seconds, lane_for, order_pending, system_virtual_time
 
 logger = logging.getLogger(__name__)
 
+JobHandler = Callable[..., Awaitable[object]]
+
 class QueueManager:
     _instance = None
     _queue: Dict[str, dict] = {}
-    _processing = False
+    _pending: Deque[str] = deque()
+    _workers: List[asyncio.Task] = []
+    _lane_workers: Dict[str, int] = {}
+    _janitor: Optional[asyncio.Task] = None
+    _active = 0
+    _store = JobStore()
+    _subscribers: Dict[str, List[asyncio.Queue]] = {}
+    _batches: Dict[str, dict] = {}
+    _served: Dict[str, float] = {}  # Segundos de mídia já atendidos por cliente (política fair)
+    _outstanding: Dict[str, int] = {}  # Solicitações pendentes ou em execução por cliente
+    _virtual_time = 0.0  # Tempo virtual do sistema (política fair)
+    _rtf_estimate: Optional[float] = None  # Tempo de processamento / duração da mídia (média móvel)
     _lock = asyncio.Lock()
+    _job_available = asyncio.Condition(_lock)
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(QueueManager, cls).__new__(cls)
         return cls._instance
 
-    async def add_to_queue(self, request_id: str, file_id: str, webhook_url: str) -> bool:
-        """Adiciona uma solicitação à fila. Retorna False se já houver uma solicitação em processamento."""
+    async def add_to_queue(self, request_id: str, file_id: str, webhook_url: str, language: Optional[str] = None, client_id: str = 'default', **options) -> bool:
+        """
+        Adiciona uma solicitação à fila. Retorna False se a fila estiver cheia.
+        options são repassadas como argumentos nomeados ao handler dos workers;
+        options['file_metadata'] (se houver) define duração e fila de agendamento.
+        """
         async with self._lock:
-            if self._processing:
-                logger.info(f"Requisição {request_id} rejeitada: já existe processamento em andamento")
-                await self.send_webhook_response(
-                    request_id,
-                    error="Já existe uma solicitação em processamento. Tente novamente mais tarde."
-                )
+            if len(self._pending) >= settings.QUEUE_MAX_SIZE:
+                logger.info(f"Requisição {request_id} rejeitada: fila cheia ({len(self._pending)} pendentes)")
                 return False
+            self._enqueue_locked(request_id, file_id, webhook_url, language, options, client_id)
+        await self._persist(request_id)
+        return True
 
-            logger.info(f"Adicionando requisição {request_id} à fila")
-            self._queue[request_id] = {
-                'file_id': file_id,
+    async def add_batch(self, batch_id: str, jobs: List[dict], webhook_url: str, aggregate_webhook: bool = False, client_id: str = 'default') -> bool:
+        """
+        Adiciona todas as solicitações de um lote de uma vez. Retorna False (sem
+        enfileirar nada) se a fila não comportar o lote inteiro.
+        jobs: [{'request_id', 'file_id', 'language', **options}]
+        """
+        async with self._lock:
+            if len(self._pending) + len(jobs) > settings.QUEUE_MAX_SIZE:
+                logger.info(f"Lote {batch_id} rejeitado: {len(jobs)} arquivos não cabem na fila ({len(self._pending)} pendentes)")
+                return False
+            for job in jobs:
+                job = dict(job)
+                self._enqueue_locked(
+                    job.pop('request_id'),
+                    job.pop('file_id'),
+                    # No modo agregado, o webhook é enviado apenas quando o lote termina
+                    None if aggregate_webhook else webhook_url,
+                    job.pop('language', None),
+                    {**job, 'batch_id': batch_id},
+                    client_id
+                )
+            self._batches[batch_id] = {
+                'request_ids': [job['request_id'] for job in jobs],
                 'webhook_url': webhook_url,
-                'status': 'pending',
-                'stage': 'queued',
+                'aggregate_webhook': aggregate_webhook,
                 'created_at': datetime.now().isoformat(),
-                'error': None,
-                'result': None
+                'completed_at': None
             }
-            self._processing = True
-            return True
+        for job in jobs:
+            await self._persist(job['request_id'])
+        await WorkerPool().run_io(self._store.save_batch, batch_id, dict(self._batches[batch_id]))
+        return True
+
+    def _enqueue_locked(self, request_id: str, file_id: str, webhook_url: Optional[str], language: Optional[str], options: dict, client_id: str = 'default'):
+        file_metadata = options.get('file_metadata')
+        duration = estimate_duration_seconds(file_metadata)
+        size = int((file_metadata or {}).get('size') or 0)
+        lane = lane_for(duration, size)
+        logger.info(f"Adicionando requisição {request_id} à fila '{lane}' ({duration:.0f}s de mídia)")
+        self._queue[request_id] = {
+            'file_id': file_id,
+            'webhook_url': webhook_url,
+            'language': language,
+            'options': options,
+            'status': 'pending',
+            'stage': 'queued',
+            'created_at': datetime.now().isoformat(),
+            'error': None,
+            'result': None,
+            'client_id': client_id,
+            'duration_seconds': duration,
+            'size_bytes': size,
+            'lane': lane
+        }
+        self._add_outstanding(client_id)
+        self._pending.append(request_id)
+        self._job_available.notify_all()
+
+    def _add_outstanding(self, client_id: str):
+        """
+        Registra uma solicitação do cliente. Um cliente que volta a ter
+        solicitações começa no tempo virtual do sistema, como em WFQ.
+        """
+        if not self._outstanding.get(client_id):
+            virtual_time = self._advance_virtual_time()
+            self._served[client_id] = max(self._served.get(client_id, 0.0), virtual_time * client_weight(client_id))
+        self._outstanding[client_id] = self._outstanding.get(client_id, 0) + 1
+
+    def _remove_outstanding(self, client_id: str):
+        remaining = self._outstanding.get(client_id, 0) - 1
+        if remaining > 0:
+            self._outstanding[client_id] = remaining
+        else:
+            self._outstanding.pop(client_id, None)
+
+    def _advance_virtual_time(self) -> float:
+        """Atualiza o tempo virtual do sistema e descarta o histórico dos clientes ociosos já alcançados"""
+        QueueManager._virtual_time = system_virtual_time(self._served, list(self._outstanding), self._virtual_time)
+        for client_id in [client_id for client_id in self._served if client_id not in self._outstanding]:
+            # Ao voltar, o cliente recomeçaria no tempo virtual do sistema de qualquer forma
+            if self._served[client_id] / client_weight(client_id) <= self._virtual_time:
+                del self._served[client_id]
+        return self._virtual_time
+
+    def get_batch_status(self, batch_id: str) -> Optional[dict]:
+        """Resumo do lote: contagem por status, percentual concluído e itens"""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return None
+        items = []
+        counts: Dict[str, int] = {}
+        for request_id in batch['request_ids']:
+            request_data = self._queue.get(request_id, {})
+            status = request_data.get('status', 'unknown')
+            counts[status] = counts.get(status, 0) + 1
+            items.append({
+                'request_id': request_id,
+                'file_id': request_data.get('file_id'),
+                'status': status,
+                'stage': request_data.get('stage'),
+                'error': request_data.get('error')
+            })
+        finished = sum(count for status, count in counts.items() if status in FINAL_STATUSES)
+        total = len(batch['request_ids'])
+        return {
+            'batch_id': batch_id,
+            'total': total,
+            'finished': finished,
+            'percentage': int(finished / total * 100) if total else 100,
+            'counts': counts,
+            'created_at': batch['created_at'],
+            'completed_at': batch['completed_at'],
+            'items': items
+        }
+
+    async def _on_job_finished(self, request_id: str):
+        """Ao finalizar uma solicitação de lote, verifica se o lote inteiro terminou"""
+        batch_id = self._queue[request_id].get('options', {}).get('batch_id')
+        batch = self._batches.get(batch_id) if batch_id else None
+        if batch is None or batch['completed_at']:
+            return
+        if any(self._queue.get(rid, {}).get('status') not in FINAL_STATUSES for rid in batch['request_ids']):
+            return
+
+        batch['completed_at'] = datetime.now().isoformat()
+        await WorkerPool().run_io(self._store.save_batch, batch_id, dict(batch))
+        logger.info(f"Lote {batch_id} concluído")
+        if batch['aggregate_webhook'] and batch['webhook_url']:
+            results = []
+            for rid in batch['request_ids']:
+                request_data = self._queue.get(rid, {})
+                results.append({
+                    'request_id': rid,
+                    'file_id': request_data.get('file_id'),
+                    'status': request_data.get('status'),
+                    'transcription': request_data.get('result'),
+                    'error': request_data.get('error')
+                })
+            await WebhookDispatcher().enqueue(batch_id, batch['webhook_url'], {
+                'batch_id': batch_id,
+                'status': 'completed',
+                'results': results
+            })
+
+    async def restore_jobs(self):
+        """Recoloca na fila as solicitações pendentes ou interrompidas por uma reinicialização"""
+        jobs = await WorkerPool().run_io(self._store.load_unfinished)
+        async with self._lock:
+            for request_data in jobs:
+                request_id = request_data.pop('request_id')
+                if request_id in self._queue:
+                    continue
+                request_data.update({'status': 'pending', 'stage': 'queued', 'segments': []})
+                request_data.setdefault('client_id', 'default')
+                request_data.setdefault('duration_seconds', settings.SCHEDULER_DEFAULT_DURATION_SECONDS)
+                request_data.setdefault('lane', NORMAL_LANE)
+                self._queue[request_id] = request_data
+                self._add_outstanding(request_data['client_id'])
+                self._pending.append(request_id)
+            self._job_available.notify_all()
+        batches = await WorkerPool().run_io(self._store.load_unfinished_batches)
+        for batch in batches:
+            self._batches[batch.pop('batch_id')] = batch
+            # Solicitações do lote já finalizadas são necessárias para detectar o fim do lote
+            missing = [rid for rid in batch['request_ids'] if rid not in self._queue]
+            for request_data in await WorkerPool().run_io(self._store.load_jobs, missing):
+                self._queue[request_data.pop('request_id')] = request_data
+        if jobs:
+            logger.info(f"{len(jobs)} solicitação(ões) restaurada(s) do armazenamento")
+
+    async def _persist(self, request_id: str):
+        request_data = self._queue.get(request_id)
+        if request_data is None:
+            return
+        try:
+            await WorkerPool().run_io(self._store.save, request_id, dict(request_data))
+        except Exception as e:
+            logger.error(f"Erro ao persistir requisição {request_id}: {e}")
+
+    def start_workers(self, handler: JobHandler, workers: Optional[int] = None):
+        """
+        Inicia os workers que consomem a fila conforme SCHEDULER_POLICY. Se
+        LARGE_LANE_WORKERS > 0, arquivos grandes têm workers exclusivos.
+        """
+        if self._workers:
+            return
+        QueueManager._lane_workers = {
+            NORMAL_LANE: workers or settings.QUEUE_WORKERS,
+            LARGE_LANE: settings.LARGE_LANE_WORKERS
+        }
+        index = 0
+        for lane, count in self._lane_workers.items():
+            for _ in range(count):
+                self._workers.append(asyncio.create_task(self._worker(index, handler, lane)))
+                index += 1
+        QueueManager._janitor = asyncio.create_task(self._prune_loop())
+        logger.info(f"{index} worker(s) de transcrição iniciado(s): {self._lane_workers}")
+
+    async def stop_workers(self):
+        """Cancela os workers em execução"""
+        tasks = self._workers + ([self._janitor] if self._janitor else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers.clear()
+        QueueManager._janitor = None
+
+    async def _prune_loop(self):
+        """Remove periodicamente as solicitações finalizadas há mais de JOB_RETENTION_SECONDS"""
+        while True:
+            await asyncio.sleep(settings.JOB_PRUNE_INTERVAL_SECONDS)
+            try:
+                await self.prune_finished()
+            except Exception as e:
+                logger.error(f"Erro ao remover solicitações antigas: {e}")
+
+    async def prune_finished(self):
+        retention = settings.JOB_RETENTION_SECONDS
+        cutoff = (datetime.now() - timedelta(seconds=retention)).isoformat()
+        expired = [
+            request_id for request_id, request_data in self._queue.items()
+            if request_data['status'] in FINAL_STATUSES
+            and request_data.get('updated_at', request_data['created_at']) < cutoff
+        ]
+        for request_id in expired:
+            self._queue.pop(request_id, None)
+        for batch_id, batch in list(self._batches.items()):
+            if batch['completed_at'] and batch['completed_at'] < cutoff:
+                self._batches.pop(batch_id, None)
+        removed = await WorkerPool().run_io(self._store.prune, retention)
+        if expired or removed:
+            logger.info(f"{max(len(expired), len(removed))} solicitação(ões) finalizada(s) removida(s)")
+
+    async def _worker(self, index: int, handler: JobHandler, lane: str = NORMAL_LANE):
+        while True:
+            async with self._job_available:
+                request_id = self._admit_next(lane)
+                while request_id is None:
+                    try:
+                        # A memória também é liberada fora da fila (GC, FFmpeg encerrado)
+                        await asyncio.wait_for(self._job_available.wait(), settings.ADMISSION_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    request_id = self._admit_next(lane)
+                self._pending.remove(request_id)
+                self._active += 1
+                request_data = self._queue.get(request_id, {})
+                request_data['started_at'] = datetime.now().isoformat()
+                client_id = request_data.get('client_id', 'default')
+                self._served[client_id] = self._served.get(client_id, 0.0) + request_data.get('duration_seconds', 0.0)
+            logger.info(f"Worker {index} ({lane}) iniciando requisição {request_id}")
+            try:
+                await handler(
+                    request_id,
+                    request_data.get('file_id'),
+                    request_data.get('webhook_url'),
+                    request_data.get('language'),
+                    **request_data.get('options', {})
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Worker {index} falhou na requisição {request_id}: {e}")
+            finally:
+                async with self._job_available:
+                    self._active -= 1
+                    self._remove_outstanding(client_id)
+                    AdmissionController().release(request_id)
+                    # Jobs aguardando memória podem caber agora
+                    self._job_available.notify_all()
+                self._learn_rtf(request_data)
+
+    def _admit_next(self, lane: str) -> Optional[str]:
+        """
+        Próxima solicitação da fila, se houver memória para ela. Apenas a primeira
+        na ordem da política é considerada, para que arquivos grandes não sejam
+        ultrapassados indefinidamente pelos menores.
+        """
+        ordered = self._ordered_pending(lane)
+        if not ordered:
+            return None
+        request_id = ordered[0]
+        request_data = self._queue[request_id]
+        estimate = AdmissionController.estimate_job_mb(
+            request_data.get('duration_seconds', settings.SCHEDULER_DEFAULT_DURATION_SECONDS),
+            request_data.get('options', {}).get('backend')
+        )
+        if not AdmissionController().try_admit(request_id, estimate):
+            if request_data.get('stage') != 'waiting_memory':
+                logger.info(f"Requisição {request_id} aguardando memória ({estimate:.0f} MB estimados)")
+                request_data['stage'] = 'waiting_memory'
+            return None
+        request_data['stage'] = 'queued'
+        request_data['memory_estimate_mb'] = round(estimate, 1)
+        return request_id
+
+    def _ordered_pending(self, lane: str) -> List[str]:
+        """IDs pendentes da fila (lane) na ordem em que serão atendidos"""
+        jobs = []
+        for request_id in self._pending:
+            request_data = self._queue.get(request_id, {})
+            if request_data.get('lane', NORMAL_LANE) == lane:
+                jobs.append({
+                    'request_id': request_id,
+                    'client_id': request_data.get('client_id', 'default'),
+                    'duration_seconds': request_data.get('duration_seconds', settings.SCHEDULER_DEFAULT_DURATION_SECONDS)
+                })
+        return [job['request_id'] for job in order_pending(jobs, self._served, self._advance_virtual_time())]
+
+    @property
+    def rtf_estimate(self) -> float:
+        return self._rtf_estimate or settings.SCHEDULER_INITIAL_RTF
+
+    def _learn_rtf(self, request_data: dict):
+        """Atualiza a média móvel do tempo de processamento por segundo de mídia"""
+        started_at = request_data.get('started_at')
+        duration = request_data.get('duration_seconds')
+        if request_data.get('status') != 'completed' or not started_at or not duration:
+            return
+        elapsed = (datetime.now() - datetime.fromisoformat(started_at)).total_seconds()
+        # Respostas do cache terminam quase instantaneamente e distorceriam a estimativa
+        if elapsed < settings.SCHEDULER_MIN_LEARN_SECONDS:
+            return
+        rtf = elapsed / duration
+        QueueManager._rtf_estimate = rtf if self._rtf_estimate is None else 0.8 * self._rtf_estimate + 0.2 * rtf
+
+    def estimate_completion(self, request_id: str) -> Optional[str]:
+        """Horário estimado de conclusão (ISO), considerando os jobs à frente na mesma fila"""
+        request_data = self._queue.get(request_id)
+        if request_data is None or request_data['status'] in FINAL_STATUSES:
+            return None
+        now = datetime.now()
+        rtf = self.rtf_estimate
+        own = request_data.get('duration_seconds', settings.SCHEDULER_DEFAULT_DURATION_SECONDS) * rtf
+
+        if request_data.get('started_at') and request_id not in self._pending:
+            finish = datetime.fromisoformat(request_data['started_at']) + timedelta(seconds=own)
+            return max(finish, now).isoformat()
+
+        lane = request_data.get('lane', NORMAL_LANE)
+        workers = max(1, self._lane_workers.get(lane) or settings.QUEUE_WORKERS)
+        backlog = 0.0
+        # Tempo restante dos jobs em andamento na mesma fila
+        for other in self._queue.values():
+            if other.get('lane', NORMAL_LANE) != lane or other['status'] != 'processing' or not other.get('started_at'):
+                continue
+            expected = other.get('duration_seconds', 0.0) * rtf
+            elapsed = (now - datetime.fromisoformat(other['started_at'])).total_seconds()
+            backlog += max(0.0, expected - elapsed)
+        for other_id in self._ordered_pending(lane):
+            if other_id == request_id:
+                break
+            backlog += self._queue[other_id].get('duration_seconds', 0.0) * rtf
+        return (now + timedelta(seconds=backlog / workers + own)).isoformat()
+
+    def get_queue_position(self, request_id: str) -> Optional[int]:
+        """Retorna a posição (a partir de 1) da requisição na sua fila, ou None se não estiver aguardando"""
+        request_data = self._queue.get(request_id)
+        if request_data is None or request_id not in self._pending:
+            return None
+        ordered = self._ordered_pending(request_data.get('lane', NORMAL_LANE))
+        return ordered.index(request_id) + 1 if request_id in ordered else None
+
+    def get_unfinished_ids(self) -> Set[str]:
+        """Solicitações ainda não finalizadas (aguardando ou em processamento)"""
+        return {
+            request_id for request_id, request_data in self._queue.items()
+            if request_data['status'] not in FINAL_STATUSES
+        }
+
+    def get_queue_stats(self) -> dict:
+        lanes: Dict[str, int] = {}
+        for request_id in self._pending:
+            lane = self._queue.get(request_id, {}).get('lane', NORMAL_LANE)
+            lanes[lane] = lanes.get(lane, 0) + 1
+        return {
+            'pending': len(self._pending),
+            'pending_by_lane': lanes,
+            'active': self._active,
+            'workers': len(self._workers),
+            'max_size': settings.QUEUE_MAX_SIZE,
+            'policy': settings.SCHEDULER_POLICY,
+            'memory': AdmissionController().get_stats()
+        }
 
     async def update_status(self, request_id: str, status: str, stage: str, progress: Optional[dict] = None, error: Optional[str] = None, result: Optional[str] = None):
         """
@@ -48,6 +443,7 @@ class QueueManager:
         progress é usado apenas para logs no console, não é enviado no webhook
         """
         if request_id in self._queue:
+            previous = (self._queue[request_id]['status'], self._queue[request_id]['stage'])
             # Atualizar dados básicos
             self._queue[request_id].update({
                 'status': status,
@@ -55,27 +451,66 @@ class QueueManager:
                 'updated_at': datetime.now().isoformat()
             })
             
-            # Registrar progresso no log (não vai para o webhook)
+            # Registrar progresso no log e para consulta de status (não vai para o webhook)
             if progress:
+                self._queue[request_id]['progress'] = progress
                 logger.info(f"Requisição {request_id}: {stage} - {progress['percentage']}% - {progress['details']}")
             
             if error:
                 self._queue[request_id]['error'] = error
                 logger.error(f"Erro na requisição {request_id}: {error}")
-                # Enviar webhook imediatamente em caso de erro
-                await self.send_webhook_response(request_id)
             
-            if result:
+            if result is not None:
                 self._queue[request_id]['result'] = result
                 logger.info(f"Requisição {request_id} concluída com sucesso")
-                # Enviar webhook com o resultado
+
+            # Apenas transições de status/etapa são persistidas, não cada atualização de progresso
+            if error or result is not None or previous != (status, stage):
+                await self._persist(request_id)
+
+            self._publish(request_id, {
+                'type': 'status',
+                'status': status,
+                'stage': stage,
+                'progress': progress,
+                'error': error
+            })
+
+            if error or result is not None:
+                # Enviar webhook imediatamente com o erro ou o resultado
                 await self.send_webhook_response(request_id)
 
-            # Se o status for final (completed ou error), libera o processamento
-            if status in ['completed', 'error']:
-                async with self._lock:
-                    self._processing = False
-                    logger.info(f"Processamento da requisição {request_id} finalizado. Fila liberada.")
+            if status in FINAL_STATUSES:
+                if previous[0] not in FINAL_STATUSES:
+                    metrics.JOBS_FINISHED.labels(status).inc()
+                await self._on_job_finished(request_id)
+
+    def add_segment(self, request_id: str, segment: dict):
+        """Registra um segmento recém-transcrito e o envia a quem acompanha a solicitação"""
+        request_data = self._queue.get(request_id)
+        if request_data is None:
+            return
+        segments = request_data.setdefault('segments', [])
+        event = {'type': 'segment', 'index': len(segments), **segment}
+        segments.append(segment)
+        self._publish(request_id, event)
+
+    def subscribe(self, request_id: str) -> asyncio.Queue:
+        """Retorna uma fila que recebe os eventos (status e segmentos) da solicitação"""
+        events: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(request_id, []).append(events)
+        return events
+
+    def unsubscribe(self, request_id: str, events: asyncio.Queue):
+        subscribers = self._subscribers.get(request_id, [])
+        if events in subscribers:
+            subscribers.remove(events)
+        if not subscribers:
+            self._subscribers.pop(request_id, None)
+
+    def _publish(self, request_id: str, event: dict):
+        for events in self._subscribers.get(request_id, []):
+            events.put_nowait(event)
 
     async def send_webhook_response(self, request_id: str, login_url: Optional[str] = None, error: Optional[str] = None):
         """Envia apenas erros, URL de login ou resultado final para o webhook"""
@@ -84,7 +519,8 @@ class QueueManager:
 
         request_data = self._queue[request_id]
         response_data = {
-            'request_id': request_id
+            'request_id': request_id,
+            'status': request_data['status']
         }
 
         # Adiciona URL de login se necessário
@@ -96,26 +532,31 @@ class QueueManager:
         elif error or request_data.get('error'):
             response_data['error'] = error or request_data['error']
 
-        # Adiciona resultado se disponível
-        elif request_data.get('result'):
-            response_data['transcription'] = request_data['result']
+        # Adiciona resultado se disponível (vazio quando o VAD não encontra fala)
+        elif request_data['status'] == 'completed':
+            response_data['transcription'] = request_data.get('result') or ''
+            vad_stats = (request_data.get('progress') or {}).get('vad')
+            if vad_stats:
+                response_data['vad'] = vad_stats
 
         # Se não houver login_url, erro ou resultado, não envia webhook
-        if not (login_url or error or request_data.get('error') or request_data.get('result')):
+        if 'login_url' not in response_data and 'error' not in response_data and 'transcription' not in response_data:
             return
 
         try:
             webhook_url = request_data.get('webhook_url')
             if webhook_url:
-                logger.info(f"Enviando resposta webhook para requisição {request_id}")
-                async with aiohttp.ClientSession() as session:
-                    await session.post(
-                        webhook_url,
-                        json=response_data,
-                        headers={'Content-Type': 'application/json'}
-                    )
+                # A entrega (com novas tentativas) é feita pelo outbox durável
+                await WebhookDispatcher().enqueue(request_id, webhook_url, response_data)
         except Exception as e:
-            logger.error(f"Erro ao enviar webhook para requisição {request_id}: {e}")
+            logger.error(f"Erro ao enfileirar webhook para requisição {request_id}: {e}")
 
     def get_request_status(self, request_id: str) -> Optional[dict]:
-        return self._queue.get(request_id)
+        request_data = self._queue.get(request_id)
+        if request_data is None:
+            return None
+        return {
+            **request_data,
+            'queue_position': self.get_queue_position(request_id),
+            'estimated_completion_at': self.estimate_completion(request_id)
+        }
@@ -0,0 +1,83 @@
+from typing import Dict, Iterable, List, Optional
+import heapq
+from app.core.config import settings
+
+NORMAL_LANE = 'normal'
+LARGE_LANE = 'large'
+
+def media_duration_seconds(file_metadata: Optional[dict]) -> Optional[float]:
+    """Duração do vídeo informada pelo Drive (videoMediaMetadata.durationMillis), se houver"""
+    duration_ms = ((file_metadata or {}).get('videoMediaMetadata') or {}).get('durationMillis')
+    if duration_ms:
+        return int(duration_ms) / 1000
+    return None
+
+def estimate_duration_seconds(file_metadata: Optional[dict]) -> float:
+    """Duração do vídeo; sem metadados de mídia, estimada pelo tamanho (ou o valor padrão)"""
+    duration = media_duration_seconds(file_metadata)
+    if duration:
+        return duration
+    size = int((file_metadata or {}).get('size') or 0)
+    if size:
+        return size * 8 / settings.SCHEDULER_ASSUMED_BITRATE
+    return settings.SCHEDULER_DEFAULT_DURATION_SECONDS
+
+def lane_for(duration_seconds: float, size_bytes: int) -> str:
+    """Arquivos acima dos limites vão para uma fila separada, para não bloquear os curtos"""
+    if not settings.LARGE_LANE_WORKERS:
+        return NORMAL_LANE
+    if duration_seconds > settings.LARGE_JOB_DURATION_SECONDS:
+        return LARGE_LANE
+    if settings.LARGE_JOB_SIZE_BYTES and size_bytes > settings.LARGE_JOB_SIZE_BYTES:
+        return LARGE_LANE
+    return NORMAL_LANE
+
+def client_weight(client_id: str) -> float:
+    return settings.SCHEDULER_CLIENT_WEIGHTS.get(client_id, 1.0)
+
+def system_virtual_time(served: Dict[str, float], backlogged: Iterable[str], current: float = 0.0) -> float:
+    """
+    Tempo virtual do sistema (WFQ): o menor tempo virtual (atendido / peso) entre
+    os clientes com solicitações pendentes ou em execução. Nunca diminui; sem
+    clientes ativos, o valor atual é mantido.
+    """
+    times = [served.get(client_id, 0.0) / client_weight(client_id) for client_id in backlogged]
+    return max(current, min(times)) if times else current
+
+def order_pending(jobs: List[dict], served: Dict[str, float], virtual_time: float = 0.0) -> List[dict]:
+    """
+    Ordena as solicitações pendentes (já na ordem de chegada) conforme SCHEDULER_POLICY:
+    - fifo: ordem de chegada;
+    - sjf: menor duração primeiro;
+    - fair: divide o tempo de processamento entre clientes (API keys) na proporção
+      dos pesos em SCHEDULER_CLIENT_WEIGHTS, com menor duração primeiro dentro de cada cliente.
+      O tempo virtual de cada cliente parte de virtual_time (tempo virtual do
+      sistema), no mínimo: um cliente novo ou que ficou ocioso não passa à frente
+      dos demais até igualar todo o histórico deles.
+    Cada job precisa de 'client_id' e 'duration_seconds'.
+    """
+    policy = settings.SCHEDULER_POLICY
+    if policy == 'sjf':
+        return sorted(jobs, key=lambda job: job['duration_seconds'])
+    if policy != 'fair':
+        return list(jobs)
+
+    per_client: Dict[str, List[dict]] = {}
+    for job in jobs:
+        per_client.setdefault(job['client_id'], []).append(job)
+    for client_jobs in per_client.values():
+        client_jobs.sort(key=lambda job: job['duration_seconds'])
+
+    # Tempo virtual: trabalho já atendido dividido pelo peso do cliente
+    heap = []
+    for order, client_id in enumerate(per_client):
+        start = max(served.get(client_id, 0.0) / client_weight(client_id), virtual_time)
+        heapq.heappush(heap, (start, order, client_id, 0))
+    ordered = []
+    while heap:
+        client_time, order, client_id, position = heapq.heappop(heap)
+        job = per_client[client_id][position]
+        ordered.append(job)
+        if position + 1 < len(per_client[client_id]):
+            heapq.heappush(heap, (client_time + job['duration_seconds'] / client_weight(client_id), order, client_id, position + 1))
+    return ordered
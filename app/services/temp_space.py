@@ -0,0 +1,244 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set
+import asyncio
+import os
+import shutil
+import threading
+import time
+import uuid
+import logging
+from app.core.config import settings
+from app.services.scheduler import estimate_duration_seconds
+from app.services.transcription import SAMPLE_RATE
+from app.services.worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+class TempSpaceError(Exception):
+    """Não há espaço em disco (ou cota) suficiente para a solicitação"""
+
+def directory_size(path: Path) -> int:
+    """Bytes ocupados pelos arquivos sob path"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _last_modified(path: Path) -> float:
+    """mtime mais recente de path e do seu conteúdo (arquivos em escrita atualizam apenas o próprio mtime)"""
+    latest = path.stat().st_mtime
+    if path.is_dir():
+        for root, dirs, files in os.walk(path):
+            for name in dirs + files:
+                try:
+                    latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+                except OSError:
+                    pass
+    return latest
+
+def _is_workspace_name(name: str) -> bool:
+    """Workspaces têm o request_id (UUID) como nome; o resto de TEMP_DIR nunca é tocado"""
+    try:
+        uuid.UUID(name)
+    except ValueError:
+        return False
+    return True
+
+def _remove(path: Path):
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+class TempSpaceManager:
+    """
+    Diretórios de trabalho por solicitação em TEMP_DIR. Cada workspace reserva o
+    espaço estimado (vídeo + áudio extraído) e não pode passar de TEMP_JOB_QUOTA_MB;
+    novas solicitações são recusadas enquanto o espaço livre, descontadas as
+    reservas, estiver abaixo de TEMP_MIN_FREE_MB (em TEMP_DIR ou no volume de
+    CACHE_DIR, o que estiver mais cheio). A remoção acontece fora do
+    event loop e um zelador remove periodicamente o que sobrou de execuções
+    interrompidas (diretórios sem solicitação em andamento).
+    """
+    _instance = None
+    _lock = threading.Lock()
+    _workspaces: Dict[str, dict] = {}
+    _task: Optional[asyncio.Task] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TempSpaceManager, cls).__new__(cls)
+        return cls._instance
+
+    @property
+    def root(self) -> Path:
+        return Path(settings.TEMP_DIR)
+
+    @staticmethod
+    def estimate_job_bytes(file_metadata: Optional[dict], vad: bool = False) -> int:
+        """Vídeo baixado + PCM 16 kHz (mais a cópia só com fala quando há VAD)"""
+        size = int((file_metadata or {}).get('size') or 0)
+        pcm_bytes = int(estimate_duration_seconds(file_metadata) * SAMPLE_RATE * 2)
+        return size + pcm_bytes * (2 if vad else 1)
+
+    def free_bytes(self) -> int:
+        """Espaço livre no volume mais cheio entre TEMP_DIR e CACHE_DIR (o cache de áudio também cresce com os jobs)"""
+        free = shutil.disk_usage(self.root).free
+        cache_dir = Path(settings.CACHE_DIR)
+        if cache_dir.exists():
+            free = min(free, shutil.disk_usage(cache_dir).free)
+        return free
+
+    def _outstanding_bytes(self, exclude: Optional[str] = None) -> int:
+        """Parte das reservas ainda não escrita em disco (e, portanto, não descontada do espaço livre)"""
+        return sum(
+            max(0, workspace['reserved'] - workspace['used'])
+            for request_id, workspace in self._workspaces.items() if request_id != exclude
+        )
+
+    def available_bytes(self) -> int:
+        with self._lock:
+            outstanding = self._outstanding_bytes()
+        return self.free_bytes() - outstanding - settings.TEMP_MIN_FREE_MB * MB
+
+    def has_capacity(self) -> bool:
+        """Falso quando o disco está abaixo de TEMP_MIN_FREE_MB: novas solicitações devem ser recusadas"""
+        try:
+            return self.available_bytes() > 0
+        except OSError as e:
+            logger.error(f"Erro ao consultar o espaço livre em {self.root}: {e}")
+            return True
+
+    def allocate(self, request_id: str, expected_bytes: int = 0) -> Path:
+        """
+        Cria (ou reaproveita, após uma reinicialização) o workspace da solicitação.
+        Levanta TempSpaceError se a estimativa exceder a cota ou o espaço livre.
+        """
+        quota = settings.TEMP_JOB_QUOTA_MB * MB
+        if quota and expected_bytes > quota:
+            raise TempSpaceError(
+                f"O arquivo precisa de ~{expected_bytes // MB} MB em disco, acima da cota de {settings.TEMP_JOB_QUOTA_MB} MB"
+            )
+        path = self.root / request_id
+        with self._lock:
+            # Uma nova alocação da mesma solicitação substitui a reserva anterior
+            available = self.free_bytes() - self._outstanding_bytes(exclude=request_id) - settings.TEMP_MIN_FREE_MB * MB
+            if expected_bytes > available:
+                raise TempSpaceError(
+                    f"Espaço em disco insuficiente: ~{expected_bytes // MB} MB necessários, {max(available, 0) // MB} MB disponíveis"
+                )
+            path.mkdir(parents=True, exist_ok=True)
+            self._workspaces[request_id] = {'path': path, 'reserved': expected_bytes, 'used': 0}
+        logger.info(f"Diretório temporário criado: {path} (reserva de {expected_bytes // MB} MB)")
+        return path
+
+    def owns(self, request_id: str) -> bool:
+        """Verdadeiro se a solicitação tem um workspace registrado"""
+        with self._lock:
+            return request_id in self._workspaces
+
+    def check_quota(self, request_id: str, written_bytes: int):
+        """Chamado durante o download; interrompe quando o workspace estoura a cota"""
+        workspace = self._workspaces.get(request_id)
+        if workspace is None:
+            return
+        workspace['used'] = max(workspace['used'], written_bytes)
+        quota = settings.TEMP_JOB_QUOTA_MB * MB
+        if quota and written_bytes > quota:
+            raise TempSpaceError(f"Cota de {settings.TEMP_JOB_QUOTA_MB} MB em disco excedida por {request_id}")
+
+    async def release(self, request_id: str):
+        """Remove o workspace em uma thread de I/O, sem bloquear o event loop"""
+        with self._lock:
+            workspace = self._workspaces.pop(request_id, None)
+        path = workspace['path'] if workspace else self.root / request_id
+        try:
+            await WorkerPool().run_io(_remove, path)
+            logger.info(f"Diretório temporário removido: {path}")
+        except Exception as e:
+            # O que não puder ser removido agora fica para o zelador
+            logger.error(f"Erro ao limpar diretório temporário {path}: {e}")
+
+    def sweep(self, keep: Iterable[str] = (), min_age: float = 0.0) -> int:
+        """
+        Remove de TEMP_DIR os workspaces que não estão ativos nem pertencem a uma
+        solicitação em andamento (keep) e não foram modificados há min_age segundos.
+        """
+        if not self.root.exists():
+            return 0
+        with self._lock:
+            protected = set(self._workspaces) | set(keep)
+        removed = 0
+        now = time.time()
+        for entry in self.root.iterdir():
+            if entry.name in protected or not _is_workspace_name(entry.name):
+                continue
+            try:
+                if min_age and now - _last_modified(entry) < min_age:
+                    continue
+                _remove(entry)
+            except OSError as e:
+                logger.warning(f"Erro ao remover {entry}: {e}")
+                continue
+            removed += 1
+            logger.info(f"Diretório temporário órfão removido: {entry}")
+        return removed
+
+    def measure(self):
+        """Atualiza o uso em disco de cada workspace ativo"""
+        with self._lock:
+            workspaces = list(self._workspaces.items())
+        quota = settings.TEMP_JOB_QUOTA_MB * MB
+        for request_id, workspace in workspaces:
+            workspace['used'] = directory_size(workspace['path'])
+            if quota and workspace['used'] > quota:
+                logger.warning(f"Workspace de {request_id} acima da cota: {workspace['used'] // MB} MB")
+
+    def start(self, keep: Callable[[], Set[str]]):
+        """
+        Remove os órfãos de execuções anteriores (exceto os das solicitações
+        restauradas, cujo download parcial é retomado) e inicia o zelador.
+        """
+        if TempSpaceManager._task is None:
+            TempSpaceManager._task = asyncio.create_task(self._run(keep))
+
+    async def stop(self):
+        if TempSpaceManager._task is not None:
+            TempSpaceManager._task.cancel()
+            await asyncio.gather(TempSpaceManager._task, return_exceptions=True)
+            TempSpaceManager._task = None
+
+    async def _run(self, keep: Callable[[], Set[str]]):
+        min_age = 0.0
+        while True:
+            try:
+                removed = await WorkerPool().run_io(self.sweep, keep(), min_age)
+                if removed:
+                    logger.info(f"{removed} diretório(s) órfão(s) removido(s) de {self.root}")
+                await WorkerPool().run_io(self.measure)
+            except Exception as e:
+                logger.error(f"Erro na limpeza de arquivos temporários: {e}")
+            # Na inicialização tudo que não está em andamento é órfão; depois, só o que está parado
+            min_age = settings.TEMP_ORPHAN_MIN_AGE_SECONDS
+            await asyncio.sleep(settings.TEMP_SWEEP_INTERVAL_SECONDS)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            workspaces = len(self._workspaces)
+            outstanding = self._outstanding_bytes()
+        try:
+            free_mb = round(self.free_bytes() / MB)
+        except OSError:
+            free_mb = None
+        return {
+            'workspaces': workspaces,
+            'free_mb': free_mb,
+            'reserved_mb': round(outstanding / MB),
+            'min_free_mb': settings.TEMP_MIN_FREE_MB
+        }
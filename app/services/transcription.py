@@ -1,22 +1,72 @@
-import whisper
 import subprocess
 from pathlib import Path
 import logging
-from typing import Optional, Callable
+import threading
+from typing import Optional, Callable, Iterable, List, Tuple, Union
+import asyncio
+import numpy as np
+from app.core.config import settings
+from app.services.checkpoint import TranscriptionCheckpoint
+from app.services.engines import InferenceEngine, SegmentCallback, get_engine
+from app.services.worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 
+# Formato esperado pelo Whisper: mono, 16 kHz
+SAMPLE_RATE = 16000
+PCM_SUFFIX = '.pcm'
+
+def load_pcm(path: Path, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+    """
+    Carrega áudio PCM s16le mono 16 kHz (amostras start:end) como float32 normalizado.
+    O arquivo é mapeado em memória, então apenas o trecho solicitado é lido.
+    """
+    samples = np.memmap(path, dtype=np.int16, mode='r')
+    return samples[start:end].astype(np.float32) / 32768.0
+
+def pcm_duration(path: Path) -> float:
+    """Duração em segundos de um arquivo PCM s16le mono 16 kHz"""
+    return path.stat().st_size / 2 / SAMPLE_RATE
+
+class AudioPipelineError(Exception):
+    """O FFmpeg não conseguiu decodificar o vídeo recebido pelo stdin"""
+
 class TranscriptionService:
-    def __init__(self):
-        self.model = whisper.load_model("base")
-        logger.info("Modelo Whisper carregado com sucesso")
+    def __init__(self, model_name: Optional[str] = None, backend: Optional[str] = None, vad: Optional[bool] = None, checkpoint: Optional[TranscriptionCheckpoint] = None):
+        self.model_name = model_name or settings.WHISPER_MODEL
+        self.backend = backend or settings.INFERENCE_BACKEND
+        self.vad = settings.VAD_ENABLED if vad is None else vad
+        # Janelas de 30 s agrupadas com as de outras solicitações (apenas o backend whisper)
+        self.batched = settings.BATCHED_INFERENCE and self.backend == 'whisper'
+        self.vad_stats: Optional[dict] = None  # Preenchido por transcribe_in_pool quando o VAD é usado
+        self.checkpoint = checkpoint  # Progresso durável da solicitação (retomada após reinicialização)
+        self._engine = None
 
-    def extract_audio(self, video_path: Path, output_path: Path):
-        """Extrai áudio de um vídeo usando FFmpeg"""
-        logger.info(f"Iniciando extração de áudio do vídeo: {video_path}")
-        try:
-            command = [
-                'ffmpeg', '-i', str(video_path),
+    @property
+    def engine(self) -> InferenceEngine:
+        """Backend de inferência; o modelo vem do registro compartilhado na primeira utilização"""
+        if self._engine is None:
+            self._engine = get_engine(self.backend, self.model_name)
+        return self._engine
+
+    @property
+    def model_id(self) -> str:
+        """Identifica backend + modelo (usado, por exemplo, na chave do cache)"""
+        model_id = f"{self.backend}:{self.model_name}"
+        # O VAD altera o áudio entregue ao modelo e, portanto, o resultado
+        return f"{model_id}+vad" if self.vad else model_id
+
+    @staticmethod
+    def audio_path_for(directory: Path) -> Path:
+        """Caminho do áudio extraído conforme AUDIO_EXTRACTION_MODE"""
+        if settings.AUDIO_EXTRACTION_MODE == 'mp3':
+            return directory / "audio.mp3"
+        return directory / f"audio{PCM_SUFFIX}"
+
+    @staticmethod
+    def _audio_output_args(output_path: Union[Path, str]) -> list:
+        if str(output_path).endswith('.mp3'):
+            return [
                 '-vn',  # Desabilita vídeo
                 '-acodec', 'libmp3lame',  # Usa codec MP3
                 '-ar', '44100',  # Sample rate
@@ -25,6 +75,22 @@ class TranscriptionService:
                 str(output_path),
                 '-y'  # Sobrescreve arquivo se existir
             ]
+        # PCM cru no formato do Whisper: evita o MP3 intermediário e a segunda decodificação
+        return [
+            '-vn',
+            '-f', 's16le',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(SAMPLE_RATE),
+            '-ac', '1',
+            str(output_path),
+            '-y'
+        ]
+
+    def extract_audio(self, video_path: Path, output_path: Path):
+        """Extrai áudio de um vídeo usando FFmpeg"""
+        logger.info(f"Iniciando extração de áudio do vídeo: {video_path}")
+        try:
+            command = ['ffmpeg', '-i', str(video_path)] + self._audio_output_args(output_path)
             
             process = subprocess.Popen(
                 command,
@@ -44,44 +110,471 @@ class TranscriptionService:
             logger.error(f"Erro ao executar FFmpeg: {str(e)}")
             raise
 
-    def transcribe(self, audio_path: Path, language: Optional[str] = None, progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
+    @staticmethod
+    def probe_duration(media_path: Path) -> Optional[float]:
+        """Duração do arquivo de mídia segundo o ffprobe (None se não for possível lê-la)"""
+        command = [
+            'ffprobe', '-v', 'error',
+            '-show_entries', 'format=duration',
+            '-of', 'default=noprint_wrappers=1:nokey=1',
+            str(media_path)
+        ]
+        try:
+            process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
+            return float(process.stdout.decode().strip())
+        except (OSError, subprocess.TimeoutExpired, ValueError) as e:
+            logger.warning(f"Não foi possível obter a duração de {media_path}: {e}")
+            return None
+
+    def extract_audio_from_stream(self, chunks: Iterable[bytes], output_path: Path):
+        """
+        Extrai áudio alimentando o stdin do FFmpeg com os trechos à medida que chegam,
+        de modo que a decodificação ocorre em paralelo ao download e o vídeo nunca vai para o disco.
+        """
+        logger.info(f"Iniciando extração de áudio em pipeline para: {output_path}")
+        command = ['ffmpeg', '-i', 'pipe:0'] + self._audio_output_args(output_path)
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+        # stderr precisa ser consumido em paralelo para o FFmpeg não travar com o buffer cheio
+        stderr_chunks = []
+        stderr_reader = threading.Thread(
+            target=lambda: stderr_chunks.append(process.stderr.read()),
+            daemon=True
+        )
+        stderr_reader.start()
+
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            # O FFmpeg encerrou antes do fim do arquivo; o erro é reportado abaixo
+            pass
+        except Exception:
+            process.kill()
+            raise
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            process.wait()
+            stderr_reader.join()
+
+        if process.returncode != 0:
+            stderr = b''.join(stderr_chunks).decode(errors='replace')
+            logger.error(f"Erro ao extrair áudio em pipeline: {stderr}")
+            raise AudioPipelineError(f"Erro ao extrair áudio: {stderr}")
+
+        logger.info(f"Áudio extraído com sucesso: {output_path}")
+
+    def transcribe(self, audio_path: Union[Path, np.ndarray], language: Optional[str] = None, progress_callback: Optional[Callable[[int, int], None]] = None, segment_callback: SegmentCallback = None, initial_prompt: Optional[str] = None) -> str:
         """
         Transcreve um arquivo de áudio usando Whisper
         
         Args:
-            audio_path: Caminho para o arquivo de áudio
+            audio_path: Caminho para o arquivo de áudio (PCM .pcm ou formato suportado pelo FFmpeg) ou amostras já decodificadas
             language: Código do idioma (opcional)
             progress_callback: Função de callback para progresso (opcional)
+            segment_callback: Função chamada com cada segmento assim que decodificado (opcional)
+            initial_prompt: Texto anterior usado como contexto do decodificador (opcional)
             
         Returns:
             str: Texto transcrito
         """
+        return self.transcribe_segments(audio_path, language, progress_callback, segment_callback, initial_prompt)["text"]
+
+    def transcribe_segments(self, audio_path: Union[Path, np.ndarray], language: Optional[str] = None, progress_callback: Optional[Callable[[int, int], None]] = None, segment_callback: SegmentCallback = None, initial_prompt: Optional[str] = None) -> dict:
+        """Transcreve o áudio e retorna texto e segmentos no formato comum aos backends"""
         try:
-            logger.info(f"Iniciando transcrição do áudio: {audio_path}")
-            
-            # Configurar opções do Whisper
-            options = {
-                "language": language if language else None,
-                "task": "transcribe",
-                "verbose": True
-            }
+            logger.info(f"Iniciando transcrição ({self.model_id}) do áudio: {audio_path if isinstance(audio_path, Path) else 'em memória'}")
 
-            # Função de callback personalizada para o Whisper
-            def whisper_callback(current: int, total: int):
+            # Função de callback personalizada para o backend
+            def engine_callback(current: int, total: int):
                 if progress_callback:
                     progress_callback(current, total)
                 logger.info(f"Progresso da transcrição: {int((current/total)*100)}%")
 
             # Realizar transcrição
-            result = self.model.transcribe(
-                str(audio_path),
-                **options,
-                progress_callback=whisper_callback
+            result = self.engine.transcribe(
+                self._load_audio(audio_path),
+                language,
+                progress_callback=engine_callback,
+                segment_callback=segment_callback,
+                initial_prompt=initial_prompt
             )
             
             logger.info("Transcrição concluída com sucesso")
-            return result["text"]
+            return result
             
         except Exception as e:
             logger.error(f"Erro durante a transcrição: {str(e)}")
             raise
+
+    async def transcribe_in_pool(self, audio_path: Path, language: Optional[str] = None, progress_callback: Optional[Callable[[int, int], None]] = None, segment_callback: SegmentCallback = None) -> str:
+        """
+        Transcreve no pool de processos. Áudios PCM mais longos que
+        LONG_AUDIO_THRESHOLD_SECONDS são divididos e transcritos em paralelo.
+        segment_callback recebe os segmentos no event loop, em ordem cronológica.
+        """
+        if self.vad and audio_path.suffix == PCM_SUFFIX:
+            return await self.transcribe_speech_only(audio_path, language, progress_callback, segment_callback)
+        return await self._transcribe_file(audio_path, language, progress_callback, segment_callback)
+
+    async def _transcribe_file(self, audio_path: Path, language: Optional[str] = None, progress_callback: Optional[Callable[[int, int], None]] = None, segment_callback: SegmentCallback = None) -> str:
+        if self.is_long_audio(audio_path):
+            return await self.transcribe_long_audio(audio_path, language, progress_callback, segment_callback)
+        if self.batched and audio_path.suffix == PCM_SUFFIX:
+            segments = await self.transcribe_batched(audio_path, 0, None, language, progress_callback, segment_callback)
+            return "".join(segment['text'] for segment in segments)
+        # A retomada corta o PCM no ponto salvo; outros formatos sempre recomeçam
+        checkpoint = self.checkpoint if audio_path.suffix == PCM_SUFFIX else None
+        stream = f"single:{audio_path.name}"
+        state = checkpoint.get(stream) if checkpoint else None
+        segments: List[dict] = list(state['segments']) if state else []
+        resume_at = state['resume_at'] if state else 0.0
+        prefix = "".join(segment['text'] for segment in segments)
+        if segment_callback:
+            for segment in segments:
+                segment_callback(segment)
+        if state and (state['done'] or pcm_duration(audio_path) - resume_at < 1.0):
+            return prefix
+        if state:
+            logger.info(f"Retomando a transcrição de {audio_path} em {resume_at:.1f}s")
+
+        def on_segment(segment: dict):
+            segments.append(segment)
+            if segment_callback:
+                segment_callback(segment)
+            checkpoint.record(
+                stream,
+                segments,
+                resume_at=segment['end'],
+                prompt=TranscriptionCheckpoint.prompt_text(segments)
+            )
+
+        text = await WorkerPool().run_cpu(
+            transcribe_in_worker,
+            audio_path,
+            language,
+            self.model_name,
+            self.backend,
+            resume_at,
+            state['prompt'] if state else None,
+            progress_callback=progress_callback,
+            segment_callback=on_segment if checkpoint else segment_callback
+        )
+        if checkpoint:
+            checkpoint.record(stream, segments, done=True, resume_at=resume_at, prompt=None)
+        return prefix + text
+
+    async def transcribe_batched(self, audio_path: Path, start: int = 0, end: Optional[int] = None, language: Optional[str] = None, progress_callback: Optional[Callable[[int, int], None]] = None, segment_callback: SegmentCallback = None) -> List[dict]:
+        """
+        Transcreve as amostras start:end janela a janela pelo InferenceBatcher, que
+        agrupa as janelas desta e de outras solicitações em um único passe do modelo.
+        Retorna os segmentos com tempos absolutos.
+        """
+        from app.services.inference_batcher import HOP_LENGTH, MAX_PROMPT_TOKENS, WINDOW_FRAMES, InferenceBatcher
+
+        batcher = InferenceBatcher()
+        if end is None:
+            end = int(audio_path.stat().st_size // 2)
+        total_frames = (end - start) // HOP_LENGTH
+        stream = f"batched:{audio_path.name}:{start}"
+        state = self.checkpoint.get(stream) if self.checkpoint else None
+        if state:
+            # Continua da última janela concluída, com o mesmo contexto do decodificador
+            seek = state['seek']
+            prompt: List[int] = list(state['prompt'])
+            segments: List[dict] = list(state['segments'])
+            language = language or state['language']
+            if segment_callback:
+                for segment in segments:
+                    segment_callback(segment)
+        else:
+            seek = 0
+            prompt = []
+            segments = []
+        while seek < total_frames:
+            frames = min(WINDOW_FRAMES, total_frames - seek)
+            window_start = start + seek * HOP_LENGTH
+            result = await batcher.submit(self.model_name, {
+                'audio_path': str(audio_path),
+                'start': window_start,
+                'end': window_start + frames * HOP_LENGTH,
+                'frames': frames,
+                'language': language,
+                'prompt': prompt[-MAX_PROMPT_TOKENS:]
+            })
+            # O idioma detectado na primeira janela vale para as seguintes, como no Whisper
+            language = language or result['language']
+            offset = window_start / SAMPLE_RATE
+            for segment in result['segments']:
+                segment = {
+                    'start': segment['start'] + offset,
+                    'end': segment['end'] + offset,
+                    'text': segment['text']
+                }
+                segments.append(segment)
+                if segment_callback:
+                    segment_callback(segment)
+            if result['no_speech']:
+                # Janela descartada como silêncio: o prompt segue o mesmo, como em whisper.transcribe
+                pass
+            elif settings.BATCHED_CONDITION_ON_PREVIOUS_TEXT and result['temperature'] <= 0.5:
+                prompt.extend(result['tokens'])
+            else:
+                prompt = []
+            seek += result['advance']
+            if self.checkpoint:
+                self.checkpoint.record(
+                    stream,
+                    segments,
+                    done=seek >= total_frames,
+                    seek=seek,
+                    prompt=prompt[-MAX_PROMPT_TOKENS:],
+                    language=language
+                )
+            if progress_callback:
+                progress_callback(min(seek, total_frames), total_frames)
+        return segments
+
+    async def transcribe_speech_only(self, audio_path: Path, language: Optional[str] = None, progress_callback: Optional[Callable[[int, int], None]] = None, segment_callback: SegmentCallback = None) -> str:
+        """
+        Pré-processamento com VAD: apenas os intervalos de fala vão para o modelo e os
+        segmentos voltam com os tempos da linha do tempo original. O resumo do áudio
+        ignorado fica em vad_stats.
+        """
+        from app.services.vad import SpeechTimeline, write_speech_audio
+
+        speech_path = audio_path.with_name(f"{audio_path.stem}.speech{PCM_SUFFIX}")
+        timeline = await WorkerPool().run_io(write_speech_audio, audio_path, speech_path)
+        if not timeline.spans:
+            # Uma detecção vazia não basta para concluir o job com transcrição vazia
+            logger.info(f"VAD não encontrou fala em {audio_path}; transcrevendo o áudio completo")
+            full = SpeechTimeline([(0, timeline.total_samples)], timeline.total_samples)
+            self.vad_stats = {**full.get_stats(), 'fallback': True}
+            return await self._transcribe_file(audio_path, language, progress_callback, segment_callback)
+        self.vad_stats = timeline.get_stats()
+
+        remapped_callback = None
+        if segment_callback:
+            remapped_callback = lambda segment: segment_callback(timeline.remap_segment(segment))
+        return await self._transcribe_file(speech_path, language, progress_callback, remapped_callback)
+
+    @staticmethod
+    def is_long_audio(audio_path: Path) -> bool:
+        threshold = settings.LONG_AUDIO_THRESHOLD_SECONDS
+        if not threshold or audio_path.suffix != PCM_SUFFIX:
+            return False
+        return pcm_duration(audio_path) > threshold
+
+    async def transcribe_long_audio(self, audio_path: Path, language: Optional[str] = None, progress_callback: Optional[Callable[[int, int], None]] = None, segment_callback: SegmentCallback = None) -> str:
+        """Divide o áudio em silêncios, transcreve os trechos em paralelo e junta os segmentos"""
+        samples = np.memmap(audio_path, dtype=np.int16, mode='r')
+        boundaries = self.find_split_points(
+            samples,
+            int(settings.LONG_AUDIO_CHUNK_SECONDS * SAMPLE_RATE),
+            int(settings.LONG_AUDIO_SEARCH_SECONDS * SAMPLE_RATE)
+        )
+        overlap = int(settings.LONG_AUDIO_OVERLAP_SECONDS * SAMPLE_RATE)
+        chunks = self.build_chunks(boundaries, len(samples), overlap)
+        del samples
+        logger.info(f"Transcrevendo {audio_path} em {len(chunks)} trechos paralelos")
+
+        completed = 0
+        results: List[Optional[List[dict]]] = [None] * len(chunks)
+        emitted = 0
+
+        def emit_ready_segments():
+            # Só o prefixo contínuo de trechos concluídos tem segmentos definitivos
+            nonlocal emitted
+            ready = 0
+            while ready < len(results) and results[ready] is not None:
+                ready += 1
+            stitched = self.stitch_segments(chunks[:ready], results[:ready])
+            for segment in stitched[emitted:]:
+                segment_callback(segment)
+            emitted = max(emitted, len(stitched))
+
+        async def run_chunk(index: int, start: int, end: int) -> List[dict]:
+            nonlocal completed
+            stream = f"chunk:{audio_path.name}:{start}"
+            state = self.checkpoint.get(stream) if self.checkpoint else None
+            if state and state['done']:
+                segments = state['segments']
+            elif self.batched:
+                # Janelas dos trechos seguem juntas para o mesmo lote do encoder (com checkpoint por janela)
+                segments = await self.transcribe_batched(audio_path, start, end, language)
+            else:
+                segments = await self._transcribe_chunk(audio_path, stream, state, start, end, language)
+            completed += 1
+            results[index] = segments
+            if segment_callback:
+                emit_ready_segments()
+            if progress_callback:
+                progress_callback(completed, len(chunks))
+            return segments
+
+        await asyncio.gather(*[run_chunk(index, start, end) for index, (start, end, _, _) in enumerate(chunks)])
+        segments = self.stitch_segments(chunks, results)
+        return "".join(segment['text'] for segment in segments)
+
+    async def _transcribe_chunk(self, audio_path: Path, stream: str, state: Optional[dict], start: int, end: int, language: Optional[str] = None) -> List[dict]:
+        """
+        Transcreve as amostras start:end no pool de processos. Com checkpoint, cada
+        segmento concluído é gravado com o ponto de retomada (em amostras) e o
+        trecho interrompido continua dali, com os últimos segmentos como contexto.
+        """
+        segments: List[dict] = list(state['segments']) if state else []
+        resume_at = state.get('resume_at', start) if state else start
+        if state:
+            logger.info(f"Retomando o trecho {stream} em {resume_at / SAMPLE_RATE:.1f}s")
+        if end - resume_at >= SAMPLE_RATE:
+            partial = list(segments)
+
+            def on_segment(segment: dict):
+                partial.append(segment)
+                self.checkpoint.record(
+                    stream,
+                    partial,
+                    resume_at=int(segment['end'] * SAMPLE_RATE),
+                    prompt=TranscriptionCheckpoint.prompt_text(partial)
+                )
+
+            segments += await WorkerPool().run_cpu(
+                transcribe_chunk_in_worker,
+                audio_path,
+                resume_at,
+                end,
+                language,
+                self.model_name,
+                self.backend,
+                state.get('prompt') if state else None,
+                segment_callback=on_segment if self.checkpoint else None
+            )
+        if self.checkpoint:
+            self.checkpoint.record(stream, segments, done=True, resume_at=end, prompt=None)
+        return segments
+
+    @staticmethod
+    def find_split_points(samples: np.ndarray, chunk_samples: int, search_samples: int) -> List[int]:
+        """
+        Escolhe os pontos de corte: para cada trecho de chunk_samples, corta no quadro
+        de 100 ms com menor energia dentro dos últimos search_samples.
+        """
+        frame = SAMPLE_RATE // 10
+        total = len(samples)
+        boundaries = [0]
+        position = 0
+        while total - position > chunk_samples:
+            target = position + chunk_samples
+            window_start = max(target - search_samples, position + frame)
+            window = np.asarray(samples[window_start:target], dtype=np.float32)
+            frames = len(window) // frame
+            if frames:
+                energy = (window[:frames * frame].reshape(frames, frame) ** 2).mean(axis=1)
+                cut = window_start + int(np.argmin(energy)) * frame + frame // 2
+            else:
+                cut = target
+            boundaries.append(cut)
+            position = cut
+        boundaries.append(total)
+        return boundaries
+
+    @staticmethod
+    def build_chunks(boundaries: List[int], total: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+        """
+        Monta os trechos (início, fim, início próprio, fim próprio) em amostras.
+        Cada trecho inclui overlap amostras além dos cortes, mas só "possui" o intervalo entre eles.
+        """
+        return [
+            (max(0, own_start - overlap), min(total, own_end + overlap), own_start, own_end)
+            for own_start, own_end in zip(boundaries[:-1], boundaries[1:])
+        ]
+
+    @staticmethod
+    def stitch_segments(chunks: List[Tuple[int, int, int, int]], results: List[List[dict]]) -> List[dict]:
+        """
+        Junta os segmentos dos trechos na linha do tempo original. Na sobreposição,
+        cada segmento fica apenas com o trecho que possui o seu ponto médio, e textos
+        repetidos na fronteira são descartados.
+        """
+        stitched = []
+        for (_, _, own_start, own_end), segments in zip(chunks, results):
+            own_start_s = own_start / SAMPLE_RATE
+            own_end_s = own_end / SAMPLE_RATE
+            for segment in segments:
+                middle = (segment['start'] + segment['end']) / 2
+                if not own_start_s <= middle < own_end_s:
+                    continue
+                if stitched and segment['text'].strip() == stitched[-1]['text'].strip():
+                    continue
+                stitched.append(segment)
+        return stitched
+
+    @staticmethod
+    def _load_audio(audio: Union[Path, np.ndarray]):
+        """PCM cru é entregue ao modelo como array; outros formatos são decodificados pelo backend"""
+        if isinstance(audio, np.ndarray):
+            return audio
+        if Path(audio).suffix == PCM_SUFFIX:
+            return load_pcm(Path(audio))
+        return str(audio)
+
+
+def transcribe_in_worker(audio_path: Path, language: Optional[str] = None, model_name: Optional[str] = None, backend: Optional[str] = None, start_seconds: float = 0.0, initial_prompt: Optional[str] = None, events_queue=None) -> str:
+    """
+    Ponto de entrada executado no pool de processos; progresso e segmentos são enviados pela events_queue.
+    Com start_seconds (retomada) apenas o restante do PCM é transcrito e os tempos continuam absolutos.
+    """
+    def report_progress(current: int, total: int):
+        events_queue.put(('progress', (current, total)))
+
+    def report_segment(segment: dict):
+        if start_seconds:
+            segment = {
+                'start': segment['start'] + start_seconds,
+                'end': segment['end'] + start_seconds,
+                'text': segment['text']
+            }
+        events_queue.put(('segment', segment))
+
+    audio = load_pcm(audio_path, int(start_seconds * SAMPLE_RATE)) if start_seconds else audio_path
+    return TranscriptionService(model_name, backend).transcribe(
+        audio,
+        language,
+        progress_callback=report_progress if events_queue is not None else None,
+        segment_callback=report_segment if events_queue is not None else None,
+        initial_prompt=initial_prompt
+    )
+
+
+def transcribe_chunk_in_worker(audio_path: Path, start: int, end: int, language: Optional[str] = None, model_name: Optional[str] = None, backend: Optional[str] = None, initial_prompt: Optional[str] = None, events_queue=None) -> List[dict]:
+    """
+    Transcreve as amostras start:end de um PCM e retorna os segmentos com tempos absolutos.
+    Com events_queue, cada segmento também é enviado assim que decodificado (checkpoint).
+    """
+    offset = start / SAMPLE_RATE
+
+    def absolute(segment: dict) -> dict:
+        return {
+            'start': segment['start'] + offset,
+            'end': segment['end'] + offset,
+            'text': segment['text']
+        }
+
+    def report_segment(segment: dict):
+        events_queue.put(('segment', absolute(segment)))
+
+    result = TranscriptionService(model_name, backend).transcribe_segments(
+        load_pcm(audio_path, start, end),
+        language,
+        segment_callback=report_segment if events_queue is not None else None,
+        initial_prompt=initial_prompt
+    )
+    return [absolute(segment) for segment in result['segments']]
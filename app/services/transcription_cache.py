@@ -0,0 +1,59 @@
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import logging
+from app.core.config import settings
+from app.services.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+class TranscriptionCache(DiskCache):
+    """
+    Cache persistente de transcrições endereçado pelo conteúdo do arquivo
+    (md5Checksum do Drive) + modelo + idioma. Cópias do mesmo vídeo com IDs
+    diferentes compartilham a mesma entrada. A remoção segue LRU pelo mtime.
+    """
+    subdirectory = "transcriptions"
+    suffix = ".json"
+    metric_label = "transcription"
+    description = "cache de transcrições"
+
+    @property
+    def max_bytes(self) -> int:
+        return settings.TRANSCRIPTION_CACHE_MAX_MB * 1024 * 1024
+
+    @staticmethod
+    def make_key(file_metadata: dict, model_name: str, language: Optional[str]) -> Optional[str]:
+        """Gera a chave do cache; arquivos sem checksum (ex.: Google Docs) não são cacheados"""
+        checksum = file_metadata.get('md5Checksum')
+        if not checksum:
+            return None
+        raw = f"{checksum}:{file_metadata.get('size', '')}:{model_name}:{language or 'auto'}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def _load_entry(path: Path) -> dict:
+        with open(path, 'r', encoding='utf-8') as cache_file:
+            return json.load(cache_file)
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        if not settings.TRANSCRIPTION_CACHE_ENABLED or key is None:
+            return None
+        entry = self._read(key, self._load_entry)
+        return entry['transcription'] if entry is not None else None
+
+    def put(self, key: Optional[str], transcription: str, file_metadata: Optional[dict] = None):
+        if not settings.TRANSCRIPTION_CACHE_ENABLED or key is None:
+            return
+        entry = {
+            'transcription': transcription,
+            'file_id': (file_metadata or {}).get('id'),
+            'name': (file_metadata or {}).get('name')
+        }
+
+        def write_entry(path: Path):
+            with open(path, 'w', encoding='utf-8') as cache_file:
+                json.dump(entry, cache_file, ensure_ascii=False)
+
+        self._write(key, write_entry)
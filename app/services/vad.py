@@ -0,0 +1,159 @@
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Tuple
+import logging
+import numpy as np
+from app.core.config import settings
+from app.services.transcription import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+FRAME_SAMPLES = SAMPLE_RATE * 30 // 1000  # Quadros de 30 ms (também aceitos pelo WebRTC VAD)
+BLOCK_FRAMES = 2000  # Quadros analisados por vez (60 s), sem carregar o arquivo inteiro
+
+def _energy_frames(samples: np.ndarray) -> np.ndarray:
+    """Classifica cada quadro pela energia acima do ruído de fundo estimado no arquivo"""
+    frames = len(samples) // FRAME_SAMPLES
+    energy_db = np.empty(frames, dtype=np.float32)
+    for first in range(0, frames, BLOCK_FRAMES):
+        last = min(frames, first + BLOCK_FRAMES)
+        block = np.asarray(samples[first * FRAME_SAMPLES:last * FRAME_SAMPLES], dtype=np.float32) / 32768.0
+        power = (block.reshape(last - first, FRAME_SAMPLES) ** 2).mean(axis=1)
+        energy_db[first:last] = 10 * np.log10(power + 1e-10)
+    if not frames:
+        return np.zeros(0, dtype=bool)
+    noise_floor = float(np.percentile(energy_db, 10))
+    if float(np.percentile(energy_db, 90)) - noise_floor < settings.VAD_THRESHOLD_DB:
+        # Sem silêncio de referência (tom contínuo, ruído ou fala sem pausas) o ruído de
+        # fundo não pode ser estimado: vale apenas o nível mínimo absoluto
+        return energy_db > settings.VAD_MIN_LEVEL_DB
+    threshold = max(noise_floor + settings.VAD_THRESHOLD_DB, settings.VAD_MIN_LEVEL_DB)
+    return energy_db > threshold
+
+def _webrtc_frames(samples: np.ndarray) -> np.ndarray:
+    """Classifica cada quadro com o WebRTC VAD, que distingue fala de música e ruído"""
+    try:
+        import webrtcvad
+    except ImportError as e:
+        raise RuntimeError("VAD_BACKEND 'webrtc' requer o pacote webrtcvad instalado") from e
+    vad = webrtcvad.Vad(settings.VAD_AGGRESSIVENESS)
+    frames = len(samples) // FRAME_SAMPLES
+    speech = np.zeros(frames, dtype=bool)
+    for first in range(0, frames, BLOCK_FRAMES):
+        last = min(frames, first + BLOCK_FRAMES)
+        block = np.asarray(samples[first * FRAME_SAMPLES:last * FRAME_SAMPLES], dtype=np.int16).tobytes()
+        frame_bytes = FRAME_SAMPLES * 2
+        for index in range(last - first):
+            speech[first + index] = vad.is_speech(block[index * frame_bytes:(index + 1) * frame_bytes], SAMPLE_RATE)
+    return speech
+
+FRAME_CLASSIFIERS = {
+    'energy': _energy_frames,
+    'webrtc': _webrtc_frames,
+}
+
+def detect_speech(samples: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Retorna os intervalos de fala (início, fim) em amostras de um PCM s16le 16 kHz.
+    Pausas menores que VAD_MIN_SILENCE_SECONDS são mantidas, trechos menores que
+    VAD_MIN_SPEECH_SECONDS são descartados e cada intervalo recebe VAD_PADDING_SECONDS.
+    """
+    speech = FRAME_CLASSIFIERS[settings.VAD_BACKEND](samples)
+    frame_seconds = FRAME_SAMPLES / SAMPLE_RATE
+    min_silence = int(settings.VAD_MIN_SILENCE_SECONDS / frame_seconds)
+    min_speech = int(settings.VAD_MIN_SPEECH_SECONDS / frame_seconds)
+    padding = int(settings.VAD_PADDING_SECONDS * SAMPLE_RATE)
+
+    # Transições 0→1 e 1→0 delimitam as regiões de fala, em quadros
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    regions: List[List[int]] = []
+    for start, end in zip(starts, ends):
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    total = len(samples)
+    spans: List[Tuple[int, int]] = []
+    for start, end in regions:
+        if end - start < min_speech:
+            continue
+        span_start = max(0, int(start) * FRAME_SAMPLES - padding)
+        span_end = min(total, int(end) * FRAME_SAMPLES + padding)
+        if spans and span_start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], span_end)
+        else:
+            spans.append((span_start, span_end))
+    return spans
+
+class SpeechTimeline:
+    """
+    Mapeia tempos do áudio compactado (só fala, com VAD_GAP_SECONDS de silêncio
+    entre os intervalos) de volta para a linha do tempo original.
+    """
+    def __init__(self, spans: List[Tuple[int, int]], total_samples: int):
+        self.spans = spans
+        self.total_samples = total_samples
+        self.gap = int(settings.VAD_GAP_SECONDS * SAMPLE_RATE)
+        self.offsets: List[int] = []  # Início de cada intervalo no áudio compactado
+        position = 0
+        for start, end in spans:
+            self.offsets.append(position)
+            position += end - start + self.gap
+
+    @property
+    def speech_seconds(self) -> float:
+        return sum(end - start for start, end in self.spans) / SAMPLE_RATE
+
+    @property
+    def skipped_seconds(self) -> float:
+        return self.total_samples / SAMPLE_RATE - self.speech_seconds
+
+    def to_original(self, seconds: float) -> float:
+        """Converte um tempo do áudio compactado para o áudio original"""
+        if not self.spans:
+            return seconds
+        position = int(seconds * SAMPLE_RATE)
+        index = max(0, bisect_right(self.offsets, position) - 1)
+        start, end = self.spans[index]
+        # Tempos dentro do silêncio inserido ficam presos ao fim do intervalo anterior
+        return min(start + position - self.offsets[index], end) / SAMPLE_RATE
+
+    def remap_segment(self, segment: dict) -> dict:
+        return {
+            **segment,
+            'start': self.to_original(segment['start']),
+            'end': self.to_original(segment['end'])
+        }
+
+    def get_stats(self) -> dict:
+        total_seconds = self.total_samples / SAMPLE_RATE
+        return {
+            'audio_seconds': round(total_seconds, 2),
+            'speech_seconds': round(self.speech_seconds, 2),
+            'skipped_seconds': round(self.skipped_seconds, 2),
+            'skipped_ratio': round(self.skipped_seconds / total_seconds, 4) if total_seconds else 0.0,
+            'speech_regions': len(self.spans)
+        }
+
+def write_speech_audio(source: Path, destination: Path) -> SpeechTimeline:
+    """Detecta a fala em um PCM e grava apenas os intervalos de fala em destination"""
+    samples = np.memmap(source, dtype=np.int16, mode='r')
+    spans = detect_speech(samples)
+    timeline = SpeechTimeline(spans, len(samples))
+    silence = np.zeros(timeline.gap, dtype=np.int16).tobytes()
+    with open(destination, 'wb') as output:
+        for start, end in spans:
+            for block_start in range(start, end, BLOCK_FRAMES * FRAME_SAMPLES):
+                block_end = min(end, block_start + BLOCK_FRAMES * FRAME_SAMPLES)
+                output.write(np.asarray(samples[block_start:block_end]).tobytes())
+            output.write(silence)
+    del samples
+    logger.info(
+        f"VAD: {timeline.speech_seconds:.0f}s de fala em {len(spans)} intervalos, "
+        f"{timeline.skipped_seconds:.0f}s ignorados"
+    )
+    return timeline
@@ -0,0 +1,161 @@
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+import asyncio
+import time
+import logging
+import aiohttp
+from app.core.config import settings
+from app.services import metrics
+from app.services.job_store import JobStore
+from app.services.worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+class WebhookDispatcher:
+    """
+    Entrega de webhooks com outbox durável: cada envio é gravado antes da
+    primeira tentativa e só é removido após uma resposta 2xx. Falhas são
+    reenviadas com backoff exponencial usando um único ClientSession
+    (keep-alive) com limite de conexões por host.
+    """
+    _instance = None
+    _session: Optional[aiohttp.ClientSession] = None
+    _task: Optional[asyncio.Task] = None
+    _wakeup: Optional[asyncio.Event] = None
+    _in_flight: Set[int] = set()
+    _deliveries: Set[asyncio.Task] = set()
+    _store = JobStore()
+    stats: Dict[str, float] = {
+        'delivered': 0,
+        'failed_attempts': 0,
+        'dead': 0,
+        'latency_seconds_total': 0.0,
+        'last_latency_seconds': 0.0,
+    }
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(WebhookDispatcher, cls).__new__(cls)
+        return cls._instance
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if WebhookDispatcher._session is None or WebhookDispatcher._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.WEBHOOK_MAX_CONNECTIONS,
+                limit_per_host=settings.WEBHOOK_MAX_PER_HOST,
+                keepalive_timeout=settings.WEBHOOK_KEEPALIVE_SECONDS
+            )
+            WebhookDispatcher._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.WEBHOOK_TIMEOUT_SECONDS),
+                headers={'Content-Type': 'application/json'}
+            )
+        return WebhookDispatcher._session
+
+    def _get_wakeup(self) -> asyncio.Event:
+        if WebhookDispatcher._wakeup is None:
+            WebhookDispatcher._wakeup = asyncio.Event()
+        return WebhookDispatcher._wakeup
+
+    def start(self):
+        """Inicia o loop que entrega o outbox (inclusive o que ficou pendente antes de reiniciar)"""
+        if WebhookDispatcher._task is None:
+            WebhookDispatcher._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if WebhookDispatcher._task is not None:
+            WebhookDispatcher._task.cancel()
+            await asyncio.gather(WebhookDispatcher._task, return_exceptions=True)
+            WebhookDispatcher._task = None
+        # Entregas interrompidas continuam pendentes no outbox e são reenviadas na próxima inicialização
+        for task in list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+        if WebhookDispatcher._session is not None:
+            await WebhookDispatcher._session.close()
+            WebhookDispatcher._session = None
+
+    async def enqueue(self, request_id: str, url: str, payload: dict):
+        """Grava a entrega no outbox e acorda o loop de envio"""
+        await WorkerPool().run_io(self._store.add_webhook, request_id, url, payload, time.time())
+        logger.info(f"Webhook da requisição {request_id} adicionado ao outbox")
+        self._get_wakeup().set()
+
+    async def _run(self):
+        wakeup = self._get_wakeup()
+        while True:
+            try:
+                # Entregas em envio não contam como devidas: o loop dorme até a próxima que não está
+                due = await WorkerPool().run_io(
+                    self._store.due_webhooks,
+                    time.time(),
+                    max(0, settings.WEBHOOK_MAX_CONNECTIONS - len(self._in_flight)),
+                    list(self._in_flight)
+                )
+                for delivery in due:
+                    self._in_flight.add(delivery['id'])
+                    task = asyncio.create_task(self._deliver(delivery))
+                    self._deliveries.add(task)
+                    task.add_done_callback(self._deliveries.discard)
+                next_at = await WorkerPool().run_io(self._store.next_webhook_at, list(self._in_flight))
+            except Exception as e:
+                logger.error(f"Erro ao ler o outbox de webhooks: {e}")
+                next_at = None
+
+            timeout = settings.WEBHOOK_POLL_INTERVAL
+            # Sem conexões livres, o término de uma entrega acorda o loop
+            if next_at is not None and len(self._in_flight) < settings.WEBHOOK_MAX_CONNECTIONS:
+                timeout = min(timeout, max(0.1, next_at - time.time()))
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+
+    async def _deliver(self, delivery: dict):
+        request_id = delivery['request_id']
+        attempts = delivery['attempts'] + 1
+        host = urlparse(delivery['url']).netloc
+        started = time.monotonic()
+        try:
+            async with self._get_session().post(delivery['url'], json=delivery['payload']) as response:
+                if response.status >= 300:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info,
+                        response.history,
+                        status=response.status,
+                        message=f"Resposta HTTP {response.status}"
+                    )
+            latency = time.monotonic() - started
+            metrics.STAGE_DURATION.labels('webhook').observe(latency)
+            metrics.WEBHOOK_DELIVERIES.labels('delivered').inc()
+            self.stats['delivered'] += 1
+            self.stats['latency_seconds_total'] += latency
+            self.stats['last_latency_seconds'] = latency
+            await WorkerPool().run_io(self._store.complete_webhook, delivery['id'])
+            logger.info(f"Webhook da requisição {request_id} entregue a {host} em {latency:.2f}s (tentativa {attempts})")
+        except Exception as e:
+            self.stats['failed_attempts'] += 1
+            metrics.STAGE_DURATION.labels('webhook').observe(time.monotonic() - started)
+            if attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+                metrics.WEBHOOK_DELIVERIES.labels('dead').inc()
+                self.stats['dead'] += 1
+                next_attempt_at = None
+                logger.error(f"Webhook da requisição {request_id} descartado após {attempts} tentativas: {e}")
+            else:
+                metrics.WEBHOOK_DELIVERIES.labels('retry').inc()
+                delay = min(settings.WEBHOOK_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), settings.WEBHOOK_BACKOFF_MAX_SECONDS)
+                next_attempt_at = time.time() + delay
+                logger.warning(f"Falha ao entregar webhook da requisição {request_id} (tentativa {attempts}), nova tentativa em {delay:.0f}s: {e}")
+            await WorkerPool().run_io(self._store.retry_webhook, delivery['id'], attempts, next_attempt_at, str(e))
+        finally:
+            self._in_flight.discard(delivery['id'])
+            self._get_wakeup().set()
+
+    def get_stats(self) -> dict:
+        delivered = self.stats['delivered']
+        return {
+            **self.stats,
+            'average_latency_seconds': self.stats['latency_seconds_total'] / delivered if delivered else 0.0,
+            'in_flight': len(self._in_flight)
+        }
@@ -0,0 +1,172 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import functools
+import multiprocessing
+import os
+import queue
+import logging
+from app.core.config import settings
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+def _init_cpu_worker(threads: int):
+    """Inicializa um processo do pool: limita threads do torch e pré-carrega os modelos"""
+    import torch
+    from app.services.model_registry import ModelRegistry
+
+    torch.set_num_threads(threads)
+    ModelRegistry().preload()
+
+def _warm_up() -> int:
+    """Confirma que o processo está pronto"""
+    return os.getpid()
+
+def _call_in_worker(fn: Callable, args: tuple) -> Tuple[object, List[Tuple[str, float]]]:
+    """
+    Executa fn no processo de inferência e devolve, junto ao resultado, os
+    carregamentos de modelo ocorridos no processo (pré-carga, carregamento sob
+    demanda ou recarregamento após descarte). Se fn falhar, eles seguem na próxima chamada.
+    """
+    from app.services.model_registry import ModelRegistry
+
+    result = fn(*args)
+    return result, ModelRegistry().take_loads()
+
+class WorkerPool:
+    """
+    Camada de execução fora do event loop.
+    Etapas de CPU (inferência) rodam em um pool de processos com modelos
+    pré-carregados; etapas de I/O (Drive, FFmpeg, disco) rodam em um pool de threads.
+    """
+    _instance = None
+    _process_pool: Optional[ProcessPoolExecutor] = None
+    _thread_pool: Optional[ThreadPoolExecutor] = None
+    _manager = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(WorkerPool, cls).__new__(cls)
+        return cls._instance
+
+    @property
+    def cpu_workers(self) -> int:
+        return settings.CPU_WORKERS or settings.QUEUE_WORKERS
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        if WorkerPool._process_pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.cpu_workers)
+            WorkerPool._process_pool = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_cpu_worker,
+                initargs=(threads,)
+            )
+        return WorkerPool._process_pool
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if WorkerPool._thread_pool is None:
+            WorkerPool._thread_pool = ThreadPoolExecutor(
+                max_workers=settings.IO_WORKERS,
+                thread_name_prefix='io-worker'
+            )
+        return WorkerPool._thread_pool
+
+    def _get_manager(self):
+        if WorkerPool._manager is None:
+            WorkerPool._manager = multiprocessing.get_context('spawn').Manager()
+        return WorkerPool._manager
+
+    async def start(self):
+        """Cria os processos de inferência e aguarda o carregamento dos modelos"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_process_pool()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(pool, _call_in_worker, _warm_up, ()) for _ in range(self.cpu_workers)
+        ])
+        # O mesmo processo pode responder mais de uma vez; cada um é contado uma única vez
+        pids = set()
+        for pid, loads in results:
+            pids.add(pid)
+            self._observe_loads(loads)
+        logger.info(f"Pool de inferência pronto: {len(pids)} processo(s)")
+
+    def shutdown(self):
+        if WorkerPool._process_pool is not None:
+            WorkerPool._process_pool.shutdown(wait=False, cancel_futures=True)
+            WorkerPool._process_pool = None
+        if WorkerPool._thread_pool is not None:
+            WorkerPool._thread_pool.shutdown(wait=False, cancel_futures=True)
+            WorkerPool._thread_pool = None
+        if WorkerPool._manager is not None:
+            WorkerPool._manager.shutdown()
+            WorkerPool._manager = None
+
+    async def run_io(self, fn: Callable, *args, **kwargs):
+        """Executa uma função bloqueante de I/O no pool de threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_thread_pool(),
+            functools.partial(fn, *args, **kwargs)
+        )
+
+    async def run_cpu(
+        self,
+        fn: Callable,
+        *args,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        segment_callback: Optional[Callable[[dict], None]] = None
+    ):
+        """
+        Executa uma função no pool de processos.
+        Se alguma callback for informada, fn recebe uma fila como último argumento;
+        eventos ('progress', (atual, total)) e ('segment', segmento) enviados nela
+        são repassados às callbacks no event loop.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_process_pool()
+        if progress_callback is None and segment_callback is None:
+            result, loads = await loop.run_in_executor(pool, _call_in_worker, fn, args)
+            self._observe_loads(loads)
+            return result
+
+        # Criar a fila e lê-la são chamadas IPC ao processo do Manager: ficam no pool de threads
+        events_queue = await self.run_io(lambda: self._get_manager().Queue())
+        future = loop.run_in_executor(pool, _call_in_worker, fn, (*args, events_queue))
+        while True:
+            done, _ = await asyncio.wait({future}, timeout=settings.PROGRESS_POLL_INTERVAL)
+            segments, last_progress = await self.run_io(self._collect_events, events_queue)
+            # As callbacks rodam no event loop
+            if segment_callback:
+                for segment in segments:
+                    segment_callback(segment)
+            # Do progresso apenas o último valor interessa; evita inundar o loop com atualizações
+            if last_progress is not None and progress_callback:
+                progress_callback(*last_progress)
+            if done:
+                result, loads = future.result()
+                self._observe_loads(loads)
+                return result
+
+    @staticmethod
+    def _observe_loads(loads: List[Tuple[str, float]]):
+        """Registra no processo da API os carregamentos de modelo informados pelos workers"""
+        for model, seconds in loads:
+            metrics.MODEL_LOAD_SECONDS.labels(model).observe(seconds)
+
+    @staticmethod
+    def _collect_events(events_queue) -> Tuple[list, Optional[tuple]]:
+        """Esvazia a fila de eventos; retorna os segmentos e o último progresso recebidos"""
+        segments = []
+        last_progress = None
+        while True:
+            try:
+                kind, payload = events_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'segment':
+                segments.append(payload)
+            else:
+                last_progress = payload
+        return segments, last_progress
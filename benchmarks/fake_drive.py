@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+import asyncio
+import hashlib
+import re
+import time
+import logging
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+class FakeDrive:
+    """
+    Substituto local da API do Drive (files.get com alt=json e alt=media, com
+    suporte a Range) e receptor dos webhooks, no mesmo servidor aiohttp.
+    A API é apontada para cá com DRIVE_API_ENDPOINT=<url>/drive/v3/.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.host = host
+        self.port = port
+        self.files: Dict[str, dict] = {}
+        self.webhooks: Dict[str, asyncio.Future] = {}
+        self.bytes_served = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_endpoint(self) -> str:
+        return f"{self.url}/drive/v3/"
+
+    @property
+    def webhook_url(self) -> str:
+        return f"{self.url}/webhook"
+
+    def add_file(self, file_id: str, path: Path, duration_seconds: float):
+        md5 = hashlib.md5(path.read_bytes()).hexdigest()
+        self.files[file_id] = {
+            'path': path,
+            'metadata': {
+                'id': file_id,
+                'name': path.name,
+                'mimeType': 'video/mp4',
+                'size': str(path.stat().st_size),
+                'md5Checksum': md5,
+                'modifiedTime': datetime.now(timezone.utc).isoformat(),
+                'videoMediaMetadata': {'durationMillis': str(int(duration_seconds * 1000))}
+            }
+        }
+
+    def expect_webhook(self, request_id: str) -> asyncio.Future:
+        """Future resolvida com (instante de chegada, payload) quando o webhook final chegar"""
+        future = self.webhooks.get(request_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.webhooks[request_id] = future
+        return future
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/drive/v3/files/{file_id}', self._get_file)
+        app.router.add_post('/webhook', self._receive_webhook)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Porta 0: o sistema escolhe uma porta livre
+        self.port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"Drive falso em {self.url}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _get_file(self, request: web.Request) -> web.StreamResponse:
+        entry = self.files.get(request.match_info['file_id'])
+        if entry is None:
+            return web.json_response({'error': {'code': 404, 'message': 'File not found'}}, status=404)
+        if request.query.get('alt') != 'media':
+            return web.json_response(entry['metadata'])
+
+        path: Path = entry['path']
+        total = path.stat().st_size
+        start, end = 0, total - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', request.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)), total - 1)
+            if start >= total:
+                return web.Response(status=416, headers={'Content-Range': f'bytes */{total}'})
+        with open(path, 'rb') as media:
+            media.seek(start)
+            body = media.read(end - start + 1)
+        self.bytes_served += len(body)
+        if not match:
+            return web.Response(body=body, content_type='video/mp4')
+        return web.Response(
+            status=206,
+            body=body,
+            content_type='video/mp4',
+            headers={'Content-Range': f'bytes {start}-{end}/{total}'}
+        )
+
+    async def _receive_webhook(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        request_id = payload.get('request_id')
+        if request_id and payload.get('status') in ('completed', 'error', 'auth_required'):
+            future = self.expect_webhook(request_id)
+            if not future.done():
+                future.set_result((time.monotonic(), payload))
+        return web.json_response({'received': True})
@@ -0,0 +1,26 @@
+from pathlib import Path
+import subprocess
+import logging
+
+logger = logging.getLogger(__name__)
+
+def generate_video(path: Path, seconds: float, frequency: int = 440):
+    """
+    Gera um vídeo sintético com FFmpeg: imagem de teste em baixa resolução e áudio
+    com bipes intercalados por silêncio. A frequência diferencia os arquivos
+    (e, portanto, os checksums), evitando acertos no cache de transcrições.
+    """
+    command = [
+        'ffmpeg',
+        '-f', 'lavfi', '-i', f'testsrc=size=320x240:rate=15:duration={seconds}',
+        '-f', 'lavfi', '-i', f'sine=frequency={frequency}:beep_factor=4:duration={seconds}',
+        '-c:v', 'libx264', '-preset', 'ultrafast',
+        '-c:a', 'aac', '-b:a', '96k',
+        '-shortest',
+        str(path),
+        '-y'
+    ]
+    process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        raise RuntimeError(f"Erro ao gerar vídeo sintético: {process.stderr.decode(errors='replace')}")
+    logger.info(f"Vídeo sintético gerado: {path} ({seconds}s)")
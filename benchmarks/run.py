@@ -0,0 +1,269 @@
+"""
+Benchmark de ponta a ponta: sobe a API real contra um Drive falso local, gera
+vídeos sintéticos, envia solicitações com concorrência fixa e grava um
+relatório JSON com vazão, latências, tempo por etapa, fator de tempo real e
+pico de memória.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.run --jobs 20 --concurrency 4 --durations 30,120 --output report.json
+"""
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import os
+import platform
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import logging
+import aiohttp
+from prometheus_client.parser import text_string_to_metric_families
+from app.services.admission import process_tree_rss_mb
+from benchmarks.fake_drive import FakeDrive
+from benchmarks.media import generate_video
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+STAGES = ('download', 'extract', 'transcribe', 'webhook')
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil por interpolação linear entre as amostras ordenadas"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """Achata as amostras do /metrics em {nome{rótulos}: valor}"""
+    samples = {}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            labels = ','.join(f'{key}={value}' for key, value in sorted(sample.labels.items()))
+            samples[f'{sample.name}{{{labels}}}'] = sample.value
+    return samples
+
+def metrics_delta(before: Dict[str, float], after: Dict[str, float], name: str) -> float:
+    return after.get(name, 0.0) - before.get(name, 0.0)
+
+def write_token_file(path: Path):
+    """Token fictício válido por um ano: a API não tenta renová-lo durante o benchmark"""
+    expiry = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() + 365 * 24 * 3600))
+    path.write_text(json.dumps({
+        'token': 'benchmark',
+        'refresh_token': 'benchmark',
+        'client_id': 'benchmark',
+        'client_secret': 'benchmark',
+        'token_uri': 'https://oauth2.googleapis.com/token',
+        'scopes': ['https://www.googleapis.com/auth/drive.readonly'],
+        'expiry': expiry
+    }))
+
+def start_api(work_dir: Path, drive: FakeDrive, port: int, api_key: str, extra_env: Dict[str, str]) -> subprocess.Popen:
+    """Inicia a API (uvicorn main:app) com estado, cache e arquivos temporários isolados"""
+    token_file = work_dir / 'token.json'
+    write_token_file(token_file)
+    env = {
+        **os.environ,
+        'API_KEY': api_key,
+        'DRIVE_API_ENDPOINT': drive.api_endpoint,
+        'TOKEN_FILE': str(token_file),
+        'TEMP_DIR': str(work_dir / 'temp'),
+        'CACHE_DIR': str(work_dir / 'cache'),
+        'JOB_STORE_PATH': str(work_dir / 'jobs.db'),
+        # Os vídeos se repetem entre as solicitações; os caches esconderiam download e inferência
+        'TRANSCRIPTION_CACHE_ENABLED': 'false',
+        'AUDIO_CACHE_ENABLED': 'false',
+        **extra_env
+    }
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port)],
+        cwd=REPO_DIR,
+        env=env,
+        stdout=open(work_dir / 'api.log', 'wb'),
+        stderr=subprocess.STDOUT
+    )
+
+async def wait_until_healthy(session: aiohttp.ClientSession, api_url: str, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"A API encerrou durante a inicialização (código {process.returncode})")
+        try:
+            async with session.get(f'{api_url}/api/v1/health') as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError("A API não ficou disponível a tempo")
+
+async def sample_rss(pid: int, peak: Dict[str, float], interval: float):
+    """Acompanha o pico de RSS da API e dos processos filhos (inferência, FFmpeg)"""
+    while True:
+        peak['rss_mb'] = max(peak['rss_mb'], process_tree_rss_mb(pid))
+        await asyncio.sleep(interval)
+
+async def run_job(session, api_url, api_key, drive: FakeDrive, file_id: str, semaphore: asyncio.Semaphore, results: list, timeout: float):
+    async with semaphore:
+        submitted = time.monotonic()
+        async with session.post(
+            f'{api_url}/api/v1/transcribe',
+            headers={'X-API-Key': api_key},
+            json={'file_id': file_id, 'webhook_url': drive.webhook_url}
+        ) as response:
+            body = await response.json()
+        if response.status != 200:
+            results.append({'file_id': file_id, 'status': f'http_{response.status}', 'error': body})
+            return
+        request_id = body['request_id']
+        try:
+            finished, payload = await asyncio.wait_for(drive.expect_webhook(request_id), timeout)
+        except asyncio.TimeoutError:
+            results.append({'request_id': request_id, 'file_id': file_id, 'status': 'timeout'})
+            return
+        results.append({
+            'request_id': request_id,
+            'file_id': file_id,
+            'status': payload.get('status'),
+            'latency_seconds': finished - submitted,
+            'error': payload.get('error')
+        })
+
+async def run_benchmark(args) -> dict:
+    work_dir = Path(tempfile.mkdtemp(prefix='transcricao-bench-'))
+    durations = [float(value) for value in args.durations.split(',')]
+    drive = FakeDrive()
+    await drive.start()
+
+    # Um vídeo por duração configurada, cada um com checksum próprio
+    audio_seconds_by_file = {}
+    for index, seconds in enumerate(durations):
+        path = work_dir / f'video_{index}.mp4'
+        await asyncio.get_running_loop().run_in_executor(None, generate_video, path, seconds, 300 + 100 * index)
+        file_id = f'bench-{index}'
+        drive.add_file(file_id, path, seconds)
+        audio_seconds_by_file[file_id] = seconds
+
+    api_key = 'cascade_' + secrets.token_urlsafe(16)
+    api_url = f'http://127.0.0.1:{args.port}'
+    extra_env = dict(item.split('=', 1) for item in args.env)
+    process = start_api(work_dir, drive, args.port, api_key, extra_env)
+    peak = {'rss_mb': 0.0}
+    sampler = None
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None)) as session:
+            await wait_until_healthy(session, api_url, process, args.startup_timeout)
+            sampler = asyncio.create_task(sample_rss(process.pid, peak, args.rss_interval))
+            async with session.get(f'{api_url}/api/v1/metrics') as response:
+                before = parse_metrics(await response.text())
+
+            file_ids = list(audio_seconds_by_file)
+            semaphore = asyncio.Semaphore(args.concurrency)
+            results: List[dict] = []
+            started = time.monotonic()
+            await asyncio.gather(*[
+                run_job(session, api_url, api_key, drive, file_ids[index % len(file_ids)], semaphore, results, args.job_timeout)
+                for index in range(args.jobs)
+            ])
+            wall_seconds = time.monotonic() - started
+
+            async with session.get(f'{api_url}/api/v1/metrics') as response:
+                after = parse_metrics(await response.text())
+    finally:
+        if sampler is not None:
+            sampler.cancel()
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        await drive.stop()
+
+    completed = [result for result in results if result['status'] == 'completed']
+    latencies = [result['latency_seconds'] for result in completed]
+    audio_seconds = sum(audio_seconds_by_file[result['file_id']] for result in completed)
+
+    stages = {}
+    for stage in STAGES:
+        count = metrics_delta(before, after, f'transcricao_stage_duration_seconds_count{{stage={stage}}}')
+        total = metrics_delta(before, after, f'transcricao_stage_duration_seconds_sum{{stage={stage}}}')
+        stages[stage] = {
+            'count': int(count),
+            'total_seconds': round(total, 3),
+            'mean_seconds': round(total / count, 3) if count else None
+        }
+    rtf_count = metrics_delta(before, after, 'transcricao_real_time_factor_count{}')
+    rtf_sum = metrics_delta(before, after, 'transcricao_real_time_factor_sum{}')
+
+    return {
+        'config': {
+            'jobs': args.jobs,
+            'concurrency': args.concurrency,
+            'durations_seconds': durations,
+            'env': extra_env
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'jobs': {
+            'submitted': args.jobs,
+            'completed': len(completed),
+            'failed': len(results) - len(completed),
+            'failures': [result for result in results if result['status'] != 'completed'][:20]
+        },
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput': {
+            'jobs_per_minute': round(len(completed) / wall_seconds * 60, 3) if wall_seconds else 0.0,
+            'audio_seconds_per_second': round(audio_seconds / wall_seconds, 3) if wall_seconds else 0.0
+        },
+        'latency_seconds': {
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'mean': round(sum(latencies) / len(latencies), 3) if latencies else None,
+            'max': round(max(latencies), 3) if latencies else None
+        },
+        'stages': stages,
+        'real_time_factor': {
+            'mean': round(rtf_sum / rtf_count, 4) if rtf_count else None,
+            'aggregate': round(stages['transcribe']['total_seconds'] / audio_seconds, 4) if audio_seconds else None
+        },
+        'downloaded_bytes': int(metrics_delta(before, after, 'transcricao_downloaded_bytes_total{}')),
+        'peak_rss_mb': round(peak['rss_mb'], 1),
+        'work_dir': str(work_dir)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da API de transcrição com Drive falso e vídeos sintéticos")
+    parser.add_argument('--jobs', type=int, default=10, help="Total de solicitações")
+    parser.add_argument('--concurrency', type=int, default=2, help="Solicitações em andamento ao mesmo tempo")
+    parser.add_argument('--durations', default='30', help="Durações (s) dos vídeos sintéticos, separadas por vírgula")
+    parser.add_argument('--port', type=int, default=8765, help="Porta da API iniciada pelo benchmark")
+    parser.add_argument('--env', action='append', default=[], metavar='CHAVE=VALOR', help="Configuração extra da API (repetível)")
+    parser.add_argument('--startup-timeout', type=float, default=300, help="Espera máxima pela API (carregamento dos modelos)")
+    parser.add_argument('--job-timeout', type=float, default=3600, help="Espera máxima pelo webhook de cada solicitação")
+    parser.add_argument('--rss-interval', type=float, default=0.5, help="Intervalo de amostragem do RSS")
+    parser.add_argument('--output', help="Arquivo do relatório JSON (padrão: saída padrão)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    report = asyncio.run(run_benchmark(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output)
+        logger.info(f"Relatório gravado em {args.output}")
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+import pytest
+from app.core.config import settings
+from app.services.job_store import JobStore
+
+@pytest.fixture
+def job_store(tmp_path, monkeypatch):
+    """JobStore em um SQLite temporário, fechado ao final do teste"""
+    monkeypatch.setattr(settings, 'JOB_STORE_PATH', tmp_path / "jobs.db")
+    store = JobStore()
+    store.close()
+    yield store
+    store.close()
@@ -0,0 +1,76 @@
+import os
+import time
+import pytest
+from app.core.config import settings
+from app.services.audio_cache import AudioCache
+
+KEY = "a" * 64
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'CACHE_DIR', tmp_path / "cache")
+    monkeypatch.setattr(settings, 'AUDIO_CACHE_ENABLED', True)
+    monkeypatch.setattr(settings, 'AUDIO_CACHE_MAX_MB', 1)
+    monkeypatch.setattr(settings, 'TEMP_MIN_FREE_MB', 0)
+    return AudioCache()
+
+def make_audio(path, content: bytes = b"\x01\x00" * 100):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+def test_fetch_miss(cache, tmp_path):
+    assert not cache.fetch(KEY, tmp_path / "job" / "audio.pcm")
+
+def test_put_then_fetch(cache, tmp_path):
+    source = make_audio(tmp_path / "job1" / "audio.pcm")
+    cache.put(KEY, source)
+    destination = tmp_path / "job2" / "audio.pcm"
+    destination.parent.mkdir()
+    assert cache.fetch(KEY, destination)
+    assert destination.read_bytes() == source.read_bytes()
+
+def test_fetch_into_restored_workspace(cache, tmp_path):
+    # O workspace restaurado já contém o áudio ligado à entrada pelo put anterior
+    audio_path = make_audio(tmp_path / "job" / "audio.pcm")
+    cache.put(KEY, audio_path)
+    assert cache.fetch(KEY, audio_path)
+    assert os.path.samefile(audio_path, cache.path_for(KEY))
+
+def test_fetch_replaces_stale_destination(cache, tmp_path):
+    source = make_audio(tmp_path / "job1" / "audio.pcm")
+    cache.put(KEY, source)
+    destination = make_audio(tmp_path / "job2" / "audio.pcm", b"\x00" * 10)
+    assert cache.fetch(KEY, destination)
+    assert destination.read_bytes() == source.read_bytes()
+
+def test_non_pcm_destination_is_not_cached(cache, tmp_path):
+    source = make_audio(tmp_path / "job" / "audio.pcm")
+    cache.put(KEY, source)
+    assert not cache.fetch(KEY, tmp_path / "job" / "audio.mp3")
+
+def test_eviction_removes_least_recently_used(cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(AudioCache, 'max_bytes', property(lambda self: 250))
+    old = make_audio(tmp_path / "job1" / "audio.pcm")
+    cache.put("old", old)
+    # mtime mais antigo = menos usado recentemente
+    past = time.time() - 60
+    os.utime(cache.path_for("old"), (past, past))
+    new = make_audio(tmp_path / "job2" / "audio.pcm")
+    cache.put("new", new)
+    assert not cache.path_for("old").exists()
+    assert cache.path_for("new").exists()
+
+def test_fetch_refreshes_lru_order(cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(AudioCache, 'max_bytes', property(lambda self: 450))
+    for key in ("first", "second"):
+        cache.put(key, make_audio(tmp_path / key / "audio.pcm"))
+    past = time.time() - 60
+    os.utime(cache.path_for("first"), (past, past))
+    os.utime(cache.path_for("second"), (past + 1, past + 1))
+    # Uma leitura torna "first" a entrada mais recente
+    (tmp_path / "reader").mkdir()
+    assert cache.fetch("first", tmp_path / "reader" / "audio.pcm")
+    cache.put("third", make_audio(tmp_path / "third" / "audio.pcm"))
+    assert cache.path_for("first").exists()
+    assert not cache.path_for("second").exists()
@@ -0,0 +1,109 @@
+import asyncio
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.checkpoint import PROMPT_SEGMENTS, TranscriptionCheckpoint
+from app.services.transcription import SAMPLE_RATE, TranscriptionService
+from app.services.worker_pool import WorkerPool
+
+@pytest.fixture(autouse=True)
+def checkpoint_settings(monkeypatch, job_store):
+    monkeypatch.setattr(settings, 'CHECKPOINT_ENABLED', True)
+    monkeypatch.setattr(settings, 'CHECKPOINT_INTERVAL_SECONDS', 0.0)
+
+async def flush(checkpoint: TranscriptionCheckpoint):
+    await asyncio.gather(*checkpoint._pending)
+
+def segment(start: float, end: float, text: str) -> dict:
+    return {'start': start, 'end': end, 'text': text}
+
+def test_record_and_load():
+    async def scenario():
+        checkpoint = await TranscriptionCheckpoint.load("job", "fp")
+        checkpoint.record("single:audio.pcm", [segment(0, 2, " a")], resume_at=2.0, prompt="a")
+        await flush(checkpoint)
+        return await TranscriptionCheckpoint.load("job", "fp")
+
+    state = asyncio.run(scenario()).get("single:audio.pcm")
+    assert state['segments'] == [segment(0, 2, " a")]
+    assert state['resume_at'] == 2.0
+    assert not state['done']
+
+def test_load_ignores_other_fingerprint():
+    async def scenario():
+        checkpoint = await TranscriptionCheckpoint.load("job", "old")
+        checkpoint.record("single:audio.pcm", [segment(0, 2, " a")], resume_at=2.0)
+        await flush(checkpoint)
+        return await TranscriptionCheckpoint.load("job", "new")
+
+    assert asyncio.run(scenario()).get("single:audio.pcm") is None
+
+def test_intermediate_records_respect_interval(monkeypatch):
+    monkeypatch.setattr(settings, 'CHECKPOINT_INTERVAL_SECONDS', 3600.0)
+
+    async def scenario():
+        checkpoint = await TranscriptionCheckpoint.load("job", "fp")
+        checkpoint.record("s", [segment(0, 1, " a")], resume_at=1.0)
+        checkpoint.record("s", [segment(0, 1, " a"), segment(1, 2, " b")], resume_at=2.0)
+        await flush(checkpoint)
+        stored = await TranscriptionCheckpoint.load("job", "fp")
+        checkpoint.record("s", [segment(0, 1, " a"), segment(1, 2, " b")], done=True, resume_at=2.0)
+        await flush(checkpoint)
+        return stored.get("s"), (await TranscriptionCheckpoint.load("job", "fp")).get("s")
+
+    throttled, final = asyncio.run(scenario())
+    assert throttled['resume_at'] == 1.0
+    assert final['done'] and final['resume_at'] == 2.0
+
+def test_clear_removes_checkpoints():
+    async def scenario():
+        checkpoint = await TranscriptionCheckpoint.load("job", "fp")
+        checkpoint.record("s", [segment(0, 1, " a")], done=True)
+        await checkpoint.clear()
+        return await TranscriptionCheckpoint.load("job", "fp")
+
+    assert asyncio.run(scenario()).get("s") is None
+
+def test_prompt_text_uses_last_segments():
+    segments = [segment(i, i + 1, f" w{i}") for i in range(PROMPT_SEGMENTS + 2)]
+    assert TranscriptionCheckpoint.prompt_text(segments) == " ".join(f"w{i}" for i in range(2, PROMPT_SEGMENTS + 2))
+
+class Interrupted(Exception):
+    pass
+
+def test_long_audio_chunk_resumes_inside_chunk(tmp_path, monkeypatch):
+    audio_path = tmp_path / "audio.pcm"
+    np.zeros(60 * SAMPLE_RATE, dtype=np.int16).tofile(audio_path)
+    stream = f"chunk:{audio_path.name}:0"
+    calls = []
+
+    async def crashing_run_cpu(self, fn, audio, start, end, language, model_name, backend, prompt, segment_callback=None):
+        calls.append((start, prompt))
+        segment_callback(segment(0.0, 10.0, " um"))
+        segment_callback(segment(10.0, 20.0, " dois"))
+        raise Interrupted()
+
+    async def resumed_run_cpu(self, fn, audio, start, end, language, model_name, backend, prompt, segment_callback=None):
+        calls.append((start, prompt))
+        return [segment(20.0, 30.0, " três")]
+
+    async def run(fake):
+        monkeypatch.setattr(WorkerPool, 'run_cpu', fake)
+        checkpoint = await TranscriptionCheckpoint.load("job", "fp")
+        service = TranscriptionService(backend='faster-whisper', checkpoint=checkpoint)
+        try:
+            return await service._transcribe_chunk(audio_path, stream, checkpoint.get(stream), 0, 60 * SAMPLE_RATE)
+        finally:
+            await flush(checkpoint)
+
+    with pytest.raises(Interrupted):
+        asyncio.run(run(crashing_run_cpu))
+    segments = asyncio.run(run(resumed_run_cpu))
+
+    assert calls == [(0, None), (20 * SAMPLE_RATE, "um dois")]
+    assert [item['text'] for item in segments] == [" um", " dois", " três"]
+
+    async def stored():
+        return (await TranscriptionCheckpoint.load("job", "fp")).get(stream)
+
+    assert asyncio.run(stored())['done']
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+import pytest
+from app.services.inference_batcher import WINDOW_FRAMES, _parse_window
+
+# Tokens de texto < EOT; timestamps a partir de TIMESTAMP_BEGIN, em passos de TIME_PRECISION
+EOT = 50
+TIMESTAMP_BEGIN = 100
+INPUT_STRIDE = 2
+TIME_PRECISION = 0.02
+
+class Tokenizer:
+    eot = EOT
+    timestamp_begin = TIMESTAMP_BEGIN
+
+    @staticmethod
+    def decode(tokens):
+        return "".join(f" {token}" for token in tokens)
+
+def parse(tokens, frames: int = WINDOW_FRAMES):
+    return _parse_window(SimpleNamespace(tokens=tokens), Tokenizer, frames, INPUT_STRIDE, TIME_PRECISION)
+
+def test_complete_segments_advance_whole_window():
+    tokens = [100, 1, 2, 150, 150, 3, 200]
+    segments, advance, prompt = parse(tokens)
+    assert segments == [
+        {'start': 0.0, 'end': 1.0, 'text': " 1 2"},
+        {'start': 1.0, 'end': 2.0, 'text': " 3"},
+    ]
+    assert advance == WINDOW_FRAMES
+    assert prompt == tokens
+
+def test_window_ending_mid_segment_seeks_to_last_timestamp():
+    segments, advance, prompt = parse([100, 1, 150, 150, 2])
+    assert segments == [{'start': 0.0, 'end': 1.0, 'text': " 1"}]
+    # 50 passos de timestamp * INPUT_STRIDE quadros
+    assert advance == 100
+    # O texto incompleto depois do último timestamp fica fora do prompt
+    assert prompt == [100, 1, 150]
+
+def test_single_segment_uses_last_timestamp_as_end():
+    segments, advance, _ = parse([100, 1, 2, 175])
+    assert segments == [{'start': 0.0, 'end': pytest.approx(1.5), 'text': " 1 2"}]
+    assert advance == WINDOW_FRAMES
+
+def test_without_timestamps_segment_spans_the_window():
+    segments, advance, prompt = parse([1, 2], frames=1500)
+    assert segments == [{'start': 0.0, 'end': 15.0, 'text': " 1 2"}]
+    assert advance == 1500
+    assert prompt == [1, 2]
@@ -0,0 +1,26 @@
+import time
+
+def test_due_webhooks_skip_in_flight(job_store):
+    now = time.time()
+    first = job_store.add_webhook("r1", "http://example.com/hook", {'status': 'completed'}, now - 10)
+    second = job_store.add_webhook("r2", "http://example.com/hook", {'status': 'completed'}, now - 5)
+    assert [delivery['id'] for delivery in job_store.due_webhooks(now, 10)] == [first, second]
+    assert [delivery['id'] for delivery in job_store.due_webhooks(now, 10, [first])] == [second]
+    assert job_store.due_webhooks(now, 10, [first, second]) == []
+
+def test_next_webhook_at_ignores_in_flight(job_store):
+    now = time.time()
+    first = job_store.add_webhook("r1", "http://example.com/hook", {}, now - 10)
+    second = job_store.add_webhook("r2", "http://example.com/hook", {}, now)
+    job_store.retry_webhook(second, 1, now + 60, "timeout")
+    assert job_store.next_webhook_at() == job_store.next_webhook_at([]) < now
+    assert job_store.next_webhook_at([first]) == now + 60
+    assert job_store.next_webhook_at([first, second]) is None
+
+def test_prune_removes_old_dead_webhooks(job_store):
+    delivery = job_store.add_webhook("r1", "http://example.com/hook", {}, time.time() - 7200)
+    job_store.retry_webhook(delivery, 10, None, "HTTP 500")
+    job_store.prune(3600)
+    assert job_store.next_webhook_at() is None
+    connection = job_store._get_connection()
+    assert connection.execute("SELECT COUNT(*) FROM webhook_outbox").fetchone()[0] == 0
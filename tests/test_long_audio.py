@@ -0,0 +1,32 @@
+import numpy as np
+from app.services.transcription import SAMPLE_RATE, TranscriptionService
+
+def segment(start: float, end: float, text: str) -> dict:
+    return {'start': start, 'end': end, 'text': text}
+
+def test_split_points_cut_at_quietest_frame():
+    samples = np.full(25 * SAMPLE_RATE, 8000, dtype=np.int16)
+    # Pausa em 8 s, dentro da busca dos últimos 5 s do primeiro trecho de 10 s
+    samples[8 * SAMPLE_RATE:8 * SAMPLE_RATE + SAMPLE_RATE // 10] = 0
+    boundaries = TranscriptionService.find_split_points(samples, 10 * SAMPLE_RATE, 5 * SAMPLE_RATE)
+    assert boundaries[0] == 0 and boundaries[-1] == len(samples)
+    assert boundaries[1] == 8 * SAMPLE_RATE + SAMPLE_RATE // 20
+    assert all(b - a <= 10 * SAMPLE_RATE for a, b in zip(boundaries, boundaries[1:]))
+
+def test_short_audio_is_a_single_chunk():
+    samples = np.zeros(5 * SAMPLE_RATE, dtype=np.int16)
+    assert TranscriptionService.find_split_points(samples, 10 * SAMPLE_RATE, SAMPLE_RATE) == [0, len(samples)]
+
+def test_build_chunks_adds_overlap_within_bounds():
+    chunks = TranscriptionService.build_chunks([0, 100, 200], 200, 10)
+    assert chunks == [(0, 110, 0, 100), (90, 200, 100, 200)]
+
+def test_stitch_keeps_segment_in_owning_chunk():
+    chunks = TranscriptionService.build_chunks([0, 10 * SAMPLE_RATE, 20 * SAMPLE_RATE], 20 * SAMPLE_RATE, SAMPLE_RATE)
+    results = [
+        [segment(0.0, 5.0, " um"), segment(8.0, 10.8, " dois")],
+        # A sobreposição repete "dois" (ponto médio antes do corte) e "três" (texto idêntico)
+        [segment(9.0, 10.6, " dois"), segment(10.2, 10.9, " três"), segment(11.0, 11.5, " três"), segment(12.0, 15.0, " quatro")],
+    ]
+    stitched = TranscriptionService.stitch_segments(chunks, results)
+    assert [item['text'] for item in stitched] == [" um", " dois", " três", " quatro"]
@@ -0,0 +1,77 @@
+import pytest
+from app.core.config import settings
+from app.services.scheduler import (
+    LARGE_LANE, NORMAL_LANE, estimate_duration_seconds, lane_for, order_pending, system_virtual_time
+)
+
+def job(request_id: str, client_id: str = 'default', duration: float = 60.0) -> dict:
+    return {'request_id': request_id, 'client_id': client_id, 'duration_seconds': duration}
+
+def ids(jobs) -> list:
+    return [job['request_id'] for job in jobs]
+
+@pytest.fixture
+def policy(monkeypatch):
+    def set_policy(name: str, weights: dict = None):
+        monkeypatch.setattr(settings, 'SCHEDULER_POLICY', name)
+        monkeypatch.setattr(settings, 'SCHEDULER_CLIENT_WEIGHTS', weights or {})
+    return set_policy
+
+def test_fifo_keeps_arrival_order(policy):
+    policy('fifo')
+    jobs = [job('a', duration=300), job('b', duration=10)]
+    assert ids(order_pending(jobs, {})) == ['a', 'b']
+
+def test_sjf_orders_by_duration(policy):
+    policy('sjf')
+    jobs = [job('a', duration=300), job('b', duration=10), job('c', duration=60)]
+    assert ids(order_pending(jobs, {})) == ['b', 'c', 'a']
+
+def test_fair_alternates_between_clients(policy):
+    policy('fair')
+    jobs = [job('a0', 'A'), job('a1', 'A'), job('a2', 'A'), job('b0', 'B'), job('b1', 'B')]
+    assert ids(order_pending(jobs, {})) == ['a0', 'b0', 'a1', 'b1', 'a2']
+
+def test_fair_shortest_first_within_client(policy):
+    policy('fair')
+    jobs = [job('long', 'A', 600), job('short', 'A', 30)]
+    assert ids(order_pending(jobs, {})) == ['short', 'long']
+
+def test_fair_respects_weights(policy):
+    policy('fair', {'A': 2.0})
+    jobs = [job(f'a{i}', 'A') for i in range(4)] + [job(f'b{i}', 'B') for i in range(2)]
+    assert ids(order_pending(jobs, {})) == ['a0', 'b0', 'a1', 'a2', 'b1', 'a3']
+
+def test_fair_new_client_starts_at_system_virtual_time(policy):
+    policy('fair')
+    served = {'A': 100000.0}
+    jobs = [job(f'a{i}', 'A') for i in range(3)] + [job(f'b{i}', 'B') for i in range(3)]
+    virtual_time = system_virtual_time(served, ['A'])
+    # Sem o tempo virtual do sistema, B passaria à frente de todos os jobs de A
+    assert ids(order_pending(jobs, served, virtual_time)) == ['a0', 'b0', 'a1', 'b1', 'a2', 'b2']
+
+def test_system_virtual_time_is_min_over_backlogged_clients(policy):
+    policy('fair', {'B': 2.0})
+    served = {'A': 300.0, 'B': 400.0, 'idle': 10.0}
+    assert system_virtual_time(served, ['A', 'B']) == 200.0
+
+def test_system_virtual_time_never_decreases(policy):
+    policy('fair')
+    assert system_virtual_time({'A': 50.0}, ['A'], current=120.0) == 120.0
+    assert system_virtual_time({}, [], current=120.0) == 120.0
+
+def test_estimate_duration_prefers_media_metadata(monkeypatch):
+    monkeypatch.setattr(settings, 'SCHEDULER_ASSUMED_BITRATE', 8_000)
+    assert estimate_duration_seconds({'videoMediaMetadata': {'durationMillis': '90000'}, 'size': '1'}) == 90.0
+    assert estimate_duration_seconds({'size': '1000'}) == 1.0
+    assert estimate_duration_seconds(None) == settings.SCHEDULER_DEFAULT_DURATION_SECONDS
+
+def test_lane_for_large_jobs(monkeypatch):
+    monkeypatch.setattr(settings, 'LARGE_LANE_WORKERS', 1)
+    monkeypatch.setattr(settings, 'LARGE_JOB_DURATION_SECONDS', 3600)
+    monkeypatch.setattr(settings, 'LARGE_JOB_SIZE_BYTES', 1000)
+    assert lane_for(60, 10) == NORMAL_LANE
+    assert lane_for(7200, 10) == LARGE_LANE
+    assert lane_for(60, 5000) == LARGE_LANE
+    monkeypatch.setattr(settings, 'LARGE_LANE_WORKERS', 0)
+    assert lane_for(7200, 5000) == NORMAL_LANE
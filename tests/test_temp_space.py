@@ -0,0 +1,76 @@
+import asyncio
+import os
+import time
+import uuid
+import pytest
+from app.core.config import settings
+from app.services.temp_space import MB, TempSpaceError, TempSpaceManager
+
+@pytest.fixture
+def temp_space(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'TEMP_DIR', tmp_path / "temp")
+    monkeypatch.setattr(settings, 'CACHE_DIR', tmp_path / "cache")
+    monkeypatch.setattr(settings, 'TEMP_JOB_QUOTA_MB', 20)
+    monkeypatch.setattr(settings, 'TEMP_MIN_FREE_MB', 0)
+    monkeypatch.setattr(TempSpaceManager, '_workspaces', {})
+    monkeypatch.setattr(TempSpaceManager, 'free_bytes', lambda self: 100 * MB)
+    (tmp_path / "temp").mkdir()
+    return TempSpaceManager()
+
+def test_allocate_creates_workspace(temp_space):
+    request_id = str(uuid.uuid4())
+    path = temp_space.allocate(request_id, 5 * MB)
+    assert path.is_dir()
+    assert temp_space.owns(request_id)
+    assert temp_space.get_stats()['reserved_mb'] == 5
+
+def test_allocate_rejects_above_quota(temp_space):
+    with pytest.raises(TempSpaceError):
+        temp_space.allocate(str(uuid.uuid4()), 21 * MB)
+
+def test_allocate_counts_outstanding_reservations(temp_space, monkeypatch):
+    monkeypatch.setattr(settings, 'TEMP_MIN_FREE_MB', 85)
+    first = str(uuid.uuid4())
+    temp_space.allocate(first, 10 * MB)
+    with pytest.raises(TempSpaceError):
+        temp_space.allocate(str(uuid.uuid4()), 6 * MB)
+    # Realocar a mesma solicitação substitui a própria reserva
+    temp_space.allocate(first, 12 * MB)
+
+def test_check_quota_interrupts_download(temp_space):
+    request_id = str(uuid.uuid4())
+    temp_space.allocate(request_id, MB)
+    temp_space.check_quota(request_id, 20 * MB)
+    with pytest.raises(TempSpaceError):
+        temp_space.check_quota(request_id, 21 * MB)
+
+def test_release_removes_workspace(temp_space):
+    request_id = str(uuid.uuid4())
+    path = temp_space.allocate(request_id, MB)
+    (path / "video.mp4").write_bytes(b"0" * 10)
+    asyncio.run(temp_space.release(request_id))
+    assert not path.exists()
+    assert not temp_space.owns(request_id)
+
+def test_sweep_removes_only_orphan_workspaces(temp_space):
+    root = temp_space.root
+    active = str(uuid.uuid4())
+    temp_space.allocate(active, MB)
+    kept = root / str(uuid.uuid4())
+    orphan = root / str(uuid.uuid4())
+    other = root / "nao-e-workspace"
+    for path in (kept, orphan, other):
+        path.mkdir()
+    assert temp_space.sweep(keep=[kept.name]) == 1
+    assert not orphan.exists()
+    assert kept.exists() and other.exists() and (root / active).exists()
+
+def test_sweep_skips_recently_modified(temp_space):
+    orphan = temp_space.root / str(uuid.uuid4())
+    orphan.mkdir()
+    (orphan / "audio.pcm").write_bytes(b"\x00" * 10)
+    assert temp_space.sweep(min_age=60) == 0
+    past = time.time() - 120
+    os.utime(orphan / "audio.pcm", (past, past))
+    os.utime(orphan, (past, past))
+    assert temp_space.sweep(min_age=60) == 1
@@ -0,0 +1,65 @@
+import asyncio
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.transcription import SAMPLE_RATE, TranscriptionService
+from app.services.vad import SpeechTimeline, detect_speech
+
+@pytest.fixture(autouse=True)
+def vad_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'VAD_BACKEND', 'energy')
+    monkeypatch.setattr(settings, 'VAD_GAP_SECONDS', 0.5)
+    monkeypatch.setattr(settings, 'VAD_PADDING_SECONDS', 0.0)
+
+def tone(seconds: float, amplitude: int = 8000) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+
+def test_detects_speech_between_silences():
+    samples = np.concatenate([silence(3), tone(2), silence(3), tone(2), silence(3)])
+    spans = detect_speech(samples)
+    assert len(spans) == 2
+    assert spans[0][0] == pytest.approx(3 * SAMPLE_RATE, abs=480)
+    assert spans[1][1] == pytest.approx(10 * SAMPLE_RATE, abs=480)
+
+def test_constant_tone_is_all_speech():
+    # Sem silêncio para estimar o ruído de fundo, o limiar relativo descartaria tudo
+    samples = tone(10)
+    assert detect_speech(samples) == [(0, len(samples) // 480 * 480)]
+
+def test_digital_silence_has_no_speech():
+    assert detect_speech(silence(5)) == []
+
+def test_timeline_maps_back_to_original():
+    spans = [(2 * SAMPLE_RATE, 4 * SAMPLE_RATE), (10 * SAMPLE_RATE, 11 * SAMPLE_RATE)]
+    timeline = SpeechTimeline(spans, 20 * SAMPLE_RATE)
+    assert timeline.to_original(0.5) == 2.5
+    # O segundo intervalo começa após 2 s de fala e 0,5 s de silêncio inserido
+    assert timeline.to_original(2.75) == 10.25
+    # Tempos dentro do silêncio inserido ficam presos ao fim do intervalo anterior
+    assert timeline.to_original(2.2) == 4.0
+    remapped = timeline.remap_segment({'start': 1.0, 'end': 3.0, 'text': " oi"})
+    assert remapped == {'start': 3.0, 'end': 10.5, 'text': " oi"}
+    stats = timeline.get_stats()
+    assert stats['speech_seconds'] == 3.0
+    assert stats['skipped_seconds'] == 17.0
+    assert stats['speech_regions'] == 2
+
+def test_speech_only_falls_back_to_full_audio(tmp_path, monkeypatch):
+    audio_path = tmp_path / "audio.pcm"
+    silence(5).tofile(audio_path)
+    calls = []
+
+    async def fake_transcribe_file(self, path, language=None, progress_callback=None, segment_callback=None):
+        calls.append(path)
+        return " texto"
+
+    monkeypatch.setattr(TranscriptionService, '_transcribe_file', fake_transcribe_file)
+    service = TranscriptionService(backend='faster-whisper')
+    assert asyncio.run(service.transcribe_speech_only(audio_path)) == " texto"
+    assert calls == [audio_path]
+    assert service.vad_stats['fallback']
+    assert service.vad_stats['skipped_seconds'] == 0.0
@@ -0,0 +1,50 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from prometheus_client import REGISTRY
+from app.core.config import settings
+from app.services import model_registry
+from app.services.model_registry import ModelRegistry
+from app.services.worker_pool import WorkerPool
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(ModelRegistry, '_models', OrderedDict())
+    monkeypatch.setattr(ModelRegistry, '_loads', [])
+    monkeypatch.setitem(model_registry.LOADERS, 'whisper', lambda model_name: object())
+    monkeypatch.setattr(settings, 'WHISPER_MODEL_MEMORY_BUDGET_MB', 400)
+    return ModelRegistry()
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Threads no lugar dos processos: o registro de modelos é o mesmo do teste
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(WorkerPool, '_get_process_pool', lambda self: executor)
+    yield WorkerPool()
+    executor.shutdown()
+
+def load_count(model: str) -> float:
+    return REGISTRY.get_sample_value('transcricao_model_load_seconds_count', {'model': model}) or 0.0
+
+def load_model(model_name: str):
+    ModelRegistry().get_model(model_name, 'whisper')
+    return model_name
+
+def test_take_loads_reports_each_load_once(registry):
+    registry.get_model('tiny', 'whisper')
+    registry.get_model('tiny', 'whisper')
+    assert [key for key, _ in registry.take_loads()] == ['whisper:tiny']
+    assert registry.take_loads() == []
+
+def test_lazy_loads_and_reloads_are_observed(registry, pool):
+    before = load_count('whisper:base')
+
+    async def scenario():
+        await pool.run_cpu(load_model, 'base')
+        # 'small' não cabe junto de 'base' no orçamento: 'base' é descartado e recarregado
+        await pool.run_cpu(load_model, 'small')
+        await pool.run_cpu(load_model, 'base')
+
+    asyncio.run(scenario())
+    assert load_count('whisper:base') == before + 2